@@ -1,9 +1,11 @@
 import datetime
+from functools import lru_cache
 
 import pytest
 from schema import Or, Optional, Regex, Schema
 
 from schemas import atlas_matrix, atlas_obj
+from tools.build_cache import BuildCache
 from tools.create_matrix import load_atlas_data
 
 """
@@ -14,6 +16,26 @@ This file is in the top-level of the repo for access to tools and schemas.
 https://docs.pytest.org/en/6.2.x/fixture.html#conftest-py-sharing-fixtures-across-multiple-files
 """
 
+# Path to the ATLAS data file loaded for tests
+PATH_TO_DATA_FILE = 'data/data.yaml'
+
+# Built ATLAS data, shared by each test generation hook call and by test processes
+build_cache = BuildCache()
+
+def pytest_addoption(parser):
+    parser.addoption("--no-build-cache", action="store_true", help="Build ATLAS data for each use instead of loading it from .atlas-cache/builds")
+
+def get_atlas_data(config):
+    """Returns a fresh copy of the ATLAS data, loaded from the build cache unless disabled."""
+    if config.getoption("no_build_cache"):
+        return load_atlas_data(PATH_TO_DATA_FILE)
+    return build_cache.load(PATH_TO_DATA_FILE)
+
+@pytest.fixture(scope='module')
+def atlas_data(request):
+    """Represents the ATLAS output data dictionary, copied for each test module."""
+    return get_atlas_data(request.config)
+
 #region Parameterized fixtures
 @pytest.fixture(scope='session')
 def output_data(request):
@@ -67,8 +89,8 @@ def text_to_be_spellchecked(request):
     return request.param
 
 @pytest.fixture(scope='session')
-def all_data_objects(request):
-    """Represents IDs in data objects, such as tactics, techniques, and case studies. """
+def texts_to_be_spellchecked(request):
+    """Represents all text to be spell-checked as one list, to be checked in one batch."""
     return request.param
 
 @pytest.fixture(scope='session')
@@ -96,26 +118,18 @@ def add_label_entries(collection, obj, keys):
             entry = (label, value)
             collection.append(entry)
 
-def pytest_generate_tests(metafunc):
-    """Enables test functions that use the above fixtures to operate on a
-    single dictionary, where each test function is automatically run once
-    for each dictionary in the tactics/techniques/case studies lists.
+def collect_parameters(data):
+    """Returns a dictionary of fixture name to its parameter values and IDs, in the order to parametrize them,
+    for the above fixtures to operate on a single dictionary.
 
-    Loads in the ATLAS data and sets up the pytest scheme to yield one
-    dictionary for each above fixture, as well as other test fixtures.
-
-    https://docs.pytest.org/en/stable/parametrize.html#basic-pytest-generate-tests-example
+    Parameters are collected once per process, and IDs are derived from data object IDs,
+    so tests are collected identically in each pytest-xdist worker.
     """
-    # Read the YAML files in this repository and create the nested dictionary
-    path_to_data_file = 'data/data.yaml'
-    data = load_atlas_data(path_to_data_file)
+    parameters = {}
 
-    # Parametrize when called for via test signature
-    if 'output_data' in metafunc.fixturenames:
-        # Only one arg, wrap in list
-        metafunc.parametrize('output_data', [data], indirect=True, scope='session')
-    if 'matrix' in metafunc.fixturenames:
-        metafunc.parametrize('matrix', data['matrices'], indirect=True, scope='session')
+    # Only one arg, wrap in list
+    parameters['output_data'] = ([data], None)
+    parameters['matrix'] = (data['matrices'], None)
 
     ## Create parameterized fixtures for tactics, techniques, and case studies for schema validation
 
@@ -128,9 +142,9 @@ def pytest_generate_tests(metafunc):
     # Keys in the data that are metadata and will never be considered keys for data objects
     excluded_keys = ['id', 'name', 'version', 'matrices']
 
-    # Unique keys in each matrix, representing the plural name of the object type
+    # Unique keys in each matrix, representing the plural name of the object type, in data order
     # Note the underscore instead of the dash
-    collect_fixture_names = lambda data: list({key.replace('-','_') for d in data for key in d.keys() if key not in excluded_keys})
+    collect_fixture_names = lambda data: list(dict.fromkeys(key.replace('-','_') for d in data for key in d.keys() if key not in excluded_keys))
 
     # Construct list of data object keys in the top-level data
     # Wrap this argument in a list to support iteration in lambda function
@@ -143,27 +157,8 @@ def pytest_generate_tests(metafunc):
     # Initialize collections
     text_with_possible_markdown_syntax = []
     text_to_be_spellchecked = []
-    all_values = []
     procedure_steps = []
 
-    for fixture_name in fixture_names:
-        # Handle the key 'case_studies' really being 'case-studies' in the input
-        key = fixture_name.replace('_','-')
-        # List of tuples that hold the ID and the corresponding object
-        # For tactics and techniques
-        values = [(obj['id'], obj) for matrix in matrices if key in matrix for obj in matrix[key]]
-
-        # Creates a list of tuples across all fixture names
-        all_values.extend(values)
-        # For case studies
-        if key in data:
-            id_to_obj = [(obj['id'], obj) for obj in data[key]]
-            all_values.extend(id_to_obj)
-
-    # Parametrize when called for via test signature
-    if 'all_data_objects' in metafunc.fixturenames:
-        metafunc.parametrize('all_data_objects', [all_values], indirect=True, scope='session')
-
     # Parameterize based on data objects
     for fixture_name in fixture_names:
 
@@ -187,9 +182,9 @@ def pytest_generate_tests(metafunc):
             'target'
         ]
         # Collect technique objects
-        if 'technique_id_to_tactic_ids' in metafunc.fixturenames and key == 'techniques':
+        if key == 'techniques':
             technique_id_to_tactic_ids = {obj['id']: obj['tactics'] for obj in values if 'subtechnique-of' not in obj}
-            metafunc.parametrize('technique_id_to_tactic_ids', [technique_id_to_tactic_ids], ids=[''],indirect=True, scope='session')
+            parameters['technique_id_to_tactic_ids'] = ([technique_id_to_tactic_ids], [''])
 
         # Build up text parameters
         # Parameter format is (test_identifier, text)
@@ -223,28 +218,69 @@ def pytest_generate_tests(metafunc):
                 text_to_be_spellchecked.append(description_text)
                 text_with_possible_markdown_syntax.append(description_text)
 
-        # Parametrize when called for via test signature
-        if fixture_name in metafunc.fixturenames:
-            # Parametrize each object, using the ID as identifier
-            metafunc.parametrize(fixture_name, values, ids=lambda x: x['id'], indirect=True, scope='session')
+        # Parametrize each object, using the ID as identifier
+        parameters[fixture_name] = (values, [obj['id'] for obj in values])
 
     ## Create parameterized fixtures for Markdown link syntax verification - technique descriptions and case study procedure steps
-
-    # Parametrize when called for via test signature
-    if 'text_with_possible_markdown_syntax' in metafunc.fixturenames:
-        metafunc.parametrize('text_with_possible_markdown_syntax', text_with_possible_markdown_syntax, ids=lambda x: x[0], indirect=True, scope='session')
+    parameters['text_with_possible_markdown_syntax'] = (text_with_possible_markdown_syntax, [text[0] for text in text_with_possible_markdown_syntax])
 
     ## Create parameterized fixtures for text to be spell-checked - names, descriptions, summary
-
-    # Parametrize when called for via test signature
-    if 'text_to_be_spellchecked' in metafunc.fixturenames:
-        metafunc.parametrize('text_to_be_spellchecked', text_to_be_spellchecked, ids=lambda x: x[0], indirect=True, scope='session')
+    parameters['text_to_be_spellchecked'] = (text_to_be_spellchecked, [text[0] for text in text_to_be_spellchecked])
+    parameters['texts_to_be_spellchecked'] = ([text_to_be_spellchecked], None)
 
     ## Create parameterized fixtures for each procedure step
+    parameters['procedure_steps'] = (procedure_steps, [step[0] for step in procedure_steps])
+
+    return parameters
+
+@lru_cache(maxsize=None)
+def get_cached_parameters():
+    """Returns the test parameters of the cached ATLAS data, collected once per process."""
+    return collect_parameters(build_cache.load(PATH_TO_DATA_FILE))
+
+def pytest_generate_tests(metafunc):
+    """Enables test functions that use the above fixtures to operate on a
+    single dictionary, where each test function is automatically run once
+    for each dictionary in the tactics/techniques/case studies lists.
+
+    Loads in the ATLAS data and sets up the pytest scheme to yield one
+    dictionary for each above fixture, as well as other test fixtures.
+
+    https://docs.pytest.org/en/stable/parametrize.html#basic-pytest-generate-tests-example
+    """
+    # Read the YAML files in this repository and create the nested dictionary,
+    # built and collected once and reused by each call of this hook
+    if metafunc.config.getoption("no_build_cache"):
+        parameters = collect_parameters(load_atlas_data(PATH_TO_DATA_FILE))
+    else:
+        parameters = get_cached_parameters()
 
     # Parametrize when called for via test signature
-    if 'procedure_steps' in metafunc.fixturenames:
-        metafunc.parametrize('procedure_steps', procedure_steps, ids=lambda x: x[0], indirect=True, scope='session')
+    for fixture_name, (values, ids) in parameters.items():
+        if fixture_name in metafunc.fixturenames:
+            metafunc.parametrize(fixture_name, values, ids=ids, indirect=True, scope='session')
+
+class SharedBuild:
+    """pytest-xdist plugin building ATLAS data once in the controller process and sharing the build file with each worker."""
+
+    def __init__(self):
+        self.entry_filepath = None
+
+    def pytest_configure_node(self, node):
+        if self.entry_filepath is None:
+            self.entry_filepath = build_cache.share(PATH_TO_DATA_FILE)
+        node.workerinput['atlas_build'] = self.entry_filepath.as_posix()
+
+def pytest_configure(config):
+    if config.getoption("no_build_cache"):
+        return
+    # Workers of pytest-xdist have workerinput from the controller
+    workerinput = getattr(config, 'workerinput', None)
+    if workerinput is not None:
+        if 'atlas_build' in workerinput:
+            build_cache.load_shared(PATH_TO_DATA_FILE, workerinput['atlas_build'])
+    elif config.pluginmanager.hasplugin('xdist'):
+        config.pluginmanager.register(SharedBuild(), 'atlas-shared-build')
 
 #region Schemas
 @pytest.fixture(scope='session')
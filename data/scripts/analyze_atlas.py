@@ -3,8 +3,15 @@
 Analyze ATLAS.yaml structure for AICM control mapping strategy
 """
 
+from pathlib import Path
+import sys
+
 import yaml
-from collections import defaultdict
+
+# Support running as a script with imports relative to the project root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from tools.atlas_matrices import build_incidence_matrices
 
 def analyze_atlas_structure(atlas_file):
     """Analyze the ATLAS data structure and provide insights for control mapping"""
@@ -25,32 +32,31 @@ def analyze_atlas_structure(atlas_file):
     # Build tactic lookup
     tactic_lookup = {t['id']: t for t in tactics}
     
-    # Count techniques per tactic
-    tactic_technique_count = defaultdict(int)
-    tactic_technique_list = defaultdict(list)
-    
-    for technique in techniques:
-        if 'tactics' in technique:
-            for tactic_id in technique['tactics']:
-                tactic_technique_count[tactic_id] += 1
-                tactic_technique_list[tactic_id].append({
-                    'id': technique['id'],
-                    'name': technique['name'],
-                    'is_subtechnique': 'subtechnique-of' in technique
-                })
+    # Count techniques per tactic as the column sums of the technique x tactic incidence matrix
+    technique_tactic = build_incidence_matrices(data)['technique-tactic']
+    tactic_technique_count = dict(zip(technique_tactic.column_ids, technique_tactic.column_sums()))
+    technique_lookup = {t['id']: t for t in techniques}
+    tactic_technique_list = {
+        tactic_id: [{
+            'id': technique_id,
+            'name': technique_lookup[technique_id]['name'],
+            'is_subtechnique': 'subtechnique-of' in technique_lookup[technique_id]
+        } for technique_id in technique_tactic.column(tactic_id)]
+        for tactic_id in technique_tactic.column_ids if tactic_technique_count[tactic_id]
+    }
     
     print("\n=== Tactics Overview ===")
     for tactic in tactics:
         tactic_id = tactic['id']
         tactic_name = tactic['name']
-        count = tactic_technique_count[tactic_id]
+        count = tactic_technique_count.get(tactic_id, 0)
         print(f"{tactic_id}: {tactic_name} ({count} techniques)")
     
     print("\n=== Detailed Breakdown by Tactic ===")
     for tactic in tactics:
         tactic_id = tactic['id']
         tactic_name = tactic['name']
-        techniques_list = tactic_technique_list[tactic_id]
+        techniques_list = tactic_technique_list.get(tactic_id, [])
         
         print(f"\n{tactic_id}: {tactic_name}")
         print("-" * (len(tactic_id) + len(tactic_name) + 2))
@@ -71,7 +77,7 @@ def analyze_atlas_structure(atlas_file):
     return {
         'tactics': tactics,
         'techniques': techniques,
-        'tactic_technique_mapping': dict(tactic_technique_list)
+        'tactic_technique_mapping': tactic_technique_list
     }
 
 if __name__ == "__main__":
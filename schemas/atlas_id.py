@@ -1,3 +1,6 @@
+from collections import namedtuple
+from functools import lru_cache
+
 from schema import Regex, Schema
 
 """Describes ATLAS ID schemas."""
@@ -81,3 +84,68 @@ MITIGATION_ID_REGEX_EXACT = Schema(
     name="id_mitigation",
     as_reference=True
 )
+
+
+# Parsing and classifying IDs
+
+# Parts of an ATLAS ID, ex. AML.T0000.000 has prefix AML., kind T, number 0000, and sub-number 000
+# The sub-number is None for top-level objects
+AtlasId = namedtuple('AtlasId', ['prefix', 'kind', 'number', 'sub_number'])
+
+# Kind of ID to the type of object it identifies
+ID_KIND_TYPES = {
+    'TA': 'tactic',
+    'T': 'technique',
+    'CS': 'case-study',
+    'M': 'mitigation',
+}
+
+def split_letters_digits(part):
+    """Returns the part of an ID split before its trailing digits, ex. ('TA', '0000') for TA0000."""
+    i = len(part)
+    # Digits as matched by \d
+    while i and part[i - 1].isdecimal():
+        i -= 1
+    return part[:i], part[i:]
+
+def is_uppercase_letters(text):
+    """Returns True if the text is one or more of the letters A-Z, as matched by [A-Z]+."""
+    return bool(text) and all('A' <= c <= 'Z' for c in text)
+
+@lru_cache(maxsize=4096)
+def parse_id(atlas_id):
+    """Returns the AtlasId parts of a full ATLAS ID, or None if the text is not one.
+
+    Accepts the same IDs as FULL_ID_PATTERN matched from ^ to $, except with a trailing newline,
+    in time linear in the length of the text.
+    Results are memoized, as the same IDs are parsed many times over the data.
+    """
+    parts = atlas_id.split('.')
+    sub_number = None
+    # A trailing 3-digit part is a sub-number, ex. the 000 of AML.T0000.000
+    if len(parts) >= 3 and len(parts[-1]) == 3 and parts[-1].isdecimal():
+        sub_number = parts.pop()
+
+    # Followed by the kind and 4-digit number, ex. T0000
+    kind, number = split_letters_digits(parts.pop())
+    if len(number) != 4 or not is_uppercase_letters(kind):
+        return None
+
+    # After a prefix of one or more parts of letters optionally followed by digits, ex. AML. or ABC123.
+    if not parts or not all(is_uppercase_letters(split_letters_digits(part)[0]) for part in parts):
+        return None
+
+    return AtlasId(''.join(f'{part}.' for part in parts), kind, number, sub_number)
+
+def get_id_type(atlas_id):
+    """Returns the type of object an ATLAS ID is formatted for, ex. tactic or subtechnique,
+    or None if it is not a full ATLAS ID of a known kind.
+    """
+    parts = parse_id(atlas_id)
+    if parts is None:
+        return None
+    object_type = ID_KIND_TYPES.get(parts.kind)
+    if parts.sub_number is not None:
+        # Only techniques have sub-level objects
+        return 'subtechnique' if object_type == 'technique' else None
+    return object_type
@@ -1,17 +1,209 @@
+from array import array
+from functools import lru_cache
+from hashlib import sha256
+import mmap
 import os
-from spellchecker import SpellChecker
+from pathlib import Path
+import re
+import string
+
+from tools.text_patterns import REGEX_MARKDOWN_LINK, REGEX_URL, REGEX_WORDS
 
 """
 Sets up usage of https://pyspellchecker.readthedocs.io/en/latest/.
+
+The English word frequency list of pyspellchecker and the custom words are combined into a
+sorted word list file, rebuilt only when custom_words.txt or pyspellchecker changes,
+which is memory-mapped on first use instead of loading the dictionary on each test run.
+
+Texts are spellchecked in one batch, where each unique word token across all texts
+is checked once and unknown words are mapped back to the texts containing them.
 """
 
 # Add words to the spellcheck by adding to this file
 custom_words_file = os.path.join(os.path.dirname(__file__), "custom_words.txt")
 
-# Read in list of words
-with open(custom_words_file) as f:
-    CUSTOM_WORDS = [w.strip() for w in f.readlines()]
+# Directory of combined word list files, shared with the build caches
+WORD_LIST_DIR = Path(__file__).resolve().parents[1] / '.atlas-cache' / 'spellcheck'
+
+# Increment when the word list file format changes to rebuild existing files
+WORD_LIST_VERSION = 1
+
+# Header of word list files, as native unsigned ints: the version, the number of words, and the longest word length
+# followed by the offset of each word and the end offset, then the UTF-8 words in sorted order
+WORD_LIST_HEADER_LENGTH = 3
+
+def read_custom_words():
+    """Returns the list of words in custom_words.txt."""
+    with open(custom_words_file) as f:
+        return [w.strip() for w in f.readlines()]
+
+def get_word_list_filepath():
+    """Returns the path to the combined word list file for the current custom words and pyspellchecker version."""
+    from spellchecker import __version__ as spellchecker_version
+
+    key = sha256(f'{WORD_LIST_VERSION}:{spellchecker_version}:'.encode() + Path(custom_words_file).read_bytes()).hexdigest()
+    return WORD_LIST_DIR / f'words-{key}.bin'
+
+def write_word_list(filepath, words):
+    """Writes the words as a sorted word list file, for lookup by WordList."""
+    encoded = sorted({word.encode() for word in words})
+    offsets = array('I', [WORD_LIST_VERSION, len(encoded), max(map(len, words), default=0)])
+    position = 0
+    for word in encoded:
+        offsets.append(position)
+        position += len(word)
+    offsets.append(position)
+
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a unique temporary file first, as word lists may be written by multiple processes
+    temp_filepath = filepath.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temp_filepath, 'wb') as f:
+        f.write(offsets.tobytes())
+        f.write(b''.join(encoded))
+    temp_filepath.replace(filepath)
+
+def build_word_list(filepath):
+    """Writes the word list file of the English word frequency list and the custom words, removing older word lists."""
+    from spellchecker import SpellChecker
+
+    # Create English spell checker with additional custom words, as looked up by SpellChecker.unknown
+    spell_checker = SpellChecker()
+    spell_checker.word_frequency.load_words(read_custom_words())
+    write_word_list(filepath, spell_checker.word_frequency.dictionary.keys())
+
+    for other_filepath in filepath.parent.glob('words-*.bin'):
+        if other_filepath != filepath:
+            try:
+                other_filepath.unlink()
+            except FileNotFoundError:
+                # Removed by another process
+                pass
+
+class WordList:
+    """Memory-mapped sorted word list file with the lookups of pyspellchecker's SpellChecker.unknown."""
+
+    def __init__(self, filepath):
+        with open(filepath, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mmap)
+        version, self.count, self.longest_word_length = view[:WORD_LIST_HEADER_LENGTH * 4].cast('I')
+        if version != WORD_LIST_VERSION:
+            raise ValueError(f'Expected word list version {WORD_LIST_VERSION}, got {version}')
+        self.offsets = view[WORD_LIST_HEADER_LENGTH * 4:(WORD_LIST_HEADER_LENGTH + self.count + 1) * 4].cast('I')
+        self.words_start = (WORD_LIST_HEADER_LENGTH + self.count + 1) * 4
+
+    def get_word(self, index):
+        """Returns the UTF-8 bytes of the word at the index in sorted order."""
+        start = self.words_start
+        return self.mmap[start + self.offsets[index]:start + self.offsets[index + 1]]
+
+    def __contains__(self, word):
+        key = word.encode()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get_word(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo < self.count and self.get_word(lo) == key
+
+    def __len__(self):
+        return self.count
+
+    def should_check(self, word):
+        """Returns False for words that SpellChecker.unknown skips, namely punctuation, numbers, and overly long words."""
+        if len(word) == 1 and word in string.punctuation:
+            return False
+        # Allows for removal of up to 2 letters, as in SpellChecker
+        if len(word) > self.longest_word_length + 3:
+            return False
+        try:
+            float(word)
+            return False
+        except ValueError:
+            return True
+
+    def unknown(self, words):
+        """Returns the set of lowercased words that are not in the word list, as SpellChecker.unknown."""
+        return {word.lower() for word in words if self.should_check(word) and word.lower() not in self}
+
+@lru_cache(maxsize=None)
+def get_spell_checker():
+    """Returns the English spell checker with custom words for syntax test use, building its word list if needed."""
+    filepath = get_word_list_filepath()
+    if not filepath.is_file():
+        build_word_list(filepath)
+    return WordList(filepath)
+
+# Inline Markdown code
+REGEX_INLINE_CODE = re.compile(r'`{1}(.+)`{1}')
+
+# Capitalized acronym-like words, including possessive (') and plural versions (s)
+# Example matches: AI, AI's, AIs, ATT&CK
+REGEX_ACRONYM = re.compile(r"\b[A-Z&]+[']{0,1}[s]{0,1}\b")
+
+# Text removed before tokenizing, in order: Markdown links, inline code, URLs, and acronym-like words
+REGEXES_NOT_SPELLCHECKED = [REGEX_MARKDOWN_LINK, REGEX_INLINE_CODE, REGEX_URL, REGEX_ACRONYM]
+
+def tokenize(text):
+    """Returns the word tokens to be spellchecked in the text, outside of Markdown links, inline code, URLs, and acronyms."""
+    for regex in REGEXES_NOT_SPELLCHECKED:
+        text = regex.sub('', text)
+    # Tokenize, see comments at the variable declaration
+    return REGEX_WORDS.findall(text)
+
+class SpellcheckCache:
+    """Memoized spellcheck of word tokens, each checked by the spell checker once.
+
+    The default spell checker is set up on the first check.
+    """
+
+    def __init__(self, spell_checker=None):
+        self.spell_checker = spell_checker
+        # Token to whether it is not recognized by the spell checker
+        self.is_unknown = {}
+
+    def unknown(self, tokens):
+        """Returns the set of tokens not recognized by the spell checker."""
+        tokens = set(tokens)
+        new_tokens = [token for token in tokens if token not in self.is_unknown]
+        if new_tokens:
+            if self.spell_checker is None:
+                self.spell_checker = get_spell_checker()
+            # Unknown words are returned lowercased, as the spell checker is case-insensitive
+            unknown_words = self.spell_checker.unknown(new_tokens)
+            for token in new_tokens:
+                self.is_unknown[token] = token.lower() in unknown_words
+        return {token for token in tokens if self.is_unknown[token]}
+
+# Spellcheck results shared by all spellchecked texts
+SPELLCHECK_CACHE = SpellcheckCache()
+
+def find_misspellings(labeled_texts, cache=SPELLCHECK_CACHE):
+    """Returns a dictionary of each label to the sorted, lowercased words in its text not recognized by spellcheck,
+    for each (label, text) tuple with any, in order.
+    """
+    # Unique token to the labels of the texts containing it, tokenizing all texts in one pass
+    token_labels = {}
+    labels = []
+    for label, text in labeled_texts:
+        labels.append(label)
+        for token in tokenize(text):
+            token_labels.setdefault(token, set()).add(label)
+
+    # Each unique token is checked once, then mapped back to its texts
+    misspellings = {}
+    for token in cache.unknown(token_labels):
+        for label in token_labels[token]:
+            misspellings.setdefault(label, set()).add(token.lower())
+
+    return {label: sorted(misspellings[label]) for label in labels if label in misspellings}
 
-# Create English spell checker with additional custom words for syntax test use
-SPELL_CHECKER = SpellChecker()
-SPELL_CHECKER.word_frequency.load_words(CUSTOM_WORDS)
+def format_misspellings(misspellings):
+    """Returns a message listing the words not recognized by spellcheck for each label."""
+    lines = ['Not recognized by spellcheck - fix or exclude in tests/custom_words.txt:']
+    for label, words in misspellings.items():
+        lines.append(f"  {label}: {', '.join(words)}")
+    return '\n'.join(lines)
@@ -0,0 +1,58 @@
+import itertools
+import re
+
+import pytest
+
+from schemas.atlas_id import (
+    AtlasId,
+    CASE_STUDY_ID_PATTERN,
+    FULL_ID_PATTERN,
+    get_id_type,
+    MITIGATION_ID_PATTERN,
+    parse_id,
+    SUBTECHNIQUE_ID_PATTERN,
+    TACTIC_ID_PATTERN,
+    TECHNIQUE_ID_PATTERN
+)
+
+"""
+Validates the ATLAS ID classifier in schemas/atlas_id.py against the ID patterns.
+"""
+
+# Object type to the exact ID pattern for it
+ID_PATTERNS = {
+    'tactic': TACTIC_ID_PATTERN,
+    'technique': TECHNIQUE_ID_PATTERN,
+    'subtechnique': SUBTECHNIQUE_ID_PATTERN,
+    'case-study': CASE_STUDY_ID_PATTERN,
+    'mitigation': MITIGATION_ID_PATTERN,
+}
+
+# IDs and near misses, which are also combined with each other
+IDS = [
+    'AML.T0000', 'AML.TA0000', 'AML.T0000.000', 'AML123.CS0001', 'AML.ABC123.M0000', 'AML.X0000', 'AML.X0000.000',
+    'AML.T0000.T0001.000', 'AML.T0000.0000', 'AML.T00000', 'AML.T000', 'T0000', 'aml.T0000', 'AML.t0000', 'AML..T0000',
+    '.AML.T0000', 'AML.T0000.', 'AML.T0000.00', '1AML.T0000', 'AML.T0000 ', 'AML.T٠٠٠٠', 'AML.ÀT0000', '',
+]
+
+@pytest.mark.parametrize('atlas_id', IDS + [a + b for a, b in itertools.product(IDS[:8], ['', '.', '.000', 'A1.'])])
+def test_matches_patterns(atlas_id):
+    """The classifier accepts and classifies IDs as the exact ID patterns match them."""
+    assert (parse_id(atlas_id) is not None) == (re.search(rf'^{FULL_ID_PATTERN}$', atlas_id) is not None)
+    expected_types = [object_type for object_type, pattern in ID_PATTERNS.items() if re.search(rf'^{pattern}$', atlas_id)]
+    assert [get_id_type(atlas_id)] == (expected_types or [None])
+
+def test_parse_id():
+    assert parse_id('AML.T0000.001') == AtlasId('AML.', 'T', '0000', '001')
+    assert parse_id('AML.ABC123.TA0002') == AtlasId('AML.ABC123.', 'TA', '0002', None)
+    assert parse_id('AML.T0000\n') is None
+
+    assert get_id_type('AML.T0000.001') == 'subtechnique'
+    assert get_id_type('AML.CS0000') == 'case-study'
+    # Only techniques have sub-level IDs
+    assert get_id_type('AML.CS0000.001') is None
+
+    parse_id.cache_clear()
+    for _ in range(3):
+        parse_id('AML.M0000')
+    assert parse_id.cache_info().hits == 2
@@ -0,0 +1,104 @@
+import pytest
+
+from tools.atlas_matrices import build_incidence_matrices, INCIDENCE_MATRICES, mitigation_coverage, SparseMatrix
+
+"""
+Validates the incidence matrices in tools/atlas_matrices.py against the ATLAS data.
+"""
+
+@pytest.fixture(scope='module')
+def matrices(atlas_data):
+    return build_incidence_matrices(atlas_data)
+
+def test_incidence_matrices(atlas_data, matrices):
+    """Matrix entries match relations found by walking the data, with rows and columns in data order."""
+    matrix = atlas_data['matrices'][0]
+    techniques = matrix['techniques']
+    case_studies = atlas_data['case-studies']
+    assert list(matrices) == list(INCIDENCE_MATRICES)
+
+    technique_tactic = matrices['technique-tactic']
+    assert technique_tactic.row_ids == tuple(t['id'] for t in techniques)
+    assert technique_tactic.column_ids == tuple(t['id'] for t in matrix['tactics'])
+    assert technique_tactic.column_sums() == [
+        sum(tactic['id'] in t.get('tactics', []) for t in techniques) for tactic in matrix['tactics']
+    ]
+
+    for technique in techniques:
+        technique_id = technique['id']
+        assert list(technique_tactic.row(technique_id)) == technique.get('tactics', [])
+        assert set(matrices['technique-case-study'].row(technique_id)) == {
+            cs['id'] for cs in case_studies if any(step['technique'] == technique_id for step in cs['procedure'])
+        }
+        assert list(matrices['technique-mitigation'].row(technique_id)) == [
+            m['id'] for m in matrix['mitigations'] if any(t['id'] == technique_id for t in m['techniques'])
+        ]
+        if 'subtechnique-of' in technique:
+            assert matrices['subtechnique-parent'].row(technique_id) == (technique['subtechnique-of'],)
+
+    assert matrices['subtechnique-parent'].shape == (
+        sum('subtechnique-of' in t for t in techniques), len(techniques)
+    )
+
+def test_sparse_matrix():
+    matrix = SparseMatrix.from_pairs(['a', 'b', 'c'], ['x', 'y'], [('a', 'y'), ('a', 'x'), ('a', 'x'), ('c', 'y'), ('d', 'x')])
+    assert matrix.to_dense() == [[1, 1], [0, 0], [0, 1]]
+    assert (matrix.shape, matrix.nnz) == ((3, 2), 3)
+    assert (matrix['a', 'x'], matrix['b', 'x']) == (1, 0)
+    assert matrix.row('a') == ('x', 'y')
+    assert matrix.row('d') == ()
+    assert matrix.column('y') == ('a', 'c')
+    assert (matrix.row_sums(), matrix.column_sums()) == ([2, 0, 1], [1, 2])
+    assert matrix.dot([2, 3]) == [5, 0, 3]
+    with pytest.raises(ValueError):
+        matrix.dot([1])
+
+    transpose = matrix.transpose()
+    assert transpose.to_dense() == [[1, 0, 0], [1, 0, 1]]
+    assert transpose.transpose() is matrix
+
+    # Co-occurrence counts of rows sharing columns
+    product = matrix.matmul(transpose)
+    assert product.row_ids == product.column_ids == ('a', 'b', 'c')
+    assert product.to_dense() == [[2, 0, 1], [0, 0, 0], [1, 0, 1]]
+    with pytest.raises(ValueError):
+        matrix.matmul(matrix)
+
+def test_counts():
+    matrix = SparseMatrix.from_counts(['a', 'b'], ['x', 'y', 'z'], [('a', 'y'), ('a', 'x'), ('a', 'y'), ('b', 'z'), ('b', 'w')])
+    assert matrix.to_dense() == [[1, 2, 0], [0, 0, 1]]
+    assert (matrix.row_sum('a'), matrix.row_sum('c')) == (3, 0)
+    assert matrix.top_k('a', 1) == [('y', 2)]
+    assert matrix.top_k('a', 5, exclude={'y'}) == [('x', 1)]
+    assert matrix.top_k('c', 5) == []
+    assert SparseMatrix.from_dict(matrix.to_dict()).to_dense() == matrix.to_dense()
+
+def test_technique_ids():
+    """Mitigations can list techniques as ID strings or as dictionaries with their use."""
+    matrices = build_incidence_matrices({
+        'matrices': [{
+            'techniques': [{'id': 'AML.T0000', 'object-type': 'technique'}, {'id': 'AML.T0001', 'object-type': 'technique'}],
+            'mitigations': [{'id': 'AML.M0000', 'object-type': 'mitigation', 'techniques': ['AML.T0000', {'id': 'AML.T0001', 'use': 'Text'}]}],
+        }],
+    })
+    assert matrices['technique-mitigation'].to_dense() == [[1], [1]]
+
+def test_composition(matrices):
+    """Subtechniques have the tactics of their parents through matrix products."""
+    subtechnique_tactic = matrices['subtechnique-parent'].matmul(matrices['technique-tactic'])
+    for subtechnique_id in subtechnique_tactic.row_ids:
+        parent_id, = matrices['subtechnique-parent'].row(subtechnique_id)
+        assert subtechnique_tactic.row(subtechnique_id) == matrices['technique-tactic'].row(parent_id)
+
+def test_mitigation_coverage(atlas_data, matrices):
+    """Mitigations are ranked by the case study uses of the techniques they mitigate."""
+    uses = {}
+    for cs in atlas_data['case-studies']:
+        for technique_id in {step['technique'] for step in cs['procedure']}:
+            uses[technique_id] = uses.get(technique_id, 0) + 1
+
+    coverage = mitigation_coverage(matrices)
+    assert coverage == {
+        m['id']: sum(uses.get(t['id'], 0) for t in m['techniques']) for m in atlas_data['matrices'][0]['mitigations']
+    }
+    assert list(coverage.values()) == sorted(coverage.values(), reverse=True)
@@ -0,0 +1,97 @@
+import datetime
+import gzip
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from tools.atlas_formats import decode_dates
+from tools.atlas_server import accepts_gzip, create_server, Response
+
+"""
+Validates the ATLAS HTTP query server in tools/atlas_server.py against localhost.
+"""
+
+@pytest.fixture(scope='module')
+def base_url(atlas_data):
+    """Serves the ATLAS data on a free local port, returns its base URL."""
+    server = create_server(atlas_data, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+def get(url, headers=None):
+    """Returns the response status, headers, and body of a GET request, including error responses."""
+    try:
+        with urlopen(Request(url, headers=headers or {})) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+
+def test_queries(atlas_data, base_url):
+    """Endpoints return the data objects as JSON, as in the built data."""
+    matrix = atlas_data['matrices'][0]
+    load = lambda body: json.loads(body, object_hook=decode_dates)
+
+    status, headers, body = get(f'{base_url}/tactics')
+    assert status == 200
+    assert headers['Content-Type'] == 'application/json; charset=utf-8'
+    assert load(body) == matrix['tactics']
+
+    technique = matrix['techniques'][0]
+    status, _, body = get(f"{base_url}/techniques/{technique['id']}")
+    assert (status, load(body)) == (200, technique)
+
+    status, _, body = get(f"{base_url}/case-studies?technique={technique['id']}")
+    assert status == 200
+    assert [cs['id'] for cs in load(body)] == [
+        cs['id'] for cs in atlas_data['case-studies'] if any(step['technique'] == technique['id'] for step in cs['procedure'])
+    ]
+
+    status, _, body = get(f"{base_url}/mitigations?technique={technique['id']}")
+    assert status == 200
+    assert [m['id'] for m in load(body)] == [
+        m['id'] for m in matrix['mitigations'] if any(t['id'] == technique['id'] for t in m['techniques'])
+    ]
+
+    assert get(f'{base_url}/techniques/AML.T9999')[0] == 404
+    assert get(f'{base_url}/mitigations?technique=AML.T9999')[0] == 404
+    assert get(f'{base_url}/tactics?technique=AML.T0000')[0] == 400
+    assert get(f'{base_url}/tactics?tactic=AML.TA0002')[0] == 400
+
+def test_etag_and_gzip(base_url):
+    """Responses are gzip-compressed on request and support conditional requests by ETag."""
+    _, headers, body = get(f'{base_url}/tactics')
+    etag = headers['ETag']
+    assert headers['Vary'] == 'Accept-Encoding'
+
+    status, headers, gzip_body = get(f'{base_url}/tactics', {'Accept-Encoding': 'gzip'})
+    assert status == 200
+    assert headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzip_body) == body
+    # Each encoding has its own strong ETag
+    assert headers['ETag'] != etag
+
+    status, headers, body = get(f'{base_url}/tactics', {'If-None-Match': etag})
+    assert (status, headers['ETag'], body) == (304, etag, b'')
+    # A changed representation is sent in full
+    assert get(f'{base_url}/tactics', {'If-None-Match': '"other"'})[0] == 200
+
+def test_response_gzip_body():
+    """Compressed response bodies decompress to the body and are reproducible."""
+    obj = {'id': 'AML.T0000', 'created_date': datetime.date(2021, 5, 13)}
+    response = Response(obj, 'v1')
+    assert gzip.decompress(response.gzip_body) == response.body
+    assert Response(obj, 'v1').gzip_body == response.gzip_body
+
+def test_accepts_gzip():
+    assert accepts_gzip('gzip, deflate, br')
+    assert accepts_gzip('deflate, gzip;q=0.5')
+    assert accepts_gzip('*')
+    assert not accepts_gzip('gzip;q=0')
+    assert not accepts_gzip('identity')
+    assert not accepts_gzip(None)
@@ -0,0 +1,106 @@
+import datetime
+
+import pytest
+
+from tools.atlas_formats import write_atlas_data
+from tools.atlas_store import AtlasStore, CaseStudy, Subtechnique, Technique, TechniqueUse
+
+"""
+Validates the AtlasStore query API in tools/atlas_store.py against the ATLAS data.
+"""
+
+@pytest.fixture(scope='module')
+def store(atlas_data):
+    return AtlasStore(atlas_data)
+
+def test_objects(atlas_data, store):
+    """Each data object is stored once as the named tuple for its type."""
+    matrix = atlas_data['matrices'][0]
+    assert len(store) == sum(len(matrix[key]) for key in ('tactics', 'techniques', 'mitigations')) + len(atlas_data['case-studies'])
+    assert list(store.tactics) == [tactic['id'] for tactic in matrix['tactics']]
+
+    for technique in matrix['techniques']:
+        obj = store.get(technique['id'])
+        assert isinstance(obj, Subtechnique if 'subtechnique-of' in technique else Technique)
+        assert obj.name == technique['name']
+        assert obj.created_date == technique['created_date']
+
+    case_study = atlas_data['case-studies'][0]
+    obj = store.get(case_study['id'])
+    assert isinstance(obj, CaseStudy)
+    assert [step.technique for step in obj.procedure] == [step['technique'] for step in case_study['procedure']]
+
+    assert 'AML.T9999' not in store
+    assert store.get('AML.T9999') is None
+
+def test_queries(atlas_data, store):
+    """Query methods match relations found by walking the data."""
+    matrix = atlas_data['matrices'][0]
+    techniques = matrix['techniques']
+    case_studies = atlas_data['case-studies']
+
+    for tactic in matrix['tactics']:
+        expected = [t['id'] for t in techniques if tactic['id'] in t.get('tactics', [])]
+        assert [t.id for t in store.techniques_for_tactic(tactic['id'])] == expected
+        assert [cs.id for cs in store.case_studies_using(tactic['id'])] == [
+            cs['id'] for cs in case_studies if any(step['tactic'] == tactic['id'] for step in cs['procedure'])
+        ]
+
+    for technique in techniques:
+        technique_id = technique['id']
+        assert [m.id for m in store.mitigations_for_technique(technique_id)] == [
+            m['id'] for m in matrix['mitigations'] if any(t['id'] == technique_id for t in m['techniques'])
+        ]
+        assert [cs.id for cs in store.case_studies_using(technique_id)] == [
+            cs['id'] for cs in case_studies if any(step['technique'] == technique_id for step in cs['procedure'])
+        ]
+        if 'subtechnique-of' in technique:
+            assert store.parent_of(technique_id).id == technique['subtechnique-of']
+            assert store.get(technique_id) in store.subtechniques_of(technique['subtechnique-of'])
+            assert store.tactics_for_technique(technique_id) == store.tactics_for_technique(technique['subtechnique-of'])
+        else:
+            assert [t.id for t in store.tactics_for_technique(technique_id)] == technique['tactics']
+
+    # Case studies using subtechniques count towards the parent technique
+    subtechnique = store.get('AML.T0000.001')
+    assert set(store.case_studies_using(subtechnique.id)) <= set(store.case_studies_using('AML.T0000', include_subtechniques=True))
+    assert subtechnique in store.techniques_for_tactic('AML.TA0002', include_subtechniques=True)
+
+    assert store.techniques_for_tactic('AML.TA9999') == ()
+    assert store.case_studies_using('AML.T9999') == ()
+
+def test_minimal_objects():
+    """Stores are created from data objects with only the keys required by the schemas."""
+    store = AtlasStore({
+        'id': 'ATLAS',
+        'matrices': [{
+            'id': 'ATLAS',
+            'tactics': [{'id': 'AML.TA0000', 'object-type': 'tactic', 'name': 'Tactic', 'description': 'Text'}],
+            'techniques': [
+                {'id': 'AML.T0000', 'object-type': 'technique', 'name': 'Technique', 'description': 'Text', 'tactics': ['AML.TA0000']},
+                {'id': 'AML.T0000.000', 'object-type': 'technique', 'name': 'Subtechnique', 'description': 'Text', 'subtechnique-of': 'AML.T0000'},
+            ],
+            'mitigations': [{
+                'id': 'AML.M0000', 'object-type': 'mitigation', 'name': 'Mitigation', 'description': 'Text',
+                'techniques': ['AML.T0000', {'id': 'AML.T0000.000', 'use': 'Text'}],
+            }],
+        }],
+        'case-studies': [{
+            'id': 'AML.CS0000', 'object-type': 'case-study', 'name': 'Study', 'summary': 'Text',
+            'incident-date': datetime.date(2020, 1, 1), 'incident-date-granularity': 'DATE',
+            'procedure': [{'tactic': 'AML.TA0000', 'technique': 'AML.T0000', 'description': 'Text'}],
+        }],
+    })
+
+    assert store.get('AML.TA0000').created_date is None
+    assert store.get('AML.M0000').techniques == (TechniqueUse('AML.T0000', None), TechniqueUse('AML.T0000.000', 'Text'))
+    assert [m.id for m in store.mitigations_for_technique('AML.T0000')] == ['AML.M0000']
+    case_study = store.get('AML.CS0000')
+    assert (case_study.target, case_study.actor, case_study.case_study_type, case_study.references) == (None, None, None, ())
+    assert store.case_studies_using('AML.TA0000') == (case_study,)
+
+def test_load(atlas_data, tmp_path):
+    """Stores loaded from an output file have the same objects."""
+    write_atlas_data(atlas_data, tmp_path, ['json'])
+    store = AtlasStore.load(dist_dir=tmp_path)
+    assert store.objects == AtlasStore(atlas_data).objects
@@ -0,0 +1,88 @@
+import pytest
+
+from tools.atlas_matrices import SparseMatrix
+from tools.atlas_transitions import build_procedure_statistics, NextStep, ProcedureStatistics, STATISTICS, write_procedure_statistics
+
+"""
+Validates the procedure statistics in tools/atlas_transitions.py.
+"""
+
+def create_data(*procedures):
+    """Returns minimal ATLAS data with a case study of each procedure, a list of (tactic ID, technique ID) steps."""
+    return {
+        'id': 'ATLAS',
+        'matrices': [{
+            'id': 'ATLAS',
+            'tactics': [{'id': f'TA{i}', 'object-type': 'tactic'} for i in range(3)],
+            'techniques': [{'id': f'T{i}', 'object-type': 'technique'} for i in range(4)],
+        }],
+        'case-studies': [
+            {'id': f'CS{i}', 'object-type': 'case-study', 'procedure': [{'tactic': tactic, 'technique': technique} for tactic, technique in procedure]}
+            for i, procedure in enumerate(procedures)
+        ],
+    }
+
+@pytest.fixture(scope='module')
+def stats():
+    return ProcedureStatistics.from_data(create_data(
+        [('TA0', 'T0'), ('TA1', 'T1'), ('TA1', 'T1'), ('TA2', 'T2')],
+        [('TA0', 'T0'), ('TA1', 'T2'), ('TA2', 'T3')],
+        [('TA0', 'T0'), ('TA1', 'T1')],
+    ))
+
+def test_statistics(stats):
+    assert list(stats.matrices) == list(STATISTICS)
+    assert stats.technique_transition.to_dense() == [
+        [0, 2, 1, 0],
+        [0, 1, 1, 0],
+        [0, 0, 0, 1],
+        [0, 0, 0, 0],
+    ]
+    assert stats.tactic_transition.to_dense() == [
+        [0, 3, 0],
+        [0, 1, 2],
+        [0, 0, 0],
+    ]
+    # Case studies using both techniques, counted once per case study
+    assert stats.cooccurrence.to_dense() == [
+        [3, 2, 2, 1],
+        [2, 2, 1, 0],
+        [2, 1, 2, 1],
+        [1, 0, 1, 1],
+    ]
+
+def test_queries(stats):
+    """Queries rank the most frequent next steps or co-occurring techniques, with ties in data order."""
+    assert stats.next_techniques('T0') == [NextStep('T1', 2, 2 / 3), NextStep('T2', 1, 1 / 3)]
+    assert stats.next_techniques('T0', k=1) == [NextStep('T1', 2, 2 / 3)]
+    # Staying on the same technique counts towards the probabilities, but is not returned
+    assert stats.next_techniques('T1') == [NextStep('T2', 1, 0.5)]
+    assert stats.next_techniques('T3') == []
+    assert stats.next_techniques('T9') == []
+    assert stats.next_tactics('TA1') == [NextStep('TA2', 2, 2 / 3)]
+    assert stats.cooccurring_techniques('T0') == [('T1', 2), ('T2', 2), ('T3', 1)]
+    assert stats.cooccurring_techniques('T1', k=1) == [('T0', 2)]
+
+def test_atlas_data(atlas_data):
+    """Transition counts match consecutive procedure steps in the ATLAS data."""
+    matrices = build_procedure_statistics(atlas_data)
+
+    expected = {}
+    for case_study in atlas_data['case-studies']:
+        procedure = case_study['procedure']
+        for step, next_step in zip(procedure, procedure[1:]):
+            pair = (step['technique'], next_step['technique'])
+            expected[pair] = expected.get(pair, 0) + 1
+    transition = matrices['technique-transition']
+    assert transition.nnz == len(expected)
+    assert all(transition[pair] == count for pair, count in expected.items())
+    assert sum(matrices['tactic-transition'].row_sums()) == sum(expected.values())
+
+def test_write_procedure_statistics(tmp_path):
+    data = create_data([('TA0', 'T0'), ('TA1', 'T1')])
+    write_procedure_statistics(data, tmp_path / 'ATLAS.transitions')
+    loaded = ProcedureStatistics.load(tmp_path / 'ATLAS.transitions')
+    for name, matrix in build_procedure_statistics(data).items():
+        assert isinstance(loaded.matrices[name], SparseMatrix)
+        assert loaded.matrices[name].to_dict() == matrix.to_dict()
+    assert loaded.next_techniques('T0') == [NextStep('T1', 1, 1.0)]
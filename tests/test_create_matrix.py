@@ -0,0 +1,451 @@
+import datetime
+import io
+import os
+import textwrap
+
+import pytest
+import yaml
+
+from tools.anchor_graph import AnchorGraph, ObjectRef
+from tools.atlas_formats import find_atlas_file, FORMATS, is_format_available, load_atlas_file, write_atlas_data
+from tools.atlas_index import AtlasIndex, build_relations, write_atlas_index
+from tools.atlas_writer import DUMP_OPTIONS, write_atlas_yaml
+from tools.build_cache import BuildCache
+from tools.create_matrix import (
+    create_template_environment,
+    Diagnostic,
+    format_output,
+    get_dumper_class,
+    load_atlas_data,
+    load_atlas_yaml,
+    render_templates,
+    TemplateCache
+)
+from tools.incremental import BuildManifest
+from tools.parse_cache import ParseCache
+from tools.pluralize import plural, PLURALS
+
+"""
+Validates the ATLAS data build steps in tools/create_matrix.py.
+"""
+
+ANCHORS = {
+    'reconnaissance': {
+        'id': 'AML.TA0002',
+        'name': 'Reconnaissance',
+        'object-type': 'tactic'
+    }
+}
+
+def test_render_templates():
+    """Renders templated strings and leaves other values as-is."""
+    template_cache = TemplateCache(create_template_environment())
+    date = datetime.date(2021, 5, 13)
+    data = {
+        'tactics': ['{{reconnaissance.id}}'],
+        'description': 'See {{ create_internal_link(reconnaissance) }}.\n',
+        'name': 'Not a {template}',
+        'created_date': date
+    }
+
+    rendered = render_templates(data, template_cache, ANCHORS)
+
+    assert rendered == {
+        'tactics': ['AML.TA0002'],
+        # Trailing newline is kept
+        'description': 'See [Reconnaissance](/tactics/AML.TA0002).\n',
+        'name': 'Not a {template}',
+        'created_date': date
+    }
+    # Input data is not modified
+    assert data['tactics'] == ['{{reconnaissance.id}}']
+
+def test_render_templates_preserves_aliases():
+    """Objects referenced multiple times in the input are shared in the output."""
+    template_cache = TemplateCache(create_template_environment())
+    shared = {'tactic': '{{reconnaissance.id}}'}
+
+    rendered = render_templates([shared, shared], template_cache, ANCHORS)
+
+    assert rendered[0] == {'tactic': 'AML.TA0002'}
+    assert rendered[0] is rendered[1]
+
+def test_format_output_tactics():
+    """Replaces listed tactic IDs with tactic objects in matrix order and reports tactic problems."""
+    collection = {'id': 'AML.TA0009', 'object-type': 'tactic', 'name': 'Collection'}
+    reconnaissance = {'id': 'AML.TA0002', 'object-type': 'tactic', 'name': 'Reconnaissance'}
+    technique = {'id': 'AML.T0000', 'object-type': 'technique', 'name': 'Search'}
+    data = {
+        'id': 'ATLAS',
+        'tactics': ['AML.TA0002', 'AML.TA0009', 'AML.TA0100'],
+        'data': [
+            [collection, technique],
+            [reconnaissance, dict(collection, name='Duplicate')]
+        ]
+    }
+    diagnostics = []
+
+    matrix = format_output(data, diagnostics)
+
+    # Unresolved IDs are left in place
+    assert matrix['tactics'] == [reconnaissance, collection, 'AML.TA0100']
+    assert matrix['techniques'] == [technique]
+    assert diagnostics == [
+        Diagnostic('duplicate-tactic', 'ATLAS', 'AML.TA0009', 'Tactic AML.TA0009 is defined more than once, keeping the first definition'),
+        Diagnostic('unresolved-tactic', 'ATLAS', 'AML.TA0100', 'Tactic AML.TA0100 is listed in the matrix but not defined')
+    ]
+
+    # The ATLAS data has no tactic problems
+    diagnostics = []
+    load_atlas_data('data/data.yaml', diagnostics=diagnostics)
+    assert diagnostics == []
+
+def test_plural():
+    """Known object types are pluralized as by inflect, which is only used for new types."""
+    import inflect
+    p = inflect.engine()
+    for object_type, object_type_plural in PLURALS.items():
+        assert p.plural(object_type) == object_type_plural
+
+    assert plural('case-study') == 'case-studies'
+    assert plural('adversary') == 'adversaries'
+    # New types are added to the table
+    assert PLURALS.pop('adversary') == 'adversaries'
+
+def test_template_cache():
+    """Identical template sources are compiled once."""
+    template_cache = TemplateCache(create_template_environment(), maxsize=2)
+    data = ['{{reconnaissance.id}}', '{{reconnaissance.id}}', '{{reconnaissance.name}}']
+
+    rendered = render_templates(data, template_cache, ANCHORS)
+
+    assert rendered == ['AML.TA0002', 'AML.TA0002', 'Reconnaissance']
+    cache_info = template_cache.cache_info()
+    assert (cache_info.hits, cache_info.misses, cache_info.currsize) == (1, 2, 2)
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason='PyYAML was built without libyaml')
+def test_libyaml_parity():
+    """Loading and dumping ATLAS data with libyaml matches the pure-Python implementation."""
+    data = load_atlas_data('data/data.yaml')
+    assert load_atlas_data('data/data.yaml', libyaml=True) == data
+
+    # libyaml formats some strings differently, but the output represents the same data
+    output = yaml.dump(data, Dumper=get_dumper_class(libyaml=True), **DUMP_OPTIONS)
+    assert yaml.safe_load(output) == data
+
+@pytest.mark.parametrize('libyaml', [False, True])
+def test_write_atlas_yaml(libyaml):
+    """The streaming writer matches yaml.dump for ATLAS data and for values shared within a data object."""
+    if libyaml and not yaml.__with_libyaml__:
+        pytest.skip('PyYAML was built without libyaml')
+    Dumper = get_dumper_class(libyaml)
+
+    shared = {'name': 'Shared', 'tags': ['a', 'b']}
+    documents = [
+        load_atlas_data('data/data.yaml'),
+        {
+            'id': 'ATLAS',
+            'created_date': datetime.date(2021, 5, 13),
+            'tactics': [],
+            'mitigations': {},
+            'case-studies': [{'object-type': 'case-study', 'first': shared, 'second': shared}]
+        }
+    ]
+    for data in documents:
+        stream = io.StringIO()
+        write_atlas_yaml(data, stream, Dumper=Dumper)
+        assert stream.getvalue() == yaml.dump(data, Dumper=Dumper, **DUMP_OPTIONS)
+
+def test_write_atlas_data_formats(tmp_path):
+    """ATLAS data written in each available format loads as the same data, with the fastest format found first."""
+    data = load_atlas_data('data/data.yaml')
+    formats = [name for name in FORMATS if is_format_available(name)]
+
+    filepaths = write_atlas_data(data, tmp_path, formats)
+
+    assert [filepath.name for filepath in filepaths] == [f'ATLAS{FORMATS[name]}' for name in formats]
+    for filepath in filepaths:
+        assert load_atlas_file(filepath) == data
+    assert find_atlas_file(tmp_path) == filepaths[0]
+
+    # Compressed output is reproducible
+    gzip_filepath = tmp_path / 'ATLAS.json.gz'
+    contents = gzip_filepath.read_bytes()
+    write_atlas_data(data, tmp_path, ['json.gz'])
+    assert gzip_filepath.read_bytes() == contents
+
+    # YAML is used if it is the only format available
+    yaml_dir = tmp_path / 'yaml'
+    yaml_dir.mkdir()
+    write_atlas_data(data, yaml_dir)
+    assert find_atlas_file(yaml_dir) == yaml_dir / 'ATLAS.yaml'
+
+    # Files older than ATLAS.yaml are left over from an earlier build and skipped
+    json_filepath = tmp_path / 'ATLAS.json'
+    stat = json_filepath.stat()
+    os.utime(json_filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns - 1))
+    assert find_atlas_file(tmp_path) == next(filepath for filepath in filepaths if filepath != json_filepath)
+    write_atlas_data(data, tmp_path, ['json'])
+    assert find_atlas_file(tmp_path) == json_filepath
+
+def test_atlas_index(tmp_path):
+    """The lookup index resolves data objects, relations, and anchors as found in the ATLAS data."""
+    anchor_ids = {}
+    data = load_atlas_data('data/data.yaml', anchor_ids=anchor_ids)
+    index_filepath = tmp_path / 'ATLAS.index'
+    write_atlas_index(data, index_filepath, anchor_ids)
+
+    matrix = data['matrices'][0]
+    with AtlasIndex(index_filepath) as index:
+        for obj in matrix['tactics'] + matrix['techniques'] + matrix['mitigations'] + data['case-studies']:
+            assert index.get_object(obj['id']) == obj
+            assert index.get_object_type(obj['id']) == obj['object-type']
+        assert len(index) == len(index.ids())
+        assert index.ids('case-study') == [cs['id'] for cs in data['case-studies']]
+        assert 'AML.T9999' not in index
+        with pytest.raises(KeyError):
+            index.get_object('AML.T9999')
+
+        for technique in matrix['techniques']:
+            if 'subtechnique-of' in technique:
+                assert technique['id'] in index.get_subtechniques(technique['subtechnique-of'])
+            else:
+                assert index.get_tactics(technique['id']) == technique['tactics']
+                for tactic_id in technique['tactics']:
+                    assert technique['id'] in index.get_techniques(tactic_id)
+
+        mitigation = matrix['mitigations'][0]
+        assert index.get_mitigated_techniques(mitigation['id']) == [t['id'] for t in mitigation['techniques']]
+
+        case_study = data['case-studies'][0]
+        assert case_study['id'] in index.get_case_studies(case_study['procedure'][0]['technique'])
+
+        assert index.get_anchor_id('reconnaissance') == 'AML.TA0002'
+        assert index.get_tactics('AML.T9999') == []
+
+def test_build_relations_technique_ids():
+    """Mitigations can list techniques as ID strings or as dictionaries with their use."""
+    relations = build_relations([
+        {'id': 'AML.M0000', 'object-type': 'mitigation', 'techniques': ['AML.T0000', {'id': 'AML.T0001.000', 'use': 'Text'}]},
+    ])
+    assert relations['mitigation-techniques'] == {'AML.M0000': ['AML.T0000', 'AML.T0001.000']}
+
+@pytest.fixture
+def atlas_data_dir(tmp_path):
+    """Writes a minimal set of ATLAS source data files, returns the directory."""
+    files = {
+        'data.yaml': """
+            ---
+            id: ATLAS
+            name: Test Data
+            version: 1.0.0
+            matrices:
+              - !include .
+            data:
+              - !include case-studies/*.yaml
+            """,
+        'matrix.yaml': """
+            ---
+            id: ATLAS
+            name: Test Matrix
+            tactics:
+              - "{{reconnaissance.id}}"
+            data:
+              - !include tactics.yaml
+              - !include techniques.yaml
+            """,
+        'tactics.yaml': """
+            ---
+            - &reconnaissance
+              id: AML.TA0002
+              name: Reconnaissance
+              object-type: tactic
+              description: Gathering information.
+            """,
+        'techniques.yaml': """
+            ---
+            - &victim_research
+              id: AML.T0000
+              name: Search Open Technical Databases
+              object-type: technique
+              description: Part of {{ create_internal_link(reconnaissance) }}.
+              tactics:
+              - "{{reconnaissance.id}}"
+            - &active_scanning
+              id: AML.T0006
+              name: Active Scanning
+              object-type: technique
+              description: Probing.
+              tactics:
+              - "{{reconnaissance.id}}"
+            """,
+        'case-studies/AML.CS0000.yaml': """
+            ---
+            id: AML.CS0000
+            object-type: case-study
+            name: Test Case Study
+            summary: Uses {{ create_internal_link(victim_research) }}.
+            procedure:
+            - tactic: "{{reconnaissance.id}}"
+              technique: "{{victim_research.id}}"
+              description: A step.
+            """
+    }
+    for filename, contents in files.items():
+        filepath = tmp_path / filename
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_text(textwrap.dedent(contents).lstrip())
+    return tmp_path
+
+def test_anchor_graph(atlas_data_dir):
+    """Records the file defining each anchor and the objects referencing it."""
+    anchor_graph = AnchorGraph()
+    load_atlas_yaml(atlas_data_dir / 'data.yaml', anchor_graph=anchor_graph)
+
+    tactics_filepath = (atlas_data_dir / 'tactics.yaml').as_posix()
+    techniques_filepath = (atlas_data_dir / 'techniques.yaml').as_posix()
+    case_study_filepath = (atlas_data_dir / 'case-studies/AML.CS0000.yaml').as_posix()
+    tactic = ObjectRef(tactics_filepath, 0, 'AML.TA0002')
+    victim_research = ObjectRef(techniques_filepath, 0, 'AML.T0000')
+    active_scanning = ObjectRef(techniques_filepath, 1, 'AML.T0006')
+    case_study = ObjectRef(case_study_filepath, 0, 'AML.CS0000')
+
+    assert anchor_graph.get_defining_file('reconnaissance') == tactics_filepath
+    assert anchor_graph.get_defining_file('victim_research') == techniques_filepath
+    assert anchor_graph.get_uses(case_study) == {'reconnaissance', 'victim_research'}
+    assert anchor_graph.get_references('victim_research') == {case_study}
+    assert anchor_graph.get_affected_objects(['active_scanning']) == set()
+    assert anchor_graph.get_affected_objects(['reconnaissance']) == {victim_research, active_scanning, case_study}
+    assert anchor_graph.get_affected_by_file(tactics_filepath) == {tactic, victim_research, active_scanning, case_study}
+
+def test_incremental_build(atlas_data_dir):
+    """Incremental builds reuse unchanged objects and match a full build."""
+    data_filepath = atlas_data_dir / 'data.yaml'
+    manifest_filepath = atlas_data_dir / 'build-manifest.pickle'
+
+    build = BuildManifest.load(manifest_filepath, 'test')
+    load_atlas_data(data_filepath, build=build)
+    build.save(manifest_filepath)
+    assert build.stats['files_loaded'] == 3
+
+    # Rename the first technique, which is referenced by the case study
+    techniques_filepath = atlas_data_dir / 'techniques.yaml'
+    techniques_filepath.write_text(techniques_filepath.read_text().replace('name: Search Open Technical Databases', 'name: Search'))
+
+    build = BuildManifest.load(manifest_filepath, 'test')
+    data = load_atlas_data(data_filepath, build=build)
+
+    assert data == load_atlas_data(data_filepath)
+    assert data['case-studies'][0]['summary'] == 'Uses [Search](/techniques/AML.T0000).'
+    assert build.stats == {
+        'files_reused': 2,
+        'files_loaded': 1,
+        # The tactic and the unchanged technique
+        'objects_reused': 2,
+        'objects_rendered': 2
+    }
+
+def test_parallel_include(atlas_data_dir):
+    """Loading wildcard includes in worker processes matches loading serially."""
+    data_filepath = atlas_data_dir / 'data.yaml'
+    # Case study that aliases an anchor from another file, which is loaded serially
+    (atlas_data_dir / 'case-studies/AML.CS0001.yaml').write_text(textwrap.dedent("""
+        ---
+        id: AML.CS0001
+        object-type: case-study
+        name: Aliasing Case Study
+        summary: *victim_research
+        procedure: []
+        """).lstrip())
+
+    assert load_atlas_yaml(data_filepath, jobs=2) == load_atlas_yaml(data_filepath)
+
+    manifest_filepath = atlas_data_dir / 'build-manifest.pickle'
+    for _ in range(2):
+        build = BuildManifest.load(manifest_filepath, 'test')
+        data = load_atlas_data(data_filepath, build=build, jobs=2)
+        build.save(manifest_filepath)
+        assert data == load_atlas_data(data_filepath)
+    assert build.stats['files_reused'] == 4
+
+def test_parse_cache(atlas_data_dir, tmp_path_factory):
+    """Parsed files are reused until they change."""
+    data_filepath = atlas_data_dir / 'data.yaml'
+    cache_dir = tmp_path_factory.mktemp('cache')
+    expected = load_atlas_yaml(data_filepath)
+
+    parse_cache = ParseCache(cache_dir)
+    assert load_atlas_yaml(data_filepath, parse_cache=parse_cache) == expected
+    assert (parse_cache.hits, parse_cache.misses) == (0, 5)
+
+    parse_cache = ParseCache(cache_dir)
+    assert load_atlas_yaml(data_filepath, parse_cache=parse_cache) == expected
+    assert (parse_cache.hits, parse_cache.misses) == (5, 0)
+
+    # Changed files are parsed again
+    tactics_filepath = atlas_data_dir / 'tactics.yaml'
+    tactics_filepath.write_text(tactics_filepath.read_text().replace('name: Reconnaissance', 'name: Recon'))
+    parse_cache = ParseCache(cache_dir)
+    data, anchors = load_atlas_yaml(data_filepath, parse_cache=parse_cache)
+    assert anchors['reconnaissance']['name'] == 'Recon'
+    assert (parse_cache.hits, parse_cache.misses) == (4, 1)
+
+    # Entries are evicted down to the size limit
+    ParseCache(cache_dir, max_size=0).prune()
+    assert not list((cache_dir / 'parsed').iterdir())
+
+def test_build_cache(atlas_data_dir, tmp_path_factory):
+    """Built data is reused in memory and from disk until a data file changes, as a fresh copy for each load."""
+    data_filepath = atlas_data_dir / 'data.yaml'
+    cache_dir = tmp_path_factory.mktemp('cache')
+    expected = load_atlas_data(data_filepath)
+
+    build_cache = BuildCache(cache_dir)
+    data = build_cache.load(data_filepath)
+    assert data == expected
+    data['case-studies'].clear()
+    assert build_cache.load(data_filepath) == expected
+    assert build_cache.stats == {'memory_hits': 1, 'disk_hits': 0, 'builds': 1}
+
+    build_cache = BuildCache(cache_dir)
+    assert build_cache.load(data_filepath) == expected
+    assert build_cache.stats == {'memory_hits': 0, 'disk_hits': 1, 'builds': 0}
+
+    # Changed files are built again, and older builds are pruned
+    tactics_filepath = atlas_data_dir / 'tactics.yaml'
+    tactics_filepath.write_text(tactics_filepath.read_text().replace('name: Reconnaissance', 'name: Recon'))
+    build_cache = BuildCache(cache_dir, max_entries=1)
+    assert build_cache.load(data_filepath)['matrices'][0]['tactics'][0]['name'] == 'Recon'
+    assert build_cache.stats['builds'] == 1
+    assert len(list((cache_dir / 'builds').iterdir())) == 1
+
+def test_build_cache_share(atlas_data_dir, tmp_path_factory):
+    """Builds shared by one process are loaded by others without building again."""
+    data_filepath = atlas_data_dir / 'data.yaml'
+    cache_dir = tmp_path_factory.mktemp('cache')
+
+    build_cache = BuildCache(cache_dir)
+    entry_filepath = build_cache.share(data_filepath)
+    assert entry_filepath.is_file()
+    # Pruned builds are written again
+    entry_filepath.unlink()
+    assert build_cache.share(data_filepath) == entry_filepath
+    assert build_cache.stats['builds'] == 1
+
+    worker_cache = BuildCache(tmp_path_factory.mktemp('worker-cache'))
+    worker_cache.load_shared(data_filepath, entry_filepath)
+    assert worker_cache.load(data_filepath) == load_atlas_data(data_filepath)
+    assert worker_cache.stats == {'memory_hits': 1, 'disk_hits': 0, 'builds': 0}
+
+def test_incremental_build_key(atlas_data_dir):
+    """Manifests are not reused by builds with a different key."""
+    data_filepath = atlas_data_dir / 'data.yaml'
+    manifest_filepath = atlas_data_dir / 'build-manifest.pickle'
+
+    build = BuildManifest.load(manifest_filepath, 'test')
+    load_atlas_data(data_filepath, build=build)
+    build.save(manifest_filepath)
+
+    build = BuildManifest.load(manifest_filepath, 'other')
+    load_atlas_data(data_filepath, build=build)
+    assert build.stats['files_reused'] == 0
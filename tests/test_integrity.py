@@ -0,0 +1,88 @@
+import textwrap
+
+from tools.integrity import find_duplicate_ids, find_duplicates, format_duplicate_ids, locate_data_objects, ObjectLocation
+
+"""
+Validates the integrity checks of ATLAS data files in tools/integrity.py.
+"""
+
+def write_files(directory, files):
+    """Writes each filename to its dedented contents in the directory."""
+    for filename, contents in files.items():
+        filepath = directory / filename
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_text(textwrap.dedent(contents).lstrip())
+
+def test_locate_data_objects(tmp_path):
+    """Data objects are located in included files by the line of their ID, skipping nested objects."""
+    write_files(tmp_path, {
+        'data.yaml': """
+            ---
+            id: ATLAS
+            matrices:
+              - !include .
+            data:
+              - !include case-studies/*.yaml
+            """,
+        'matrix.yaml': """
+            ---
+            id: ATLAS
+            tactics:
+              - "{{reconnaissance.id}}"
+            data:
+              - !include techniques.yaml
+            """,
+        'techniques.yaml': """
+            ---
+            - &victim_research
+              name: Search
+              id: AML.T0000
+              object-type: technique
+              tactics:
+              - id: AML.TA0002
+                object-type: tactic
+            - id: AML.T0000
+              object-type: technique
+              name: >-
+                Search
+                Again
+            - *victim_research
+            """,
+        'case-studies/AML.CS0000.yaml': """
+            ---
+            id: AML.CS0000
+            object-type: case-study
+            name: Study
+            procedure:
+            - tactic: "{{reconnaissance.id}}"
+              technique: AML.T0000
+            """,
+    })
+
+    locations = locate_data_objects(tmp_path / 'data.yaml')
+    techniques_filepath = (tmp_path / 'techniques.yaml').as_posix()
+    assert locations == [
+        ObjectLocation(techniques_filepath, 4, 'AML.T0000', 'technique', 'Search'),
+        ObjectLocation(techniques_filepath, 9, 'AML.T0000', 'technique', 'Search Again'),
+        ObjectLocation((tmp_path / 'case-studies/AML.CS0000.yaml').as_posix(), 2, 'AML.CS0000', 'case-study', 'Study'),
+    ]
+
+    duplicates = find_duplicate_ids(locations)
+    assert duplicates == {'AML.T0000': locations[:2]}
+    assert format_duplicate_ids(duplicates) == '\n'.join([
+        'Duplicate ID(s) detected: 1 ID(s) found for 2 data objects.',
+        '  AML.T0000: Technique',
+        f'    Search ({techniques_filepath}:4)',
+        f'    Search Again ({techniques_filepath}:9)',
+    ])
+
+def test_find_duplicates():
+    assert find_duplicates('abcabda', key=str.upper) == {'A': ['a', 'a', 'a'], 'B': ['b', 'b']}
+    assert find_duplicates([], key=str) == {}
+
+def test_synthetic_corpus():
+    """Duplicates are grouped in order of first occurrence in a large corpus."""
+    locations = [ObjectLocation('techniques.yaml', i, f'AML.T{i % 99_990:05}', 'technique', f'Technique {i}') for i in range(100_000)]
+    duplicates = find_duplicate_ids(locations)
+    assert list(duplicates) == [f'AML.T{i:05}' for i in range(10)]
+    assert all(len(group) == 2 for group in duplicates.values())
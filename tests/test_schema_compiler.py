@@ -0,0 +1,99 @@
+import datetime
+
+import pytest
+from schema import Optional, Or, Regex, Schema, SchemaError, Use
+
+from schemas.atlas_obj import case_study_schema, mitigation_schema, subtechnique_schema, tactic_schema, technique_schema
+from tools.atlas_index import iter_data_objects
+from tools.schema_compiler import compile_check, compile_validator, generate_source
+
+"""
+Validates that validators compiled by tools/schema_compiler.py match their schemas.
+"""
+
+SCHEMAS = [tactic_schema, technique_schema, subtechnique_schema, mitigation_schema, case_study_schema]
+
+# Replacement values for mutating data objects, covering each type and ID format in the schemas
+VALUES = [
+    None, 1, True, 'text', 'AML.TA0000', 'AML.T0000', 'AML.T0000.000', 'YEAR', 'tactic', 'case-study',
+    datetime.date(2020, 1, 1), [], {}, ['text'], [{}],
+    [{'title': None, 'url': 1}],
+    [{'id': 'AML.T0000', 'use': 'text', 'extra': 1}],
+    [{'tactic': 'AML.TA0000', 'technique': 'AML.T0000.000', 'description': 'text'}],
+]
+
+@pytest.fixture(scope='module')
+def objects(atlas_data):
+    return list(iter_data_objects(atlas_data))
+
+def iter_mutations(obj):
+    """Yields copies of the data object with each key removed or replaced, including keys of the first list item."""
+    yield dict(obj, extra=1)
+    for key, value in obj.items():
+        yield {k: v for k, v in obj.items() if k != key}
+        for replacement in VALUES:
+            yield dict(obj, **{key: replacement})
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            item = value[0]
+            yield dict(obj, **{key: [dict(item, extra=1)] + value[1:]})
+            for item_key in item:
+                yield dict(obj, **{key: [{k: v for k, v in item.items() if k != item_key}] + value[1:]})
+                for replacement in VALUES:
+                    yield dict(obj, **{key: [dict(item, **{item_key: replacement})] + value[1:]})
+
+def get_error(validate, data):
+    """Returns the SchemaError message of validating the data, None if valid."""
+    try:
+        validate(data)
+    except SchemaError as e:
+        return e.code
+    return None
+
+@pytest.mark.parametrize('schema', SCHEMAS, ids=lambda schema: schema.name)
+def test_matches_schema(schema, objects):
+    """Compiled checks accept and reject the same data as the schema, for valid and mutated data objects."""
+    check = compile_check(schema)
+    for obj in objects:
+        assert check(obj) == schema.is_valid(obj)
+    # Mutate a sample of each type of data object
+    for obj in objects[::5]:
+        for mutated in iter_mutations(obj):
+            assert check(mutated) == schema.is_valid(mutated), mutated
+
+@pytest.mark.parametrize('schema', SCHEMAS, ids=lambda schema: schema.name)
+def test_errors(schema, objects):
+    """Compiled validators raise the same errors as the schema."""
+    validate = compile_validator(schema)
+    for obj in objects[::25]:
+        for mutated in iter_mutations(obj):
+            assert get_error(validate, mutated) == get_error(schema.validate, mutated)
+
+def test_schema_parts():
+    schema = Schema({
+        'id': Regex(r'^A\d$'),
+        'count': int,
+        'tags': [Or('a', 'b')],
+        Optional('nested'): {'key': str},
+    })
+    check = compile_check(schema)
+    assert check({'id': 'A1', 'count': 1, 'tags': ['a', 'b']})
+    assert check({'id': 'A1', 'count': 1, 'tags': [], 'nested': {'key': 'value'}})
+    # Booleans are not integers
+    assert not check({'id': 'A1', 'count': True, 'tags': []})
+    assert not check({'id': 'A1', 'count': 1, 'tags': ['c']})
+    assert not check({'id': 'A1', 'count': 1, 'tags': [], 'extra': 1})
+    # Nested dictionaries inherit ignore_extra_keys
+    assert not check({'id': 'A1', 'count': 1, 'tags': [], 'nested': {'key': 'value', 'extra': 1}})
+    assert compile_check(Schema(schema.schema, ignore_extra_keys=True))({'id': 'A1', 'count': 1, 'tags': [], 'nested': {'key': 'value', 'extra': 1}})
+
+    source, namespace = generate_source(schema)
+    assert 'def check(data):' in source
+    assert any(name.startswith('_re') for name in namespace)
+
+def test_unsupported():
+    with pytest.raises(TypeError):
+        compile_check(Schema({'value': Use(int)}))
+    with pytest.raises(TypeError):
+        compile_check(Schema({str: str}))
+    with pytest.raises(TypeError):
+        compile_check(Schema(str, error='Custom error'))
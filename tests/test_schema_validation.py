@@ -1,5 +1,5 @@
 import pytest
-from schema import SchemaError, SchemaWrongKeyError
+from schema import SchemaError
 
 """
 Validates ATLAS data objects against schemas defined in conftest.py.
@@ -34,26 +34,14 @@ def test_validate_tactics(tactic_schema, tactics):
 
 def test_validate_techniques(technique_schema, subtechnique_schema, techniques):
     """Validates each technique dictionary, both top-level and subtechniques.
+    Techniques with a parent technique are validated as subtechniques.
     Explicitly fails with message to capture more in pytest short test info.
     """
+    schema = subtechnique_schema if 'subtechnique-of' in techniques else technique_schema
     try:
-        # Check if dictionary is a top-level technique
-        technique_schema.validate(techniques)
-    except (SchemaWrongKeyError, SchemaError) as e:
-        # Could be a subtechnique
-        #   SchemaWrongKeyError: flagging on presence of 'subtechnique-of'
-        #   SchemaError: flagging on ID having extra numbers at end
-        #   Failed: 'technique' Missing key: 'tactics'
-        if e.code.startswith("Wrong key 'subtechnique-of'") or "does not match" in e.code or 'Missing key: \'tactics\'' in e.code:
-            try:
-                # Validate the subtechnique
-                subtechnique_schema.validate(techniques)
-            except SchemaError as se:
-                # Fail with any errors
-                pytest.fail(se.code)
-        else:
-            # Otherwise is another key error
-            pytest.fail(e.code)
+        schema.validate(techniques)
+    except SchemaError as e:
+        pytest.fail(e.code)
 
 def test_validate_case_studies(case_study_schema, case_studies):
     """Validates each case study dictionary.
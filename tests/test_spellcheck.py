@@ -0,0 +1,66 @@
+import spellcheck
+from spellcheck import find_misspellings, format_misspellings, get_spell_checker, SpellcheckCache, tokenize, WordList, write_word_list
+
+"""
+Validates the batch spellcheck in tests/spellcheck.py.
+"""
+
+class CountingSpellChecker:
+    """Spell checker recording the words it is asked to check."""
+
+    def __init__(self):
+        self.checked = []
+
+    def unknown(self, words):
+        self.checked.extend(words)
+        return get_spell_checker().unknown(words)
+
+def test_tokenize():
+    assert tokenize('See [Link](/techniques/AML.T0000), `codee` at https://example.com by the ATT&CK team') == ['See', 'at', 'by', 'the', 'team']
+    # Words starting with a lowercase s are kept, while the s of a possessive is not
+    assert tokenize("the model's src over ssh") == ['the', 'model', 'src', 'over', 'ssh']
+
+def test_find_misspellings():
+    """Each unique token is checked once, and unknown words are listed for each text containing them."""
+    spell_checker = CountingSpellChecker()
+    cache = SpellcheckCache(spell_checker)
+    texts = [
+        ('First', 'A modell of the modell'),
+        ('Second', 'The model'),
+        ('Third', 'Another Modell'),
+    ]
+
+    misspellings = find_misspellings(texts, cache)
+    assert misspellings == {'First': ['modell'], 'Third': ['modell']}
+    assert sorted(spell_checker.checked) == sorted(['modell', 'of', 'the', 'The', 'model', 'Another', 'Modell'])
+    assert format_misspellings(misspellings) == '\n'.join([
+        'Not recognized by spellcheck - fix or exclude in tests/custom_words.txt:',
+        '  First: modell',
+        '  Third: modell',
+    ])
+
+    # Tokens are only checked the first time they are seen
+    spell_checker.checked.clear()
+    assert find_misspellings([('Fourth', 'the modell and the model')], cache) == {'Fourth': ['modell']}
+    assert spell_checker.checked == ['and']
+
+def test_word_list(tmp_path):
+    """Word list files are looked up as by SpellChecker.unknown."""
+    filepath = tmp_path / 'words.bin'
+    write_word_list(filepath, ['model', 'a', 'naïve', 'models'])
+    word_list = WordList(filepath)
+
+    assert len(word_list) == 4
+    assert [word in word_list for word in ['a', 'model', 'models', 'naïve', 'mode', 'modelss', '']] == [True, True, True, True, False, False, False]
+    assert word_list.unknown(['Model', 'NAÏVE', 'Modell', '1.5', '-', 'x' * 10, 'modelling']) == {'modell', 'modelling'}
+
+def test_word_list_key(tmp_path, monkeypatch):
+    """Word lists are rebuilt when the custom words change."""
+    custom_words_filepath = tmp_path / 'custom_words.txt'
+    custom_words_filepath.write_text('modell\n')
+    monkeypatch.setattr(spellcheck, 'custom_words_file', str(custom_words_filepath))
+    filepath = spellcheck.get_word_list_filepath()
+    assert filepath == spellcheck.get_word_list_filepath()
+
+    custom_words_filepath.write_text('modell\nmodelling\n')
+    assert spellcheck.get_word_list_filepath() != filepath
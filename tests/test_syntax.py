@@ -1,37 +1,21 @@
-import re
 import warnings
 
 import pytest
 
-from schemas.atlas_id import TACTIC_ID_PATTERN, TECHNIQUE_ID_PATTERN, SUBTECHNIQUE_ID_PATTERN
-from spellcheck import SPELL_CHECKER
+from schemas.atlas_id import get_id_type
+from spellcheck import find_misspellings, format_misspellings
+from tools.integrity import find_duplicate_ids, format_duplicate_ids, locate_data_objects
+from tools.text_patterns import REGEX_MARKDOWN_LINK, REGEX_URL_EXACT
 
 """
 Validates text for internal and external Markdown links and warns for spelling.
 """
 
-# Markdown Link syntax
-# [title](url)
-REGEX_MARKDOWN_LINK = re.compile(r'\[([^\[]+)\]\((.*?)\)')
-
-# Fully-qualified URLs
-# https://stackoverflow.com/a/17773849
-REGEX_URL = re.compile(r'(https?:\/\/(?:www\.|(?!www))[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|www\.[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|https?:\/\/(?:www\.|(?!www))[a-zA-Z0-9]+\.[^\s]{2,}|www\.[a-zA-Z0-9]+\.[^\s]{2,})')
-REGEX_URL_EXACT = re.compile(rf'^{REGEX_URL.pattern}$')
-
-# Internal Markdown links, assumed to be only to /tactics/ and /techniques/
-# Note that the regex objects here are from conftest.py and are the schema library's objects, hence the pattern_str property
-REGEX_INTERNAL_URL = re.compile(
-    rf'^/tactics/{TACTIC_ID_PATTERN}'
-    r'|'
-    rf'/techniques/{SUBTECHNIQUE_ID_PATTERN}' # Match subtechnique pattern first because top-level technique also matches this
-    r'|'
-    rf'/techniques/{TECHNIQUE_ID_PATTERN}$'
-    )
-
-# Capitalized acronym-like words, including possessive (') and plural versions (s)
-# Example matches: AI, AI's, AIs, ATT&CK
-REGEX_ACRONYM = re.compile(r"\b[A-Z&]+[']{0,1}[s]{0,1}\b")
+# Internal Markdown link paths, assumed to be only to /tactics/ and /techniques/, to the types of IDs they link to
+INTERNAL_URL_ID_TYPES = {
+    '/tactics': {'tactic'},
+    '/techniques': {'technique', 'subtechnique'},
+}
 
 def test_markdown_link(text_with_possible_markdown_syntax):
     """Validates Markdown link syntax for internal and external links.
@@ -68,7 +52,8 @@ def test_markdown_link(text_with_possible_markdown_syntax):
 
         elif not url.startswith('http'):
             # Internal ATLAS link should match expected prefix and ID syntax
-            if not REGEX_INTERNAL_URL.match(url):
+            path, _, atlas_id = url.rpartition('/')
+            if get_id_type(atlas_id) not in INTERNAL_URL_ID_TYPES.get(path, ()):
                 errors.append(f'Expected internal Markdown link URL to start with /techniques/ or /tactics/ and match ID format, got ({url})')
 
     if errors:
@@ -76,46 +61,14 @@ def test_markdown_link(text_with_possible_markdown_syntax):
         error_str = '\n'.join(errors)
         pytest.fail(error_str)
 
-# Inline Markdown code
-REGEX_INLINE_CODE = re.compile(r'`{1}(.+)`{1}')
-
-# Parses out string tokens to be spell checked
-REGEX_WORDS = re.compile(
-    r"\b"           # Start at word boundary
-        r"(?!s)"            # Excludes just "s", i.e. from a posessive
-        r"(?![iegUS]\.)"    # Excludes i.e., e.g., U.S.
-        r"(?!\d+[MKB]\b)"   # Excludes 70K, M, B
-    r"(?:"          # Non capture group
-        r"[\w&]+"       # All words, can have &, i.e. R&D
-        r"(?:'t)?"      # Optionally include contractions
-        r"(?:\(s\))?"   # Optionally include (s) at end
-    r")"
-    )
-
-def test_spelling(text_to_be_spellchecked):
-    """Warns for potentially mispelled words from names and descriptions.
+def test_spelling(texts_to_be_spellchecked):
+    """Warns once for potentially mispelled words from all names and descriptions, listed by field.
     Only checks text outside of Markdown links.
     See tests/custom_words.txt for exclusion words.
     """
-    # Text is second element in tuple of (text identifier, text)
-    text = text_to_be_spellchecked[1]
-    # Remove Markdown links
-    stripped_text = REGEX_MARKDOWN_LINK.sub('', text)
-    # Remove inline code, content surrounded by one backtick
-    stripped_text = REGEX_INLINE_CODE.sub('', stripped_text)
-    # Remove URLs
-    stripped_text = REGEX_URL.sub('', stripped_text)
-    # Remove acronym-like words
-    stripped_text = REGEX_ACRONYM.sub('', stripped_text)
-    # Tokenize, see comments above at variable declaration
-    text_tokens = REGEX_WORDS.findall(stripped_text)
-
-    # Get a set of potentially mispelled words
-    possible_mispelled = SPELL_CHECKER.unknown(text_tokens)
-    if possible_mispelled:
-        # Emit warnings
-        msg = 'Not recognized by spellcheck - fix or exclude in tests/custom_words.txt: '
-        warnings.warn(msg + str(possible_mispelled))
+    misspellings = find_misspellings(texts_to_be_spellchecked)
+    if misspellings:
+        warnings.warn(format_misspellings(misspellings))
 
 def test_ascii(text_to_be_spellchecked):
     """Warns for text containing non-ascii characters, likely from copy and pastes,
@@ -146,35 +99,11 @@ def test_ascii(text_to_be_spellchecked):
         msg = f'Contains non-ascii, consider fixing. YAML output will be the literal string: {ascii(text)}'
         warnings.warn(msg)
 
-def test_check_unique_ids(all_data_objects):
-    """ Warns for duplicate IDs in tactics, techniques, case studies, etc. """
-
-    # Creates a list of IDs from all_data_objects, which may contain duplicates
-    all_ids = [ids[0] for ids in all_data_objects]
-
-    # Creates a list of 3-element tuples that hold the duplicate IDs, name, and object type
-    # Sorted is needed to print the IDs in order
-    list_of_duplicate_objects = sorted([(ids[0], ids[1]['name'], ids[1]['object-type']) for ids in all_data_objects if all_ids.count(ids[0]) > 1])
-    list_of_duplicate_ids = sorted(set([id[0] for id in list_of_duplicate_objects]))
-
-    if len(list_of_duplicate_objects) > 0:
-
-        # Variables needed to turn number of duplicates into string to use in error msg
-        num_of_duplicates_as_str = str(len(list_of_duplicate_ids))
-        total_num_of_duplicates_as_str = str(len(list_of_duplicate_objects))
-
-        # Main error message
-        error_msg = F"Duplicate ID(s) detected: {num_of_duplicates_as_str} ID(s) found for {total_num_of_duplicates_as_str} data objects."
-
-        # Adds duplicate ID info (ID, name, object type)
-        for dup_id in range(len(list_of_duplicate_ids)):
-            tactic_name = [obj[2] for obj in list_of_duplicate_objects if obj[0] == list_of_duplicate_ids[dup_id]]
-            error_msg += F"\n\t  {list_of_duplicate_ids[dup_id]}: {tactic_name[0].capitalize()}"
-            for dup_object in list_of_duplicate_objects:
-                if dup_object[0] == list_of_duplicate_ids[dup_id]:
-                    error_msg += F"\n\t\t {dup_object[1]}"
-
-        pytest.fail(error_msg)
+def test_check_unique_ids():
+    """ Fails for duplicate IDs in tactics, techniques, case studies, etc., listing the file and line of each. """
+    duplicates = find_duplicate_ids(locate_data_objects('data/data.yaml'))
+    if duplicates:
+        pytest.fail(format_duplicate_ids(duplicates))
 
 def test_procedure_step_match(procedure_steps, technique_id_to_tactic_ids):
     """ Warns for unmatched techniques and tactics in case study procedures. """
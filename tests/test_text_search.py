@@ -0,0 +1,79 @@
+import pytest
+
+from tools.text_search import (
+    decode_postings,
+    encode_postings,
+    parse_query,
+    SearchIndex,
+    tokenize,
+    write_search_index
+)
+
+"""
+Validates the full-text search index in tools/text_search.py.
+"""
+
+def create_data(*objects):
+    """Returns minimal ATLAS data with the objects in a matrix."""
+    return {'id': 'ATLAS', 'matrices': [{'id': 'ATLAS', 'techniques': list(objects)}]}
+
+@pytest.fixture(scope='module')
+def index():
+    return SearchIndex.from_data(create_data(
+        {'id': 'AML.T0000', 'object-type': 'technique', 'name': 'Search Victim Research',
+            'description': 'Adversaries search [Reconnaissance](/tactics/AML.TA0002) research materials.'},
+        {'id': 'AML.T0001', 'object-type': 'technique', 'name': 'Poison Training Data',
+            'description': 'Adversaries poison training data, and the training data poisoning persists.'},
+        {'id': 'AML.T0002', 'object-type': 'technique', 'name': 'Data Collection',
+            'description': 'Training on collected data.'},
+        {'id': 'AML.CS0000', 'object-type': 'case-study', 'name': 'Study', 'summary': 'A summary',
+            'procedure': [{'description': 'The adversary used training'}, {'description': 'data from research.'}]},
+    ))
+
+def test_tokenize():
+    """Words are lowercased, and Markdown links are replaced by their titles."""
+    assert tokenize("The [Model's](/techniques/AML.T0000) R&D, i.e. 70K tokens") == ['the', "model", 'r&d', 'tokens']
+
+def test_postings_encoding():
+    doc_positions = {0: [1, 5, 6], 3: [0], 10: [2, 40]}
+    encoded = encode_postings(doc_positions)
+    assert encoded == [0, 3, 1, 4, 1, 3, 1, 0, 7, 2, 2, 38]
+    assert decode_postings(encoded) == doc_positions
+
+def test_parse_query():
+    assert parse_query('"training data" poison OR AML.T0000 AND search') == [
+        [('training', 'data'), ('poison',)],
+        [('aml', 't0000'), ('search',)]
+    ]
+    assert parse_query('OR') == []
+
+def test_search(index):
+    """Queries match all terms and phrases of any alternative, ranked by BM25."""
+    ids = lambda query: [result.id for result in index.search(query)]
+
+    # Term frequency is normalized by document length
+    assert ids('data') == ['AML.T0002', 'AML.T0001', 'AML.CS0000']
+    assert ids('poison') == ['AML.T0001']
+    # Words starting with s are tokenized, but not a possessive s
+    assert ids('search') == ['AML.T0000']
+    assert ids('s') == []
+    # Phrases match consecutive words, not across fields or procedure steps
+    assert ids('"training data"') == ['AML.T0001']
+    assert ids('"data poisoning"') == ['AML.T0001']
+    assert ids('"training data from"') == []
+    # Link titles are searchable, but not link URLs
+    assert ids('reconnaissance') == ['AML.T0000']
+    assert ids('tactics') == []
+    assert ids('research OR collection') == ['AML.T0002', 'AML.T0000', 'AML.CS0000']
+    assert ids('research collection') == []
+    assert ids('unknown') == []
+    assert ids('') == []
+
+    results = index.search('data', limit=1)
+    assert len(results) == 1
+    assert results[0].score > 0
+
+def test_write_search_index(tmp_path):
+    data = create_data({'id': 'AML.T0000', 'object-type': 'technique', 'name': 'Name', 'description': 'Text'})
+    write_search_index(data, tmp_path / 'ATLAS.search')
+    assert [result.id for result in SearchIndex.load(tmp_path / 'ATLAS.search').search('text')] == ['AML.T0000']
@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+from tools.validate import format_summary, split_chunks, validate_atlas_data, validate_object
+
+"""
+Validates the standalone schema validation in tools/validate.py.
+"""
+
+def create_data():
+    """Returns minimal ATLAS data with an invalid technique, subtechnique, and case study."""
+    return {
+        'id': 'ATLAS',
+        'version': '0.0.0',
+        'matrices': [{
+            'id': 'ATLAS',
+            'tactics': [{'id': 'AML.TA0000', 'object-type': 'tactic', 'name': 'Tactic', 'description': 'Text'}],
+            'techniques': [
+                {'id': 'AML.T0000', 'object-type': 'technique', 'name': 'Technique', 'description': 'Text'},
+                {'id': 'AML.T0000.000', 'object-type': 'technique', 'name': 'Subtechnique', 'description': 'Text', 'subtechnique-of': 'AML.T0000'},
+                {'id': 'AML.T0000.001', 'object-type': 'technique', 'name': 'Subtechnique', 'description': 'Text', 'subtechnique-of': 'T0000'},
+            ],
+        }],
+        'case-studies': [{
+            'id': 'AML.CS0000', 'object-type': 'case-study', 'name': 'Study', 'summary': 'Text',
+            'incident-date': datetime.date(2020, 1, 1), 'incident-date-granularity': 'DAY', 'procedure': [],
+        }],
+    }
+
+def test_atlas_data(atlas_data):
+    report = validate_atlas_data(atlas_data)
+    assert report['valid']
+    assert report['errors'] == []
+    assert sum(report['objects'].values()) == len(atlas_data['case-studies']) + sum(
+        len(atlas_data['matrices'][0][key]) for key in ('tactics', 'techniques', 'mitigations')
+    )
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_errors(jobs):
+    """All errors are reported in data order, regardless of the number of processes."""
+    report = validate_atlas_data(create_data(), jobs=jobs)
+    assert not report['valid']
+    assert report['objects'] == {'tactic': 1, 'technique': 1, 'subtechnique': 2, 'case-study': 1}
+    assert [(error['id'], error['schema']) for error in report['errors']] == [
+        ('AML.T0000', 'technique'),
+        ('AML.T0000.001', 'subtechnique'),
+        ('AML.CS0000', 'case-study'),
+    ]
+    assert "Missing key: 'tactics'" in report['errors'][0]['message']
+
+    summary = format_summary(report)
+    assert summary.startswith('Validated 5 data objects in ATLAS 0.0.0')
+    assert summary.endswith('3 error(s)')
+
+def test_validate_object():
+    assert validate_object({'id': 'AML.TA0000', 'object-type': 'tactic', 'name': 'Tactic', 'description': 'Text'}) is None
+    assert validate_object({'id': 'AML.X0000', 'object-type': 'other'}).schema is None
+
+def test_split_chunks():
+    assert split_chunks(list(range(5)), 2) == [[0, 1, 2], [3, 4]]
+    assert split_chunks(list(range(2)), 4) == [[0], [1]]
+    assert split_chunks([], 4) == []
@@ -0,0 +1,140 @@
+from collections import defaultdict, namedtuple
+
+from jinja2 import meta
+
+"""
+Tracks dependencies between ATLAS YAML anchors and the data objects that reference them.
+
+Anchors are defined in included data files, ex. &reconnaissance in tactics.yaml,
+and referenced by templated strings in data objects, ex. {{reconnaissance.id}}
+or {{ create_internal_link(reconnaissance) }}.
+"""
+
+# Identifies a top-level data object by its included file and position, along with its ATLAS ID if any
+ObjectRef = namedtuple('ObjectRef', ['filepath', 'index', 'id'])
+
+def find_template_variables(env, source):
+    """Returns the set of variable names referenced by the Jinja template source.
+
+    Ex. {{ create_internal_link(train_proxy_model) }} references create_internal_link and train_proxy_model
+    """
+    return meta.find_undeclared_variables(env.parse(source))
+
+def find_anchor_uses(obj, env, anchor_names, cache=None):
+    """Returns the set of anchor names referenced by templated strings in the object.
+
+    The optional cache of template source to variable names is shared across calls.
+    """
+    if cache is None:
+        cache = {}
+
+    uses = set()
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            if '{' in value:
+                if value not in cache:
+                    cache[value] = find_template_variables(env, value)
+                uses.update(cache[value])
+        elif isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+
+    return uses & anchor_names
+
+def get_objects(doc):
+    """Returns the top-level data objects in an included document, which is either a list or a single object."""
+    return doc if isinstance(doc, list) else [doc]
+
+class AnchorGraph:
+    """Dependency graph of anchor -> defining file -> referencing objects.
+
+    Files are added as they are loaded, then references are indexed once all anchors are known.
+    """
+
+    def __init__(self):
+        # Filepath to its loaded document
+        self.docs = {}
+        # Anchor name to the filepath defining it
+        self.definitions = {}
+        # Filepath to the names of anchors it defines
+        self.file_anchors = defaultdict(set)
+        # ObjectRef to the names of anchors it references
+        self.object_uses = {}
+        # Anchor name to the ObjectRefs referencing it
+        self.references = defaultdict(set)
+
+    def add_file(self, filepath, doc, anchor_names, uses=None):
+        """Adds an included file with its loaded document and the anchors it defines.
+
+        The anchors used by each object in the document can be provided if already known,
+        otherwise they are found by index_references.
+        """
+        key = filepath.as_posix()
+        self.docs[key] = doc
+
+        for anchor in anchor_names:
+            # Later definitions of an anchor override earlier ones, as in YAML loading
+            previous_key = self.definitions.get(anchor)
+            if previous_key is not None:
+                self.file_anchors[previous_key].discard(anchor)
+            self.definitions[anchor] = key
+            self.file_anchors[key].add(anchor)
+
+        if uses is not None:
+            for ref, obj_uses in zip(self.get_object_refs(key), uses):
+                self.add_uses(ref, obj_uses)
+
+    def add_uses(self, ref, anchor_names):
+        """Records that the object references the specified anchors."""
+        self.object_uses[ref] = set(anchor_names)
+        for anchor in anchor_names:
+            self.references[anchor].add(ref)
+
+    def index_references(self, env, anchor_names):
+        """Finds anchor references in templated strings of all objects not yet indexed."""
+        anchor_names = set(anchor_names)
+        template_variables = {}
+        for key in self.docs:
+            for ref, obj in zip(self.get_object_refs(key), get_objects(self.docs[key])):
+                if ref not in self.object_uses:
+                    self.add_uses(ref, find_anchor_uses(obj, env, anchor_names, template_variables))
+
+    def get_object_refs(self, filepath):
+        """Returns an ObjectRef for each top-level object in the file."""
+        key = filepath if isinstance(filepath, str) else filepath.as_posix()
+        return [
+            ObjectRef(key, i, obj.get('id') if isinstance(obj, dict) else None)
+            for i, obj in enumerate(get_objects(self.docs[key]))
+        ]
+
+    def get_uses(self, ref):
+        """Returns the names of anchors referenced by the object."""
+        return self.object_uses.get(ref, set())
+
+    def get_defining_file(self, anchor):
+        """Returns the filepath defining the anchor, or None if not defined in an included file."""
+        return self.definitions.get(anchor)
+
+    def get_references(self, anchor):
+        """Returns the ObjectRefs that reference the anchor."""
+        return set(self.references.get(anchor, ()))
+
+    def get_affected_objects(self, anchors):
+        """Returns the ObjectRefs that must be re-rendered if any of the specified anchors change."""
+        affected = set()
+        for anchor in anchors:
+            affected.update(self.references.get(anchor, ()))
+        return affected
+
+    def get_affected_by_file(self, filepath):
+        """Returns the ObjectRefs that must be re-rendered if the file changes,
+        being its own objects and those referencing anchors it defines.
+        """
+        key = filepath if isinstance(filepath, str) else filepath.as_posix()
+        affected = set(self.get_object_refs(key)) if key in self.docs else set()
+        affected.update(self.get_affected_objects(self.file_anchors.get(key, ())))
+        return affected
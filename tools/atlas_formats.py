@@ -0,0 +1,147 @@
+import datetime
+import gzip
+import io
+import json
+import os
+from pathlib import Path
+
+import yaml
+
+from tools.atlas_writer import write_atlas_yaml
+
+"""
+Writes and reads ATLAS data in the distributed file formats.
+
+ATLAS.yaml is the primary format. The same data can also be written as ATLAS.json
+and as MessagePack in ATLAS.msgpack, which requires the optional msgpack package,
+each optionally gzip-compressed, ex. ATLAS.json.gz.
+These formats hold dates as ISO 8601 strings, which are converted back to dates when loaded.
+
+Files written together share a modification time, and files older than ATLAS.yaml
+are considered stale and not loaded, ex. after a later build only writes ATLAS.yaml.
+"""
+
+# Output format name to its file suffix, in order of preference for loading
+FORMATS = {
+    'msgpack': '.msgpack',
+    'json': '.json',
+    'msgpack.gz': '.msgpack.gz',
+    'json.gz': '.json.gz',
+    'yaml': '.yaml',
+    'yaml.gz': '.yaml.gz',
+}
+
+# Keys of date values in ATLAS data objects
+DATE_KEYS = frozenset(['created_date', 'modified_date', 'incident-date'])
+
+def import_msgpack():
+    """Returns the msgpack module, raising an ImportError describing the optional dependency if not installed."""
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError('The msgpack format requires the msgpack package, install it with `pip install msgpack`') from e
+    return msgpack
+
+def is_format_available(name):
+    """Returns True if the format can be written and read in this environment."""
+    if name.startswith('msgpack'):
+        try:
+            import_msgpack()
+        except ImportError:
+            return False
+    return True
+
+def encode_value(obj):
+    """Returns a JSON and MessagePack compatible form of values without one, ex. dates as ISO 8601 strings."""
+    if isinstance(obj, datetime.date):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not serializable')
+
+def decode_dates(obj):
+    """Converts ISO 8601 strings back to dates under DATE_KEYS in the object, returns the object."""
+    for key in DATE_KEYS & obj.keys():
+        if isinstance(obj[key], str):
+            obj[key] = datetime.datetime.strptime(obj[key], '%Y-%m-%d').date()
+    return obj
+
+def write_atlas_data(data, output_dir, formats=('yaml',), Dumper=yaml.Dumper):
+    """Writes ATLAS data to the directory in each of the named formats, named by the data ID.
+
+    Returns the written filepaths.
+    """
+    output_filepaths = []
+    for name in formats:
+        output_filepath = Path(output_dir) / f"{data['id']}{FORMATS[name]}"
+        base_name, _, compression = name.partition('.')
+
+        with open(output_filepath, 'wb') as f:
+            if compression:
+                # Omit the file name and modification time from the gzip header so the output is reproducible
+                with gzip.GzipFile(filename='', mode='wb', fileobj=f, mtime=0) as gzip_file:
+                    write_format(data, gzip_file, base_name, Dumper)
+            else:
+                write_format(data, f, base_name, Dumper)
+
+        output_filepaths.append(output_filepath)
+
+    # Mark all files as written by the same build, as files older than ATLAS.yaml are not loaded
+    if output_filepaths:
+        stat = output_filepaths[-1].stat()
+        for output_filepath in output_filepaths[:-1]:
+            os.utime(output_filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    return output_filepaths
+
+def write_format(data, f, base_name, Dumper=yaml.Dumper):
+    """Writes ATLAS data to the binary file in the uncompressed format, one of yaml, json, or msgpack."""
+    if base_name == 'yaml':
+        text_file = io.TextIOWrapper(f, encoding='utf-8')
+        write_atlas_yaml(data, text_file, Dumper=Dumper)
+        # Leave the binary file open for the caller
+        text_file.detach()
+    elif base_name == 'json':
+        f.write(json.dumps(data, default=encode_value, ensure_ascii=False).encode('utf-8'))
+    elif base_name == 'msgpack':
+        f.write(import_msgpack().packb(data, default=encode_value))
+
+def load_atlas_file(filepath):
+    """Returns ATLAS data read from the file, in the format given by its suffix."""
+    filepath = Path(filepath)
+    name = ''.join(filepath.suffixes[-2:]) if filepath.suffix == '.gz' else filepath.suffix
+    base_name, _, compression = name.lstrip('.').partition('.')
+
+    open_file = gzip.open if compression else open
+    with open_file(filepath, 'rb') as f:
+        if base_name == 'msgpack':
+            return import_msgpack().unpackb(f.read(), object_hook=decode_dates)
+        elif base_name == 'json':
+            return json.loads(f.read(), object_hook=decode_dates)
+        elif base_name == 'yaml':
+            # Use libyaml if available, as only the loaded data is needed
+            return yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+    raise ValueError(f'Unknown ATLAS data format of {filepath}, expected one of {", ".join(FORMATS.values())}')
+
+def find_atlas_file(dist_dir='dist', atlas_id='ATLAS'):
+    """Returns the path to the fastest-loading ATLAS data file available in the directory,
+    skipping files older than ATLAS.yaml, which were not written by the same or a later build.
+    """
+    yaml_filepath = Path(dist_dir) / f'{atlas_id}.yaml'
+    yaml_mtime = yaml_filepath.stat().st_mtime_ns if yaml_filepath.is_file() else None
+    for name, suffix in FORMATS.items():
+        filepath = Path(dist_dir) / f'{atlas_id}{suffix}'
+        if not filepath.is_file() or not is_format_available(name):
+            continue
+        if yaml_mtime is not None and filepath.stat().st_mtime_ns < yaml_mtime:
+            continue
+        return filepath
+
+    raise FileNotFoundError(f'No ATLAS data file found for {atlas_id} in {dist_dir}')
+
+def load_atlas_dist(dist_dir='dist', atlas_id='ATLAS'):
+    """Returns ATLAS data from the fastest-loading file available in the directory, ex. dist/ATLAS.json before dist/ATLAS.yaml.
+
+    All formats are written together by tools/create_matrix.py, so contain the same data when generated in the same build.
+    Files left over from earlier builds, older than ATLAS.yaml, are skipped.
+    """
+    return load_atlas_file(find_atlas_file(dist_dir, atlas_id))
@@ -0,0 +1,172 @@
+import json
+import mmap
+from pathlib import Path
+
+from tools.atlas_formats import decode_dates, encode_value
+
+"""
+Writes and reads ATLAS.index, a lookup index of ATLAS data by ID.
+
+The index file starts with a header line, a JSON object holding the byte span of
+each data object and the relations between objects by ID. The data objects follow as
+JSON records, so a reader can map the file into memory and decode only the objects looked up.
+"""
+
+# Increment when the index format changes
+INDEX_VERSION = 1
+
+# Relation name to a description of its ID to list of IDs mapping
+RELATIONS = {
+    'technique-tactics': 'Technique to the tactics it is listed under',
+    'tactic-techniques': 'Tactic to the techniques listed under it',
+    'technique-subtechniques': 'Technique to its subtechniques',
+    'mitigation-techniques': 'Mitigation to the techniques it mitigates',
+    'technique-case-studies': 'Technique to the case studies with a procedure step using it',
+}
+
+def iter_data_objects(data):
+    """Yields each data object in the matrices and at the top-level of ATLAS data, ex. techniques and case studies."""
+    for container in data['matrices'] + [data]:
+        for value in container.values():
+            if isinstance(value, list):
+                yield from (obj for obj in value if isinstance(obj, dict) and 'object-type' in obj)
+
+def get_technique_id(technique):
+    """Returns the ID of a technique listed by a mitigation, either an ID string or a dictionary with its ID and use."""
+    return technique if isinstance(technique, str) else technique['id']
+
+def add_relation(relations, name, from_id, to_id):
+    """Adds the related ID to the relation, once, keeping the order added."""
+    related_ids = relations[name].setdefault(from_id, [])
+    if to_id not in related_ids:
+        related_ids.append(to_id)
+
+def build_relations(objects):
+    """Returns a dictionary of relation name to the ID to related IDs mapping among the data objects."""
+    relations = {name: {} for name in RELATIONS}
+    for obj in objects:
+        object_type = obj['object-type']
+        if object_type == 'technique':
+            for tactic_id in obj.get('tactics', []):
+                add_relation(relations, 'technique-tactics', obj['id'], tactic_id)
+                add_relation(relations, 'tactic-techniques', tactic_id, obj['id'])
+            if 'subtechnique-of' in obj:
+                add_relation(relations, 'technique-subtechniques', obj['subtechnique-of'], obj['id'])
+        elif object_type == 'mitigation':
+            for technique in obj.get('techniques', []):
+                add_relation(relations, 'mitigation-techniques', obj['id'], get_technique_id(technique))
+        elif object_type == 'case-study':
+            for step in obj.get('procedure', []):
+                add_relation(relations, 'technique-case-studies', step['technique'], obj['id'])
+    return relations
+
+def write_atlas_index(data, output_filepath, anchor_ids=None):
+    """Writes the lookup index of ATLAS data to the filepath.
+
+    The optional anchor_ids dictionary of anchor name to ATLAS ID is included for anchor lookups.
+    """
+    objects = list(iter_data_objects(data))
+
+    records = []
+    spans = {}
+    offset = 0
+    for obj in objects:
+        # Objects listed in multiple matrices are indexed once
+        if obj['id'] in spans:
+            continue
+        record = json.dumps(obj, default=encode_value, ensure_ascii=False).encode('utf-8') + b'\n'
+        spans[obj['id']] = [offset, len(record)]
+        records.append(record)
+        offset += len(record)
+
+    header = {
+        'version': INDEX_VERSION,
+        'id': data['id'],
+        'data-version': data.get('version'),
+        'objects': spans,
+        'object-types': {obj['id']: obj['object-type'] for obj in objects},
+        'relations': build_relations(objects),
+        'anchors': dict(anchor_ids or {}),
+    }
+
+    with open(output_filepath, 'wb') as f:
+        f.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+        f.writelines(records)
+
+class AtlasIndex:
+    """Reader of an ATLAS.index file, which is mapped into memory until closed.
+
+    Data objects are decoded when looked up. Relation lookups return lists of IDs,
+    which are empty for unknown IDs.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = Path(filepath)
+        with open(self.filepath, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_end = self.mmap.find(b'\n')
+        self.header = json.loads(self.mmap[:header_end])
+        if self.header.get('version') != INDEX_VERSION:
+            self.close()
+            raise ValueError(f'Unsupported ATLAS index version {self.header.get("version")} in {self.filepath}, expected {INDEX_VERSION}')
+        # Object offsets are relative to the end of the header line
+        self.records_start = header_end + 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.mmap.close()
+
+    def __contains__(self, atlas_id):
+        return atlas_id in self.header['objects']
+
+    def __len__(self):
+        return len(self.header['objects'])
+
+    def ids(self, object_type=None):
+        """Returns the IDs of indexed data objects, optionally only those of the object type, ex. technique."""
+        object_types = self.header['object-types']
+        return [i for i in self.header['objects'] if object_type is None or object_types[i] == object_type]
+
+    def get_object(self, atlas_id):
+        """Returns the data object with the ATLAS ID, raising a KeyError if not indexed."""
+        offset, length = self.header['objects'][atlas_id]
+        start = self.records_start + offset
+        return json.loads(self.mmap[start:start + length], object_hook=decode_dates)
+
+    def get_object_type(self, atlas_id):
+        """Returns the object type of the data object with the ATLAS ID, or None if not indexed."""
+        return self.header['object-types'].get(atlas_id)
+
+    def get_related(self, relation, atlas_id):
+        """Returns the IDs related to the ATLAS ID by the named relation, one of RELATIONS."""
+        return list(self.header['relations'][relation].get(atlas_id, []))
+
+    def get_tactics(self, technique_id):
+        """Returns the IDs of tactics the technique is listed under."""
+        return self.get_related('technique-tactics', technique_id)
+
+    def get_techniques(self, tactic_id):
+        """Returns the IDs of techniques listed under the tactic."""
+        return self.get_related('tactic-techniques', tactic_id)
+
+    def get_subtechniques(self, technique_id):
+        """Returns the IDs of subtechniques of the technique."""
+        return self.get_related('technique-subtechniques', technique_id)
+
+    def get_mitigated_techniques(self, mitigation_id):
+        """Returns the IDs of techniques mitigated by the mitigation."""
+        return self.get_related('mitigation-techniques', mitigation_id)
+
+    def get_case_studies(self, technique_id):
+        """Returns the IDs of case studies with a procedure step using the technique."""
+        return self.get_related('technique-case-studies', technique_id)
+
+    def get_anchor_id(self, anchor):
+        """Returns the ATLAS ID of the object with the YAML anchor name in the source data, or None if unknown."""
+        return self.header['anchors'].get(anchor)
@@ -0,0 +1,311 @@
+from array import array
+from argparse import ArgumentParser
+import heapq
+
+from tools.atlas_formats import load_atlas_dist, load_atlas_file
+from tools.atlas_index import get_technique_id, iter_data_objects
+
+"""
+Incidence matrices between ATLAS data objects, for batched analysis.
+
+Each matrix is a SparseMatrix in compressed sparse row (CSR) form, with stable maps
+between ATLAS IDs and row and column indices in data order. Counting and coverage
+questions become whole-matrix operations, ex. techniques per tactic are the column sums
+of the technique × tactic matrix, and the case study uses covered by each mitigation are
+the technique × mitigation matrix transposed, applied to the technique use counts.
+
+Matrices convert to SciPy sparse matrices or NumPy arrays when those packages are installed.
+
+Run this script with `python -m tools.atlas_matrices` to allow for local imports.
+"""
+
+# Incidence matrix name to a description of its rows and columns
+INCIDENCE_MATRICES = {
+    'technique-tactic': 'Techniques and subtechniques × the tactics they are listed under',
+    'technique-case-study': 'Techniques and subtechniques × the case studies with a procedure step using them',
+    'technique-mitigation': 'Techniques and subtechniques × the mitigations of them',
+    'subtechnique-parent': 'Subtechniques × techniques, marking the parent of each subtechnique',
+}
+
+def import_optional(name):
+    """Returns the named optional module, raising an ImportError describing how to install it if not installed."""
+    try:
+        return __import__(name)
+    except ImportError as e:
+        raise ImportError(f'Converting incidence matrices requires the {name} package, install it with `pip install {name}`') from e
+
+class SparseMatrix:
+    """Integer matrix in compressed sparse row form, with rows and columns labeled by ID.
+
+    The column indices and values of row i are indices[indptr[i]:indptr[i + 1]]
+    and values[indptr[i]:indptr[i + 1]], with column indices in increasing order.
+    """
+
+    def __init__(self, row_ids, column_ids, indptr, indices, values):
+        self.row_ids = tuple(row_ids)
+        self.column_ids = tuple(column_ids)
+        self.row_index = {row_id: i for i, row_id in enumerate(self.row_ids)}
+        self.column_index = {column_id: j for j, column_id in enumerate(self.column_ids)}
+        self.indptr = array('l', indptr)
+        self.indices = array('l', indices)
+        self.values = array('l', values)
+        self._transpose = None
+
+    @classmethod
+    def from_pairs(cls, row_ids, column_ids, pairs):
+        """Returns a 0/1 incidence matrix marking each (row ID, column ID) pair.
+
+        Repeated pairs are marked once, and pairs with an unknown ID are skipped.
+        """
+        matrix = cls.from_counts(row_ids, column_ids, pairs)
+        matrix.values = array('l', [1] * matrix.nnz)
+        return matrix
+
+    @classmethod
+    def from_counts(cls, row_ids, column_ids, pairs):
+        """Returns a matrix of the number of times each (row ID, column ID) pair occurs.
+
+        Pairs with an unknown ID are skipped.
+        """
+        row_ids = list(row_ids)
+        column_index = {column_id: j for j, column_id in enumerate(column_ids)}
+        rows = {row_id: {} for row_id in row_ids}
+        for row_id, column_id in pairs:
+            if row_id in rows and column_id in column_index:
+                row = rows[row_id]
+                j = column_index[column_id]
+                row[j] = row.get(j, 0) + 1
+
+        indptr = [0]
+        indices = []
+        values = []
+        for row_id in row_ids:
+            for j in sorted(rows[row_id]):
+                indices.append(j)
+                values.append(rows[row_id][j])
+            indptr.append(len(indices))
+        return cls(row_ids, column_ids, indptr, indices, values)
+
+    @classmethod
+    def from_dict(cls, obj):
+        """Returns the matrix from its to_dict form."""
+        return cls(obj['rows'], obj['columns'], obj['indptr'], obj['indices'], obj['values'])
+
+    def to_dict(self):
+        """Returns the matrix as a JSON-serializable dictionary of its IDs and CSR arrays."""
+        return {
+            'rows': list(self.row_ids),
+            'columns': list(self.column_ids),
+            'indptr': self.indptr.tolist(),
+            'indices': self.indices.tolist(),
+            'values': self.values.tolist(),
+        }
+
+    def top_k(self, row_id, k, exclude=()):
+        """Returns the k (column ID, value) pairs with the highest values in the row, in column order among ties,
+        skipping the excluded column IDs. Empty for unknown IDs.
+        """
+        i = self.row_index.get(row_id)
+        if i is None:
+            return []
+        start, end = self.indptr[i], self.indptr[i + 1]
+        entries = [
+            (j, value) for j, value in zip(self.indices[start:end], self.values[start:end])
+            if self.column_ids[j] not in exclude
+        ]
+        return [(self.column_ids[j], value) for j, value in heapq.nsmallest(k, entries, key=lambda entry: (-entry[1], entry[0]))]
+
+    @property
+    def shape(self):
+        return len(self.row_ids), len(self.column_ids)
+
+    @property
+    def nnz(self):
+        """Number of stored nonzero entries."""
+        return len(self.indices)
+
+    def __getitem__(self, key):
+        """Returns the value at the (row ID, column ID), 0 if unset."""
+        row_id, column_id = key
+        i = self.row_index[row_id]
+        j = self.column_index[column_id]
+        for k in range(self.indptr[i], self.indptr[i + 1]):
+            if self.indices[k] == j:
+                return self.values[k]
+        return 0
+
+    def row(self, row_id):
+        """Returns the column IDs with nonzero values in the row, in column order, empty for unknown IDs."""
+        i = self.row_index.get(row_id)
+        if i is None:
+            return ()
+        return tuple(self.column_ids[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]])
+
+    def column(self, column_id):
+        """Returns the row IDs with nonzero values in the column, in row order, empty for unknown IDs."""
+        return self.transpose().row(column_id)
+
+    def row_sum(self, row_id):
+        """Returns the sum of the row, 0 for unknown IDs."""
+        i = self.row_index.get(row_id)
+        return 0 if i is None else sum(self.values[self.indptr[i]:self.indptr[i + 1]])
+
+    def row_sums(self):
+        """Returns the sum of each row, in row order."""
+        return [sum(self.values[self.indptr[i]:self.indptr[i + 1]]) for i in range(len(self.row_ids))]
+
+    def column_sums(self):
+        """Returns the sum of each column, in column order."""
+        sums = [0] * len(self.column_ids)
+        for j, value in zip(self.indices, self.values):
+            sums[j] += value
+        return sums
+
+    def transpose(self):
+        """Returns the transposed matrix, which is computed once."""
+        if self._transpose is None:
+            # Count entries per column to find where each transposed row starts
+            indptr = [0] * (len(self.column_ids) + 1)
+            for j in self.indices:
+                indptr[j + 1] += 1
+            for j in range(len(self.column_ids)):
+                indptr[j + 1] += indptr[j]
+
+            # Rows are visited in order, so transposed rows are filled in increasing column order
+            next_position = indptr[:-1]
+            indices = [0] * self.nnz
+            values = [0] * self.nnz
+            for i in range(len(self.row_ids)):
+                for k in range(self.indptr[i], self.indptr[i + 1]):
+                    position = next_position[self.indices[k]]
+                    indices[position] = i
+                    values[position] = self.values[k]
+                    next_position[self.indices[k]] += 1
+
+            self._transpose = SparseMatrix(self.column_ids, self.row_ids, indptr, indices, values)
+            self._transpose._transpose = self
+        return self._transpose
+
+    def dot(self, vector):
+        """Returns the product of the matrix and the vector, a sequence of numbers in column order."""
+        if len(vector) != len(self.column_ids):
+            raise ValueError(f'Vector of length {len(vector)} does not match {len(self.column_ids)} columns')
+        return [
+            sum(value * vector[j] for j, value in zip(self.indices[start:end], self.values[start:end]))
+            for start, end in zip(self.indptr, self.indptr[1:])
+        ]
+
+    def matmul(self, other):
+        """Returns the matrix product with another matrix, whose row IDs must match these column IDs."""
+        if self.column_ids != other.row_ids:
+            raise ValueError('Matrix columns do not match the row IDs of the other matrix')
+
+        indptr = [0]
+        indices = []
+        values = []
+        for i in range(len(self.row_ids)):
+            # Accumulate the rows of the other matrix selected by this row
+            row = {}
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                value = self.values[k]
+                j = self.indices[k]
+                for other_k in range(other.indptr[j], other.indptr[j + 1]):
+                    column = other.indices[other_k]
+                    row[column] = row.get(column, 0) + value * other.values[other_k]
+            for column in sorted(row):
+                if row[column]:
+                    indices.append(column)
+                    values.append(row[column])
+            indptr.append(len(indices))
+        return SparseMatrix(self.row_ids, other.column_ids, indptr, indices, values)
+
+    def to_dense(self):
+        """Returns the matrix as a list of rows of values."""
+        rows = [[0] * len(self.column_ids) for _ in self.row_ids]
+        for i, row in enumerate(rows):
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                row[self.indices[k]] = self.values[k]
+        return rows
+
+    def to_scipy(self):
+        """Returns the matrix as a scipy.sparse.csr_matrix, requires SciPy."""
+        import_optional('scipy')
+        from scipy.sparse import csr_matrix
+        return csr_matrix((self.values, self.indices, self.indptr), shape=self.shape)
+
+    def to_numpy(self):
+        """Returns the matrix as a dense NumPy array, requires NumPy."""
+        return import_optional('numpy').array(self.to_dense())
+
+def build_incidence_matrices(data):
+    """Returns a dictionary of name to SparseMatrix for each of INCIDENCE_MATRICES in ATLAS data.
+
+    Rows and columns are in data order. Data objects listed in multiple matrices appear once.
+    Subtechniques have no tactics listed, their parents' tactics are given by
+    matrices['subtechnique-parent'].matmul(matrices['technique-tactic']).
+    """
+    objects = {}
+    for obj in iter_data_objects(data):
+        objects.setdefault(obj['id'], obj)
+    ids = lambda object_type: [obj['id'] for obj in objects.values() if obj['object-type'] == object_type]
+
+    techniques = [obj for obj in objects.values() if obj['object-type'] == 'technique']
+    technique_ids = ids('technique')
+    case_studies = [obj for obj in objects.values() if obj['object-type'] == 'case-study']
+    mitigations = [obj for obj in objects.values() if obj['object-type'] == 'mitigation']
+
+    return {
+        'technique-tactic': SparseMatrix.from_pairs(technique_ids, ids('tactic'), (
+            (technique['id'], tactic_id) for technique in techniques for tactic_id in technique.get('tactics', [])
+        )),
+        'technique-case-study': SparseMatrix.from_pairs(technique_ids, ids('case-study'), (
+            (step['technique'], case_study['id']) for case_study in case_studies for step in case_study.get('procedure', [])
+        )),
+        'technique-mitigation': SparseMatrix.from_pairs(technique_ids, ids('mitigation'), (
+            (get_technique_id(technique), mitigation['id']) for mitigation in mitigations for technique in mitigation.get('techniques', [])
+        )),
+        'subtechnique-parent': SparseMatrix.from_pairs(
+            [technique['id'] for technique in techniques if 'subtechnique-of' in technique],
+            technique_ids,
+            ((technique['id'], technique['subtechnique-of']) for technique in techniques if 'subtechnique-of' in technique)
+        ),
+    }
+
+def mitigation_coverage(matrices):
+    """Returns a dictionary of mitigation ID to the number of case studies using a technique it mitigates,
+    counted per technique, most covered first.
+    """
+    technique_uses = matrices['technique-case-study'].row_sums()
+    technique_mitigation = matrices['technique-mitigation']
+    coverage = technique_mitigation.transpose().dot(technique_uses)
+    ranked = sorted(range(len(coverage)), key=lambda j: -coverage[j])
+    return {technique_mitigation.column_ids[j]: coverage[j] for j in ranked}
+
+def main():
+    parser = ArgumentParser(description='Reports coverage statistics of built ATLAS data from incidence matrices.')
+    parser.add_argument("--data", "-d", type=str, default=None, help="Path to a built data file, ex. dist/ATLAS.json, defaults to the fastest-loading file in dist/")
+    parser.add_argument("--limit", "-n", type=int, default=10, help="Number of top techniques and mitigations to list")
+    args = parser.parse_args()
+
+    data = load_atlas_file(args.data) if args.data is not None else load_atlas_dist()
+    matrices = build_incidence_matrices(data)
+    for name, matrix in matrices.items():
+        print(f'{name:<24} {matrix.shape[0]:>4} × {matrix.shape[1]:<4} {matrix.nnz:>5} entries')
+
+    technique_tactic = matrices['technique-tactic']
+    print('\nTechniques per tactic')
+    for tactic_id, count in zip(technique_tactic.column_ids, technique_tactic.column_sums()):
+        print(f'  {tactic_id:<16} {count:>4}')
+
+    technique_case_study = matrices['technique-case-study']
+    uses = technique_case_study.row_sums()
+    print('\nMost used techniques, by case studies')
+    for i in sorted(range(len(uses)), key=lambda i: -uses[i])[:args.limit]:
+        print(f'  {technique_case_study.row_ids[i]:<16} {uses[i]:>4}')
+
+    print('\nMitigations covering the most technique uses')
+    for mitigation_id, coverage in list(mitigation_coverage(matrices).items())[:args.limit]:
+        print(f'  {mitigation_id:<16} {coverage:>4}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+from argparse import ArgumentParser
+from functools import partial
+import gzip
+from hashlib import sha256
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import io
+import json
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlsplit
+
+from tools.atlas_formats import encode_value, load_atlas_dist, load_atlas_file
+from tools.atlas_index import iter_data_objects
+from tools.atlas_store import AtlasStore
+
+"""
+Serves read-only JSON queries of built ATLAS data over HTTP.
+
+Responses are serialized and compressed once at startup, and have strong ETags
+derived from the data version and the response body, for conditional requests.
+
+Endpoints:
+    /tactics                             All tactics, in matrix order
+    /techniques/<id>                     A technique or subtechnique
+    /case-studies[?technique=<id>]       All case studies, or those using the technique
+    /mitigations[?technique=<id>]        All mitigations, or those of the technique
+
+Run this script with `python -m tools.atlas_server` to allow for local imports.
+"""
+
+class Response:
+    """Serialized JSON response body, with its gzip-compressed form and their ETags."""
+
+    def __init__(self, obj, data_version, status=HTTPStatus.OK):
+        self.status = status
+        self.body = json.dumps(obj, default=encode_value, ensure_ascii=False).encode('utf-8')
+        # Omit the file name and modification time from the gzip header so the compressed body is deterministic
+        gzip_buffer = io.BytesIO()
+        with gzip.GzipFile(filename='', mode='wb', fileobj=gzip_buffer, mtime=0) as gzip_file:
+            gzip_file.write(self.body)
+        self.gzip_body = gzip_buffer.getvalue()
+
+        digest = sha256(self.body).hexdigest()[:32]
+        # Each encoding is a different representation, so has its own strong ETag
+        self.etag = f'"{data_version}-{digest}"'
+        self.gzip_etag = f'"{data_version}-{digest}-gzip"'
+
+def create_responses(data):
+    """Returns a dictionary of (path, query parameter value) to the Response for each supported request."""
+    store = AtlasStore(data)
+    data_version = data.get('version', '')
+    # Responses are the data objects as in the built data, looked up by ID
+    objects = {obj['id']: obj for obj in iter_data_objects(data)}
+    to_dicts = lambda store_objects: [objects[obj.id] for obj in store_objects]
+
+    responses = {
+        ('/tactics', None): Response(to_dicts(store.tactics.values()), data_version),
+        ('/case-studies', None): Response(to_dicts(store.case_studies.values()), data_version),
+        ('/mitigations', None): Response(to_dicts(store.mitigations.values()), data_version),
+    }
+    for technique_id in list(store.techniques) + list(store.subtechniques):
+        responses[(f'/techniques/{technique_id}', None)] = Response(objects[technique_id], data_version)
+        responses[('/case-studies', technique_id)] = Response(to_dicts(store.case_studies_using(technique_id)), data_version)
+        responses[('/mitigations', technique_id)] = Response(to_dicts(store.mitigations_for_technique(technique_id)), data_version)
+
+    return responses
+
+def accepts_gzip(accept_encoding):
+    """Returns True if the Accept-Encoding header value allows a gzip response."""
+    for coding in (accept_encoding or '').split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', '*'):
+            # Codings are acceptable unless given a quality value of 0, ex. gzip;q=0
+            key, _, value = params.strip().lower().partition('=')
+            try:
+                return key != 'q' or float(value) > 0
+            except ValueError:
+                return False
+    return False
+
+def matches_etag(if_none_match, etag):
+    """Returns True if the If-None-Match header value matches the ETag."""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    # Weak comparison applies to If-None-Match
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+class AtlasRequestHandler(BaseHTTPRequestHandler):
+    """Handles GET and HEAD requests with precomputed responses."""
+
+    server_version = 'AtlasServer'
+
+    def __init__(self, *args, responses, **kwargs):
+        # Set before handling, which happens in the base class constructor
+        self.responses = responses
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.send_precomputed(include_body=True)
+
+    def do_HEAD(self):
+        self.send_precomputed(include_body=False)
+
+    def find_response(self):
+        """Returns the Response for the request path and query, or an error Response."""
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        path = url.path.rstrip('/') or '/'
+
+        unknown_params = query.keys() - {'technique'}
+        if unknown_params:
+            return Response({'error': f'Unknown query parameters: {", ".join(sorted(unknown_params))}'}, '', HTTPStatus.BAD_REQUEST)
+
+        technique_id = query['technique'][-1] if 'technique' in query else None
+        if technique_id is not None and path not in ('/case-studies', '/mitigations'):
+            return Response({'error': f'{path} does not support the technique parameter'}, '', HTTPStatus.BAD_REQUEST)
+
+        response = self.responses.get((path, technique_id))
+        if response is None:
+            message = f'Unknown technique {technique_id}' if technique_id is not None else f'Not found: {path}'
+            return Response({'error': message}, '', HTTPStatus.NOT_FOUND)
+        return response
+
+    def send_precomputed(self, include_body):
+        response = self.find_response()
+        use_gzip = accepts_gzip(self.headers.get('Accept-Encoding'))
+        etag = response.gzip_etag if use_gzip else response.etag
+        body = response.gzip_body if use_gzip else response.body
+
+        if response.status == HTTPStatus.OK and matches_etag(self.headers.get('If-None-Match'), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+
+        self.send_response(response.status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        if response.status == HTTPStatus.OK:
+            self.send_header('ETag', etag)
+        self.end_headers()
+
+        if include_body:
+            self.wfile.write(body)
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """HTTP server handling each request in a thread, as http.server.ThreadingHTTPServer in Python 3.7+."""
+    daemon_threads = True
+
+def create_server(data, host='127.0.0.1', port=8000):
+    """Returns an HTTP server of the ATLAS data, where port 0 uses any free port."""
+    handler = partial(AtlasRequestHandler, responses=create_responses(data))
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    parser = ArgumentParser(description='Serves read-only JSON queries of built ATLAS data over HTTP.')
+    parser.add_argument("--data", "-d", type=str, default=None, help="Path to a built data file, ex. dist/ATLAS.json, defaults to the fastest-loading file in dist/")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", "-p", type=int, default=8000, help="Port to listen on")
+    args = parser.parse_args()
+
+    data = load_atlas_file(args.data) if args.data is not None else load_atlas_dist()
+    server = create_server(data, args.host, args.port)
+    print(f'Serving ATLAS {data.get("version")} on http://{args.host}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
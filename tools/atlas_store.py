@@ -0,0 +1,267 @@
+import sys
+from typing import NamedTuple
+
+from tools.atlas_formats import load_atlas_dist, load_atlas_file
+from tools.atlas_index import build_relations, iter_data_objects
+
+"""
+Provides AtlasStore, an in-memory query API over built ATLAS data.
+
+Data objects are held as named tuples rather than dictionaries, with ATLAS IDs
+interned, and the relations between objects are indexed when the store is created.
+"""
+
+class AttackReference(NamedTuple):
+    """Reference to the corresponding MITRE ATT&CK object."""
+    id: str
+    url: str
+
+class Reference(NamedTuple):
+    """Source referenced by a case study."""
+    title: str
+    url: str
+
+class Tactic(NamedTuple):
+    id: str
+    name: str
+    description: str
+    created_date: object = None
+    modified_date: object = None
+    attack_reference: AttackReference = None
+
+class Technique(NamedTuple):
+    id: str
+    name: str
+    description: str
+    # Tactic IDs
+    tactics: tuple
+    created_date: object = None
+    modified_date: object = None
+    attack_reference: AttackReference = None
+
+class Subtechnique(NamedTuple):
+    id: str
+    name: str
+    description: str
+    # Parent technique ID
+    subtechnique_of: str
+    created_date: object = None
+    modified_date: object = None
+    attack_reference: AttackReference = None
+
+class TechniqueUse(NamedTuple):
+    """Use of a mitigation against a technique, None if not described."""
+    technique: str
+    use: str = None
+
+class Mitigation(NamedTuple):
+    id: str
+    name: str
+    description: str
+    techniques: tuple = ()
+    ml_lifecycle: tuple = ()
+    category: tuple = ()
+    created_date: object = None
+    modified_date: object = None
+    attack_reference: AttackReference = None
+
+class ProcedureStep(NamedTuple):
+    tactic: str
+    technique: str
+    description: str
+
+class CaseStudy(NamedTuple):
+    id: str
+    name: str
+    summary: str
+    incident_date: object
+    incident_date_granularity: str
+    procedure: tuple
+    target: str = None
+    actor: str = None
+    case_study_type: str = None
+    references: tuple = ()
+    reporter: str = None
+
+# Data object class to the name of its AtlasStore dictionary
+COLLECTIONS = {
+    Tactic: 'tactics',
+    Technique: 'techniques',
+    Subtechnique: 'subtechniques',
+    Mitigation: 'mitigations',
+    CaseStudy: 'case_studies',
+}
+
+def intern_id(atlas_id):
+    """Returns the interned ATLAS ID, so that IDs repeated across objects share one string."""
+    return sys.intern(atlas_id)
+
+def create_attack_reference(obj):
+    """Returns the AttackReference of the data object, or None if it has none."""
+    reference = obj.get('ATT&CK-reference')
+    return AttackReference(reference['id'], reference['url']) if reference else None
+
+def create_technique_use(technique):
+    """Returns the TechniqueUse of a technique listed by a mitigation, either an ID string or a dictionary with its ID and use."""
+    if isinstance(technique, str):
+        return TechniqueUse(intern_id(technique))
+    return TechniqueUse(intern_id(technique['id']), technique.get('use'))
+
+def create_object(obj):
+    """Returns the named tuple for an ATLAS data object dictionary.
+
+    Fields that are optional in the schemas default to None, or empty tuples for lists.
+    """
+    object_type = obj['object-type']
+    atlas_id = intern_id(obj['id'])
+    dates = {'created_date': obj.get('created_date'), 'modified_date': obj.get('modified_date')}
+
+    if object_type == 'tactic':
+        return Tactic(atlas_id, obj['name'], obj['description'], attack_reference=create_attack_reference(obj), **dates)
+    elif object_type == 'technique' and 'subtechnique-of' in obj:
+        return Subtechnique(atlas_id, obj['name'], obj['description'], intern_id(obj['subtechnique-of']),
+            attack_reference=create_attack_reference(obj), **dates)
+    elif object_type == 'technique':
+        return Technique(atlas_id, obj['name'], obj['description'], tuple(intern_id(i) for i in obj.get('tactics', [])),
+            attack_reference=create_attack_reference(obj), **dates)
+    elif object_type == 'mitigation':
+        return Mitigation(atlas_id, obj['name'], obj['description'],
+            tuple(create_technique_use(t) for t in obj.get('techniques', [])),
+            tuple(obj.get('ml-lifecycle', [])), tuple(obj.get('category', [])),
+            attack_reference=create_attack_reference(obj), **dates)
+    elif object_type == 'case-study':
+        return CaseStudy(atlas_id, obj['name'], obj['summary'], obj['incident-date'], obj['incident-date-granularity'],
+            tuple(ProcedureStep(intern_id(s['tactic']), intern_id(s['technique']), s['description']) for s in obj['procedure']),
+            target=obj.get('target'), actor=obj.get('actor'), case_study_type=obj.get('case-study-type'),
+            references=tuple(Reference(r['title'], r['url']) for r in obj.get('references') or []),
+            reporter=obj.get('reporter'))
+
+    raise ValueError(f'Unknown object-type {object_type} of {atlas_id}')
+
+class AtlasStore:
+    """Queryable ATLAS data objects by ID, with indexed relations.
+
+    Query methods return tuples of data objects in the order they appear in the data,
+    which are empty for unknown IDs.
+    """
+
+    def __init__(self, data):
+        """Creates the store from a built ATLAS data dictionary, which is not kept."""
+        self.id = data['id']
+        self.version = data.get('version')
+
+        # ID to data object, of all types and by object type
+        self.objects = {}
+        self.tactics = {}
+        self.techniques = {}
+        self.subtechniques = {}
+        self.mitigations = {}
+        self.case_studies = {}
+
+        objects = []
+        for obj in iter_data_objects(data):
+            # Objects listed in multiple matrices are stored once
+            if obj['id'] not in self.objects:
+                objects.append(obj)
+                self.add(create_object(obj))
+
+        # Relations of IDs to tuples of data objects
+        relations = build_relations(objects)
+        self._techniques_by_tactic = self._resolve(relations['tactic-techniques'])
+        self._subtechniques_by_technique = self._resolve(relations['technique-subtechniques'])
+        self._techniques_by_mitigation = self._resolve(relations['mitigation-techniques'])
+        self._case_studies_by_technique = self._resolve(relations['technique-case-studies'])
+        self._mitigations_by_technique = self._resolve(self._invert(relations['mitigation-techniques']))
+        self._case_studies_by_tactic = self._resolve(self._invert({
+            cs.id: [step.tactic for step in cs.procedure] for cs in self.case_studies.values()
+        }))
+
+    @classmethod
+    def load(cls, filepath=None, dist_dir='dist'):
+        """Returns a store of the ATLAS data in the file, ex. dist/ATLAS.json,
+        defaulting to the fastest-loading file in the directory.
+        """
+        return cls(load_atlas_file(filepath) if filepath is not None else load_atlas_dist(dist_dir))
+
+    def add(self, obj):
+        """Adds the data object to the store."""
+        self.objects[obj.id] = obj
+        getattr(self, COLLECTIONS[type(obj)])[obj.id] = obj
+
+    def _resolve(self, relation):
+        """Returns the relation of ID to list of IDs as ID to tuple of data objects, skipping unknown IDs."""
+        return {
+            intern_id(from_id): tuple(obj for obj in map(self.get, to_ids) if obj is not None)
+            for from_id, to_ids in relation.items()
+        }
+
+    @staticmethod
+    def _invert(relation):
+        """Returns the relation of ID to list of IDs with its direction reversed, keeping the order and removing duplicates."""
+        inverse = {}
+        for from_id, to_ids in relation.items():
+            for to_id in to_ids:
+                related_ids = inverse.setdefault(to_id, [])
+                if from_id not in related_ids:
+                    related_ids.append(from_id)
+        return inverse
+
+    def get(self, atlas_id):
+        """Returns the data object with the ATLAS ID, or None if not found."""
+        return self.objects.get(atlas_id)
+
+    def __contains__(self, atlas_id):
+        return atlas_id in self.objects
+
+    def __len__(self):
+        return len(self.objects)
+
+    def techniques_for_tactic(self, tactic_id, include_subtechniques=False):
+        """Returns the techniques listed under the tactic, optionally followed by each technique's subtechniques."""
+        techniques = self._techniques_by_tactic.get(tactic_id, ())
+        if not include_subtechniques:
+            return techniques
+        return tuple(obj for t in techniques for obj in (t,) + self.subtechniques_of(t.id))
+
+    def tactics_for_technique(self, technique_id):
+        """Returns the tactics of the technique, or of the parent technique for a subtechnique."""
+        technique = self.techniques.get(technique_id)
+        if technique is None:
+            subtechnique = self.subtechniques.get(technique_id)
+            technique = self.techniques.get(subtechnique.subtechnique_of) if subtechnique is not None else None
+        if technique is None:
+            return ()
+        return tuple(self.tactics[i] for i in technique.tactics if i in self.tactics)
+
+    def subtechniques_of(self, technique_id):
+        """Returns the subtechniques of the technique."""
+        return self._subtechniques_by_technique.get(technique_id, ())
+
+    def parent_of(self, subtechnique_id):
+        """Returns the parent technique of the subtechnique, or None if not a known subtechnique."""
+        subtechnique = self.subtechniques.get(subtechnique_id)
+        return self.techniques.get(subtechnique.subtechnique_of) if subtechnique is not None else None
+
+    def mitigations_for_technique(self, technique_id):
+        """Returns the mitigations of the technique or subtechnique."""
+        return self._mitigations_by_technique.get(technique_id, ())
+
+    def techniques_for_mitigation(self, mitigation_id):
+        """Returns the techniques and subtechniques mitigated by the mitigation."""
+        return self._techniques_by_mitigation.get(mitigation_id, ())
+
+    def case_studies_using(self, atlas_id, include_subtechniques=False):
+        """Returns the case studies with a procedure step using the tactic or technique,
+        optionally also counting steps using subtechniques of the technique.
+        """
+        if atlas_id in self.tactics:
+            return self._case_studies_by_tactic.get(atlas_id, ())
+
+        case_studies = self._case_studies_by_technique.get(atlas_id, ())
+        if include_subtechniques:
+            for subtechnique in self.subtechniques_of(atlas_id):
+                case_studies += self._case_studies_by_technique.get(subtechnique.id, ())
+            # Keep the order of the data, without duplicates
+            ids = {cs.id for cs in case_studies}
+            case_studies = tuple(cs for cs in self.case_studies.values() if cs.id in ids)
+        return case_studies
@@ -0,0 +1,151 @@
+from argparse import ArgumentParser
+from collections import namedtuple
+import json
+from pathlib import Path
+
+from tools.atlas_index import iter_data_objects
+from tools.atlas_matrices import SparseMatrix
+
+"""
+Technique co-occurrence and procedure step transition statistics of ATLAS case studies.
+
+Case study procedures are ordered steps of a tactic and technique. Each pair of
+consecutive steps is a transition, counted in tactic → tactic and technique → technique
+matrices, and techniques used in the same case study are counted in a co-occurrence matrix.
+All are computed in one pass over the procedures and stored as ATLAS.transitions,
+a JSON file of the matrices in the SparseMatrix to_dict form.
+
+Run this script with `python -m tools.atlas_transitions <technique ID>` to allow for local imports.
+"""
+
+# Increment when the file format changes
+TRANSITIONS_VERSION = 1
+
+# Statistics matrix name to a description of its values
+STATISTICS = {
+    'technique-cooccurrence': 'Number of case studies using both techniques, or using the technique on the diagonal',
+    'tactic-transition': 'Number of procedure steps of the row tactic followed by a step of the column tactic',
+    'technique-transition': 'Number of procedure steps of the row technique followed by a step of the column technique',
+}
+
+NextStep = namedtuple('NextStep', ['id', 'count', 'probability'])
+
+def build_procedure_statistics(data):
+    """Returns a dictionary of name to SparseMatrix for each of STATISTICS in ATLAS data.
+
+    Rows and columns are the tactics or techniques, including subtechniques, in data order.
+    """
+    # Object type to IDs, as dictionary keys to keep data order once per ID
+    ids = {'tactic': {}, 'technique': {}}
+    procedures = []
+    for obj in iter_data_objects(data):
+        if obj['object-type'] in ids:
+            ids[obj['object-type']][obj['id']] = None
+        elif obj['object-type'] == 'case-study':
+            procedures.append((obj['id'], obj.get('procedure', [])))
+
+    case_study_pairs = []
+    tactic_pairs = []
+    technique_pairs = []
+    for case_study_id, procedure in procedures:
+        case_study_pairs.extend((step['technique'], case_study_id) for step in procedure)
+        for step, next_step in zip(procedure, procedure[1:]):
+            tactic_pairs.append((step['tactic'], next_step['tactic']))
+            technique_pairs.append((step['technique'], next_step['technique']))
+
+    # Techniques co-occur as often as their rows in the technique × case study matrix share columns
+    technique_case_study = SparseMatrix.from_pairs(ids['technique'], [case_study_id for case_study_id, _ in procedures], case_study_pairs)
+    return {
+        'technique-cooccurrence': technique_case_study.matmul(technique_case_study.transpose()),
+        'tactic-transition': SparseMatrix.from_counts(ids['tactic'], ids['tactic'], tactic_pairs),
+        'technique-transition': SparseMatrix.from_counts(ids['technique'], ids['technique'], technique_pairs),
+    }
+
+def write_procedure_statistics(data, output_filepath):
+    """Writes the procedure statistics of ATLAS data to the filepath."""
+    with open(output_filepath, 'w') as f:
+        json.dump({
+            'version': TRANSITIONS_VERSION,
+            'matrices': {name: matrix.to_dict() for name, matrix in build_procedure_statistics(data).items()},
+        }, f, separators=(',', ':'))
+
+class ProcedureStatistics:
+    """Queries of technique co-occurrence and procedure step transitions.
+
+    Queries return the top k results, with ties in data order, and are empty for unknown IDs.
+    """
+
+    def __init__(self, matrices):
+        self.matrices = matrices
+        self.cooccurrence = matrices['technique-cooccurrence']
+        self.tactic_transition = matrices['tactic-transition']
+        self.technique_transition = matrices['technique-transition']
+
+    @classmethod
+    def load(cls, filepath):
+        """Returns the procedure statistics stored at the filepath."""
+        with open(filepath) as f:
+            stats = json.load(f)
+        if stats.get('version') != TRANSITIONS_VERSION:
+            raise ValueError(f'Unsupported transitions version {stats.get("version")} in {filepath}, expected {TRANSITIONS_VERSION}')
+        return cls({name: SparseMatrix.from_dict(matrix) for name, matrix in stats['matrices'].items()})
+
+    @classmethod
+    def from_data(cls, data):
+        """Returns the procedure statistics of the ATLAS data."""
+        return cls(build_procedure_statistics(data))
+
+    @staticmethod
+    def _next_steps(transition, atlas_id, k):
+        """Returns NextSteps from the transition matrix row, excluding staying on the same ID."""
+        total = transition.row_sum(atlas_id)
+        return [NextStep(next_id, count, count / total) for next_id, count in transition.top_k(atlas_id, k, exclude={atlas_id})]
+
+    def next_techniques(self, technique_id, k=5):
+        """Returns the k techniques most often used in the step after the technique, as NextSteps.
+
+        The probability is the fraction of steps after the technique that use the next technique.
+        Consecutive steps using the same technique are counted, but not returned.
+        """
+        return self._next_steps(self.technique_transition, technique_id, k)
+
+    def next_tactics(self, tactic_id, k=5):
+        """Returns the k other tactics most often in the step after the tactic, as NextSteps."""
+        return self._next_steps(self.tactic_transition, tactic_id, k)
+
+    def cooccurring_techniques(self, technique_id, k=5):
+        """Returns the k other techniques used in the most case studies with the technique,
+        as (technique ID, number of case studies) pairs.
+        """
+        return self.cooccurrence.top_k(technique_id, k, exclude={technique_id})
+
+def main():
+    parser = ArgumentParser(description='Lists the likely next steps after a technique or tactic in case study procedures.')
+    parser.add_argument("id", type=str, help="Technique or tactic ID, ex. AML.T0000 or AML.TA0002")
+    parser.add_argument("--transitions", type=str, default="dist/ATLAS.transitions", help="Path to the statistics file, as output by tools/create_matrix.py --transitions")
+    parser.add_argument("--limit", "-n", type=int, default=5, help="Maximum number of results")
+    args = parser.parse_args()
+
+    if not Path(args.transitions).is_file():
+        parser.error(f'Statistics file {args.transitions} not found, create it with `python tools/create_matrix.py --transitions`')
+    stats = ProcedureStatistics.load(args.transitions)
+
+    if args.id in stats.tactic_transition.row_index:
+        print(f'Tactics after {args.id}')
+        next_steps = stats.next_tactics(args.id, args.limit)
+    elif args.id in stats.technique_transition.row_index:
+        print(f'Techniques after {args.id}')
+        next_steps = stats.next_techniques(args.id, args.limit)
+    else:
+        parser.error(f'Unknown tactic or technique {args.id}')
+
+    for step in next_steps:
+        print(f'  {step.id:<16} {step.count:>4} {step.probability:6.1%}')
+
+    if args.id in stats.cooccurrence.row_index:
+        print(f'Techniques in the same case studies as {args.id}')
+        for technique_id, count in stats.cooccurring_techniques(args.id, args.limit):
+            print(f'  {technique_id:<16} {count:>4}')
+
+if __name__ == '__main__':
+    main()
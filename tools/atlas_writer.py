@@ -0,0 +1,97 @@
+import yaml
+from yaml.events import (
+    DocumentEndEvent,
+    DocumentStartEvent,
+    MappingEndEvent,
+    MappingStartEvent,
+    SequenceEndEvent,
+    SequenceStartEvent
+)
+from yaml.resolver import BaseResolver
+from yaml.serializer import Serializer
+
+"""
+Writes ATLAS.yaml incrementally, one data object at a time.
+
+yaml.dump represents the whole document as a YAML node tree before emitting it.
+This writer instead emits the mappings and lists that structure the document, such as
+the top-level data and the matrices, as events, and represents and emits each data object
+as its own node tree, which is released once written. The output is the same as yaml.dump
+with the ATLAS.yaml dump options for the same Dumper class.
+"""
+
+# Options of yaml.dump used for ATLAS.yaml
+DUMP_OPTIONS = {
+    'default_flow_style': False,
+    'explicit_start': True,
+    'sort_keys': False
+}
+
+def write_atlas_yaml(data, stream, Dumper=yaml.Dumper):
+    """Writes ATLAS data to the stream as a YAML document, formatted as by yaml.dump with DUMP_OPTIONS."""
+    dumper = Dumper(stream, **DUMP_OPTIONS)
+    try:
+        AtlasYamlWriter(dumper).write(data)
+    finally:
+        dumper.dispose()
+
+def is_data_object(obj):
+    """Returns True if the object is an ATLAS data object, ex. a technique or case study."""
+    return isinstance(obj, dict) and 'object-type' in obj
+
+class AtlasYamlWriter(Serializer):
+    """Serializes data to a Dumper, streaming the structure around data objects.
+
+    Data objects are serialized by the inherited Serializer methods, with the Dumper
+    representing them and emitting their events.
+    Objects shared between data objects are written in full for each, rather than as YAML aliases.
+    """
+
+    def __init__(self, dumper):
+        super().__init__()
+        self.dumper = dumper
+        self.emit = dumper.emit
+        self.resolve = dumper.resolve
+        self.descend_resolver = dumper.descend_resolver
+        self.ascend_resolver = dumper.ascend_resolver
+
+    def write(self, data):
+        """Writes the data as a single document in a YAML stream."""
+        self.dumper.open()
+        self.emit(DocumentStartEvent(explicit=DUMP_OPTIONS['explicit_start']))
+        self.write_value(data)
+        self.emit(DocumentEndEvent(explicit=False))
+        self.dumper.close()
+
+    def write_value(self, value):
+        """Writes a value, streaming plain mappings and lists that are not data objects."""
+        # Only exact types are streamed, as they are represented as plain YAML mappings and sequences
+        if type(value) is dict and not is_data_object(value):
+            self.emit(MappingStartEvent(None, BaseResolver.DEFAULT_MAPPING_TAG, True,
+                flow_style=self.dumper.default_flow_style))
+            for key, item in value.items():
+                self.write_node(key)
+                self.write_value(item)
+            self.emit(MappingEndEvent())
+        elif type(value) is list:
+            self.emit(SequenceStartEvent(None, BaseResolver.DEFAULT_SEQUENCE_TAG, True,
+                flow_style=self.dumper.default_flow_style))
+            for item in value:
+                self.write_value(item)
+            self.emit(SequenceEndEvent())
+        else:
+            self.write_node(value)
+
+    def write_node(self, value):
+        """Represents and serializes a value as its own node tree."""
+        node = self.dumper.represent_data(value)
+        # Reset the Dumper's representation state, as after representing a document
+        self.dumper.represented_objects = {}
+        self.dumper.object_keeper = []
+        self.dumper.alias_key = None
+
+        # Anchors are numbered across the document
+        self.anchor_node(node)
+        self.serialize_node(node, None, None)
+        self.serialized_nodes = {}
+        self.anchors = {}
@@ -0,0 +1,254 @@
+from argparse import ArgumentParser
+from functools import partial
+import io
+import itertools
+import tempfile
+import time
+import tracemalloc
+
+import inflect
+from jinja2 import Environment
+from schema import SchemaError
+import yaml
+
+from schemas.atlas_obj import subtechnique_schema, technique_schema
+from tools.atlas_formats import FORMATS, is_format_available, load_atlas_file, write_atlas_data
+from tools.atlas_index import iter_data_objects
+from tools.atlas_writer import DUMP_OPTIONS, write_atlas_yaml
+from tools.create_matrix import (
+    create_internal_link,
+    create_template_environment,
+    format_output,
+    get_dumper_class,
+    load_atlas_data,
+    load_atlas_yaml,
+    render_templates,
+    TemplateCache
+)
+from tools.integrity import find_duplicate_ids, locate_data_objects
+from tools.validate import get_schema_name, SCHEMAS, validate_objects
+
+"""
+Benchmarks steps of the ATLAS data build against their previous implementations.
+
+Reports wall-clock time and peak traced memory for each implementation.
+
+Run this script with `python -m tools.benchmark <case>` to allow for local imports.
+"""
+
+def render_by_reparse(data, anchors):
+    """Returns ATLAS data rendered as a single Jinja template.
+
+    This is the previous implementation of template evaluation in load_atlas_data,
+    which dumps the whole document to a YAML string, renders it, and parses the result.
+    """
+    # Use YAML default style of literal string "" wrappers to handle apostophes/single quotes in the text
+    data_str = yaml.dump(data, default_flow_style=False, sort_keys=False, default_style='>')
+    # Set up data as Jinja template
+    env = Environment()
+    env.globals.update(create_internal_link = create_internal_link)
+    template = env.from_string(data_str)
+    # Replace all "super aliases" in strings in the document
+    populated_data_str = template.render(anchors)
+    # Convert populated data string back to a dictionary
+    return yaml.safe_load(populated_data_str)
+
+def create_internal_link_per_engine(anchor):
+    """Returns an internal link to the ATLAS object.
+
+    This is the previous implementation of create_internal_link, which creates an inflect engine per call.
+    """
+    p = inflect.engine()
+    plural = p.plural(anchor['object-type'])
+    return f"[{anchor['name']}](/{plural.split('-')[-1]}/{anchor['id']})"
+
+def create_links(link_func, anchors):
+    """Returns internal links to each ATLAS object anchor."""
+    return [link_func(anchor) for anchor in anchors]
+
+def render_by_tree_walk(data, anchors, maxsize=1024):
+    """Returns ATLAS data rendered leaf by leaf, as in load_atlas_data."""
+    return render_templates(data, TemplateCache(create_template_environment(), maxsize=maxsize), anchors)
+
+def finalize(data):
+    """Returns the ATLAS.yaml output format of rendered data, as in load_atlas_data."""
+    data['matrices'] = [format_output(matrix_data) for matrix_data in data['matrices']]
+    return format_output(data)
+
+def validate_by_schema(objects):
+    """Validates each data object with its Schema.
+
+    This is the previous implementation of schema validation in tests/test_schema_validation.py,
+    which validates techniques as subtechniques after they fail as top-level techniques.
+    """
+    for obj in objects:
+        if obj['object-type'] != 'technique':
+            SCHEMAS[get_schema_name(obj)].validate(obj)
+            continue
+        try:
+            technique_schema.validate(obj)
+        except SchemaError:
+            subtechnique_schema.validate(obj)
+
+def find_duplicate_ids_by_count(locations):
+    """Returns a dictionary of each ID defined by more than one data object to their ObjectLocations.
+
+    This is the previous implementation of duplicate detection in tests/test_syntax.py,
+    which counts each ID in the list of all IDs, then scans the duplicates again for each duplicate ID.
+    """
+    all_ids = [location.id for location in locations]
+    duplicate_locations = [location for location in locations if all_ids.count(location.id) > 1]
+    duplicate_ids = sorted(set(location.id for location in duplicate_locations))
+    return {duplicate_id: [location for location in duplicate_locations if location.id == duplicate_id] for duplicate_id in duplicate_ids}
+
+def create_synthetic_locations(count, locations):
+    """Returns count ObjectLocations repeating those provided with new IDs, where one in a hundred IDs is a duplicate."""
+    return [
+        location._replace(id=f'AML.S{i % (count - count // 100):06}')
+        for i, location in zip(range(count), itertools.cycle(locations))
+    ]
+
+def measure(func, *args, repeat=5):
+    """Returns the best wall-clock time in seconds and peak traced memory in bytes of calling func."""
+    best_time = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best_time = min(best_time, time.perf_counter() - start)
+
+    # Measure memory separately as tracing slows down execution
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best_time, peak_memory
+
+def report(name, baseline, candidates):
+    """Prints measurements of each candidate relative to the baseline."""
+    print(name)
+    base_time, base_memory = baseline[1]
+    for label, (elapsed, peak_memory) in [baseline] + candidates:
+        print(
+            f'  {label:<24}'
+            f' {elapsed * 1000:9.1f} ms ({base_time / elapsed:5.1f}x)'
+            f' {peak_memory / 2**20:9.1f} MiB peak ({base_memory / peak_memory:5.1f}x)'
+        )
+
+def benchmark_render(args):
+    """Compares whole-document and per-field template rendering."""
+    data, anchors = load_atlas_yaml(args.data)
+
+    report('Template rendering', ('dump, render, reparse', measure(render_by_reparse, data, anchors, repeat=args.repeat)), [
+        ('tree walk', measure(render_by_tree_walk, data, anchors, repeat=args.repeat)),
+    ])
+
+def benchmark_template_cache(args):
+    """Compares per-field template rendering with and without the compiled template cache."""
+    data, anchors = load_atlas_yaml(args.data)
+
+    # Report how often expressions repeat in the data
+    template_cache = TemplateCache(create_template_environment())
+    render_templates(data, template_cache, anchors)
+    print(f'Template cache usage: {template_cache.cache_info()}')
+
+    report('Template cache', ('uncached', measure(render_by_tree_walk, data, anchors, 0, repeat=args.repeat)), [
+        ('cached', measure(render_by_tree_walk, data, anchors, repeat=args.repeat)),
+    ])
+
+def benchmark_libyaml(args):
+    """Compares loading and dumping ATLAS data with the pure-Python and libyaml implementations."""
+    if not yaml.__with_libyaml__:
+        print('libyaml: skipped, PyYAML was built without libyaml')
+        return
+
+    report('YAML loading', ('pure Python', measure(load_atlas_yaml, args.data, repeat=args.repeat)), [
+        ('libyaml', measure(partial(load_atlas_yaml, libyaml=True), args.data, repeat=args.repeat)),
+    ])
+
+    data = load_atlas_data(args.data)
+    dump = lambda libyaml: yaml.dump(data, Dumper=get_dumper_class(libyaml), **DUMP_OPTIONS)
+    report('YAML dumping', ('pure Python', measure(dump, False, repeat=args.repeat)), [
+        ('libyaml', measure(dump, True, repeat=args.repeat)),
+    ])
+
+def benchmark_links(args):
+    """Compares internal link creation with an inflect engine per link and with the pluralization table."""
+    _, anchors = load_atlas_yaml(args.data)
+    objects = [anchor for anchor in anchors.values() if isinstance(anchor, dict) and 'object-type' in anchor]
+
+    assert create_links(create_internal_link_per_engine, objects) == create_links(create_internal_link, objects)
+    report(f'Internal links ({len(objects)} objects)', ('inflect engine per link', measure(create_links, create_internal_link_per_engine, objects, repeat=args.repeat)), [
+        ('pluralization table', measure(create_links, create_internal_link, objects, repeat=args.repeat)),
+    ])
+
+def benchmark_writer(args):
+    """Compares dumping ATLAS.yaml as a whole document and writing it one data object at a time."""
+    data = load_atlas_data(args.data)
+
+    report('ATLAS.yaml writing', ('yaml.dump', measure(lambda: yaml.dump(data, io.StringIO(), **DUMP_OPTIONS), repeat=args.repeat)), [
+        ('streaming writer', measure(lambda: write_atlas_yaml(data, io.StringIO()), repeat=args.repeat)),
+    ])
+
+def benchmark_formats(args):
+    """Compares loading ATLAS data from each available output format."""
+    data = load_atlas_data(args.data)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        formats = [name for name in FORMATS if is_format_available(name)]
+        filepaths = dict(zip(formats, write_atlas_data(data, output_dir, formats)))
+        # Reading ATLAS.yaml as before, with the pure-Python loader
+        load_yaml = lambda: yaml.safe_load(filepaths['yaml'].read_text())
+
+        report('ATLAS data loading', ('yaml (pure Python)', measure(load_yaml, repeat=args.repeat)), [
+            (name, measure(load_atlas_file, filepath, repeat=args.repeat)) for name, filepath in filepaths.items()
+        ])
+
+def benchmark_schemas(args):
+    """Compares validating data objects with their Schemas and with the validators compiled from them."""
+    objects = list(iter_data_objects(load_atlas_data(args.data)))
+
+    assert validate_objects(objects) == []
+    report(f'Schema validation ({len(objects)} objects)', ('Schema.validate', measure(validate_by_schema, objects, repeat=args.repeat)), [
+        ('compiled validators', measure(validate_objects, objects, repeat=args.repeat)),
+    ])
+
+def benchmark_duplicate_ids(args):
+    """Compares duplicate ID detection by counting each ID and by grouping IDs in a dictionary, for a synthetic corpus."""
+    locations = create_synthetic_locations(args.objects, locate_data_objects(args.data))
+
+    assert find_duplicate_ids_by_count(locations) == dict(sorted(find_duplicate_ids(locations).items()))
+    report(f'Duplicate IDs ({len(locations)} objects)', ('list.count', measure(find_duplicate_ids_by_count, locations, repeat=args.repeat)), [
+        ('dictionary', measure(find_duplicate_ids, locations, repeat=args.repeat)),
+    ])
+
+BENCHMARKS = {
+    'render': benchmark_render,
+    'template-cache': benchmark_template_cache,
+    'libyaml': benchmark_libyaml,
+    'links': benchmark_links,
+    'writer': benchmark_writer,
+    'formats': benchmark_formats,
+    'schemas': benchmark_schemas,
+    'duplicate-ids': benchmark_duplicate_ids,
+}
+
+def main():
+    parser = ArgumentParser(description='Benchmarks steps of the ATLAS data build.')
+    parser.add_argument("cases", type=str, nargs="*", help=f"Benchmarks to run, any of {', '.join(BENCHMARKS)}, defaults to all")
+    parser.add_argument("--data", "-d", type=str, default="data/data.yaml", help="Path to data.yaml")
+    parser.add_argument("--repeat", "-r", type=int, default=5, help="Number of timed runs, the best is reported")
+    parser.add_argument("--objects", type=int, default=5000, help="Number of data objects in synthetic corpora")
+    args = parser.parse_args()
+
+    unknown_cases = set(args.cases) - set(BENCHMARKS)
+    if unknown_cases:
+        parser.error(f'Unknown benchmark(s): {", ".join(sorted(unknown_cases))}')
+
+    for case in args.cases or BENCHMARKS:
+        BENCHMARKS[case](args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+from hashlib import sha256
+import os
+from pathlib import Path
+import pickle
+import sys
+
+import yaml
+
+from tools.create_matrix import load_atlas_data
+
+"""
+Cache of built ATLAS data, shared by repeated loads in a process and across processes.
+
+Building ATLAS data from data/data.yaml loads each YAML file, renders templated strings,
+and parses the result again, which takes far longer than unpickling the built data.
+Built data is pickled in memory and on disk, keyed by a hash of the data directory
+and the tools that build it, so any change to either is a cache miss.
+
+Each load returns a fresh copy of the data, so callers may modify it freely.
+A process that has built the data can share its on-disk build with others, such as
+pytest-xdist workers, which then load it without hashing or building the data again.
+"""
+
+# Increment when the cached contents change to invalidate existing entries
+CACHE_VERSION = 1
+
+# Default cache directory, shared with the parse cache of tools/create_matrix.py
+DEFAULT_CACHE_DIR = '.atlas-cache'
+
+# Number of most recently used builds kept on disk
+DEFAULT_MAX_ENTRIES = 8
+
+# Directory of the code building ATLAS data, hashed into each build key
+TOOLS_DIR = Path(__file__).parent
+
+def hash_tree(directory, pattern='**/*'):
+    """Returns the SHA-256 hex digest of the relative paths and contents of files matching the pattern in the directory."""
+    directory = Path(directory)
+    digest = sha256()
+    for filepath in sorted(path for path in directory.glob(pattern) if path.is_file()):
+        digest.update(filepath.relative_to(directory).as_posix().encode())
+        digest.update(b'\0')
+        digest.update(sha256(filepath.read_bytes()).digest())
+    return digest.hexdigest()
+
+def get_build_key(data_filepath):
+    """Returns the key of ATLAS data built from the data file,
+    which changes with any file in its directory or any tool building it.
+    """
+    data_filepath = Path(data_filepath)
+    key = ':'.join([
+        str(CACHE_VERSION),
+        f'{sys.version_info.major}.{sys.version_info.minor}',
+        yaml.__version__,
+        data_filepath.name,
+        hash_tree(data_filepath.parent),
+        hash_tree(TOOLS_DIR, '*.py'),
+    ])
+    return sha256(key.encode()).hexdigest()
+
+class BuildCache:
+    """In-memory and on-disk cache of ATLAS data built by load_atlas_data."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = Path(cache_dir) / 'builds'
+        self.max_entries = max_entries
+        # Resolved data filepath to its build key and pickled data, for loads within this process
+        self.builds = {}
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'builds': 0}
+
+    def get_entry_filepath(self, key):
+        """Returns the path to the cached build with the key."""
+        return self.directory / f'{key}.pickle'
+
+    def load(self, data_filepath):
+        """Returns ATLAS data built from the data file, from the cache if unchanged since it was last built.
+
+        Data files are not hashed again within this process once built, as for a test session.
+        """
+        filepath = Path(data_filepath).resolve()
+        if filepath in self.builds:
+            self.stats['memory_hits'] += 1
+            _, pickled = self.builds[filepath]
+            return pickle.loads(pickled)
+
+        key = get_build_key(filepath)
+        entry_filepath = self.get_entry_filepath(key)
+        try:
+            pickled = entry_filepath.read_bytes()
+            data = pickle.loads(pickled)
+            # Mark as recently used for pruning
+            os.utime(entry_filepath)
+            self.stats['disk_hits'] += 1
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            data = load_atlas_data(filepath)
+            pickled = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            self.put(key, pickled)
+            self.stats['builds'] += 1
+
+        self.builds[filepath] = (key, pickled)
+        return data
+
+    def share(self, data_filepath):
+        """Returns the path to the on-disk build of the data file, building it if needed,
+        for other processes to load with load_shared.
+        """
+        filepath = Path(data_filepath).resolve()
+        if filepath not in self.builds:
+            self.load(filepath)
+        key, pickled = self.builds[filepath]
+        entry_filepath = self.get_entry_filepath(key)
+        # Builds loaded earlier may have been pruned since
+        if not entry_filepath.is_file():
+            self.put(key, pickled)
+        return entry_filepath
+
+    def load_shared(self, data_filepath, entry_filepath):
+        """Uses the build shared by another process for later loads of the data file in this process."""
+        entry_filepath = Path(entry_filepath)
+        self.builds[Path(data_filepath).resolve()] = (entry_filepath.stem, entry_filepath.read_bytes())
+
+    def put(self, key, pickled):
+        """Stores pickled data under the build key, then prunes older builds."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry_filepath = self.get_entry_filepath(key)
+        # Write to a unique temporary file first, as builds may be written by multiple processes
+        temp_filepath = entry_filepath.with_suffix(f'.{os.getpid()}.tmp')
+        temp_filepath.write_bytes(pickled)
+        temp_filepath.replace(entry_filepath)
+        self.prune()
+
+    def prune(self):
+        """Removes all but the most recently used builds."""
+        entries = []
+        for entry_filepath in self.directory.glob('*.pickle'):
+            try:
+                entries.append((entry_filepath.stat().st_mtime_ns, entry_filepath))
+            except OSError:
+                continue
+        for _, entry_filepath in sorted(entries, reverse=True)[self.max_entries:]:
+            try:
+                entry_filepath.unlink()
+            except FileNotFoundError:
+                # Removed by another process
+                pass
@@ -1,66 +1,245 @@
 from argparse import ArgumentParser
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache, partial
 from pathlib import Path
+import sys
 
 from jinja2 import Environment
 import yaml
-
-import inflect
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+
+# Support running as a script, `python tools/create_matrix.py`, with imports relative to the project root
+if __package__ in (None, ''):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from tools.anchor_graph import AnchorGraph
+from tools.atlas_formats import FORMATS, is_format_available, write_atlas_data
+from tools.atlas_index import write_atlas_index
+from tools.atlas_transitions import write_procedure_statistics
+from tools.incremental import BuildManifest, hash_file
+from tools.integrity import find_duplicate_ids, locate_data_objects
+from tools.parse_cache import ParseCache, references_nodes
+from tools.pluralize import plural
+from tools.text_search import write_search_index
 
 """
 Creates the combined ATLAS YAML file from source data.
 """
 
+# Problem found while constructing the output, ex. code 'unresolved-tactic', with the ID of the matrix and the object concerned
+Diagnostic = namedtuple('Diagnostic', ['code', 'matrix', 'id', 'message'])
+
 def main():
     parser = ArgumentParser()
     parser.add_argument("--data", "-d", type=str, default="data/data.yaml", help="Path to data.yaml")
     parser.add_argument("--output", "-o", type=str, default="dist", help="Output directory")
+    parser.add_argument("--stats", action="store_true", help="Print build statistics, such as template cache usage")
+    parser.add_argument("--incremental", "-i", action="store_true", help="Only re-render objects changed since the previous incremental build")
+    parser.add_argument("--cache-dir", type=str, default=".atlas-cache", help="Directory for build caches")
+    parser.add_argument("--no-cache", action="store_true", help="Parse all YAML files instead of reusing parsed files from the cache")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of processes parsing wildcard !include files, 0 for all CPUs")
+    parser.add_argument("--libyaml", action="store_true", help="Parse and output YAML with libyaml if available, output is equivalent but formatted differently")
+    parser.add_argument("--index", action="store_true", help="Also output a lookup index of the data by ID, ex. ATLAS.index")
+    parser.add_argument("--search", action="store_true", help="Also output a full-text search index of the data, ex. ATLAS.search")
+    parser.add_argument("--transitions", action="store_true", help="Also output technique co-occurrence and procedure step transition counts, ex. ATLAS.transitions")
+    parser.add_argument("--format", "-f", type=str, nargs="+", default=["yaml"], choices=list(FORMATS), help="Output formats, ex. yaml json msgpack.gz, defaults to yaml")
     args = parser.parse_args()
 
+    for output_format in args.format:
+        if not is_format_available(output_format):
+            parser.error(f'Output format {output_format} requires the msgpack package, install it with `pip install msgpack`')
+
     # Create output directories as needed
     output_dir = Path(args.output)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Load and transform data
-    data = load_atlas_data(args.data)
+    # Set up reuse of the previous build, if requested
+    build = None
+    if args.incremental:
+        manifest_filepath = Path(args.cache_dir) / 'build-manifest.pickle'
+        # Only reuse builds of the same data file by the same version of this script
+        build_key = (Path(args.data).as_posix(), hash_file(__file__))
+        build = BuildManifest.load(manifest_filepath, build_key)
+
+    # Reuse parsed YAML files, unless disabled
+    parse_cache = None if args.no_cache else ParseCache(args.cache_dir)
 
-    # Save composite document as a standard yaml file
-    # Output file name is the ID in data.yaml
-    output_filepath = output_dir / f"{data['id']}.yaml"
-    with open(output_filepath, "w") as f:
-        yaml.dump(data, f, default_flow_style=False, explicit_start=True, sort_keys=False)
+    # Load and transform data
+    template_cache = TemplateCache(create_template_environment())
+    diagnostics = []
+    anchor_ids = {}
+    data = load_atlas_data(
+        args.data,
+        template_cache=template_cache,
+        build=build,
+        jobs=args.jobs,
+        libyaml=args.libyaml,
+        parse_cache=parse_cache,
+        diagnostics=diagnostics,
+        anchor_ids=anchor_ids
+    )
+
+    # Report data objects sharing an ID
+    for object_id, locations in find_duplicate_ids(locate_data_objects(args.data)).items():
+        sources = ', '.join(f'{location.filepath}:{location.line}' for location in locations)
+        add_diagnostic(diagnostics, 'duplicate-id', data, object_id, f'ID {object_id} is defined more than once, at {sources}')
+
+    # Report problems with the matrix structure without failing the build
+    for diagnostic in diagnostics:
+        print(f'Warning: {diagnostic.matrix}: {diagnostic.message} [{diagnostic.code}]', file=sys.stderr)
+
+    # Save composite document as a standard yaml file, and in any other requested formats
+    # Output file names are the ID in data.yaml
+    write_atlas_data(data, output_dir, formats=args.format, Dumper=get_dumper_class(args.libyaml))
+
+    if args.index:
+        write_atlas_index(data, output_dir / f"{data['id']}.index", anchor_ids)
+
+    if args.search:
+        write_search_index(data, output_dir / f"{data['id']}.search")
+
+    if args.transitions:
+        write_procedure_statistics(data, output_dir / f"{data['id']}.transitions")
+
+    if build is not None:
+        build.save(manifest_filepath)
+
+    if parse_cache is not None:
+        parse_cache.prune()
+
+    if args.stats:
+        print(f'YAML loader: {get_loader_class(args.libyaml).__name__}')
+        print(f'Template cache: {template_cache.cache_info()}')
+        if parse_cache is not None:
+            print(f'Parse cache: hits={parse_cache.hits}, misses={parse_cache.misses}')
+        if build is not None:
+            print(f'Incremental build: {build.stats}')
+
+def load_atlas_data(matrix_yaml_filepath, template_cache=None, build=None, anchor_graph=None, jobs=1, libyaml=False, parse_cache=None, diagnostics=None, anchor_ids=None):
+    """Returns a dictionary representing ATLAS data as read from the provided YAML files.
+
+    Templated strings are compiled through the optionally provided TemplateCache.
+    If a BuildManifest is provided, unchanged objects from its previous build are reused.
+    If an AnchorGraph is provided, it is populated with anchor definitions and references.
+    See load_atlas_yaml for the number of jobs, libyaml usage, and the ParseCache.
+    Problems with the matrix structure are appended as Diagnostics to the optionally provided list.
+    If an anchor_ids dictionary is provided, it is updated with the anchor name to ATLAS ID of anchored data objects.
+    """
+    # Incremental builds determine which objects to re-render from anchor dependencies
+    if build is not None and anchor_graph is None:
+        anchor_graph = AnchorGraph()
 
-def load_atlas_data(matrix_yaml_filepath):
-    """Returns a dictionary representing ATLAS data as read from the provided YAML files."""
     # Load yaml with custom loader that supports !include and cross-doc anchors
-    data, anchors = load_atlas_yaml(matrix_yaml_filepath)
+    data, anchors = load_atlas_yaml(
+        matrix_yaml_filepath,
+        build=build,
+        anchor_graph=anchor_graph,
+        jobs=jobs,
+        libyaml=libyaml,
+        parse_cache=parse_cache
+    )
+
+    if anchor_ids is not None:
+        anchor_ids.update({anchor: obj['id'] for anchor, obj in anchors.items() if isinstance(obj, dict) and 'id' in obj})
 
     ## Jinja template evaluation
 
-    # Use YAML default style of literal string "" wrappers to handle apostophes/single quotes in the text
-    data_str = yaml.dump(data, default_flow_style=False, sort_keys=False, default_style='>')
-    # Set up data as Jinja template
-    env = Environment()
-    #add create_link function from data/render_helper to jinja environment for use during rendering
-    env.globals.update(create_internal_link = create_internal_link)
-    template = env.from_string(data_str)
-    # Validate template - throws a TemplateSyntaxError if invalid
-    env.parse(template)
+    if template_cache is None:
+        template_cache = TemplateCache(create_template_environment())
+
+    # Seed rendering with previously rendered objects that are still up to date
+    memo = build.create_render_memo(anchors, anchor_graph) if build is not None else None
 
     # Replace all "super aliases" in strings in the document
-    populated_data_str = template.render(anchors)
-    # Convert populated data string back to a dictionary
-    data = yaml.safe_load(populated_data_str)
+    data = render_templates(data, template_cache, anchors, memo)
 
     # Flatten object data and populate tactic list
-    data['matrices'] = [format_output(matrix_data) for matrix_data in data['matrices']]
+    data['matrices'] = [format_output(matrix_data, diagnostics) for matrix_data in data['matrices']]
 
     # Flatten any included data elements in the top-level data.yaml such as case studies
-    data = format_output(data)
+    data = format_output(data, diagnostics)
+
+    if build is not None:
+        build.record_rendered(memo, anchors)
 
     return data
 
-def format_output(data):
-    """Constructs the ATLAS.yaml output format by populating listed tactic IDs and flattening lists of other objects."""
+def create_template_environment():
+    """Returns the Jinja environment used to render templated strings in ATLAS data."""
+    # Keep trailing newlines as each string is rendered as its own template
+    env = Environment(keep_trailing_newline=True)
+    #add create_link function from data/render_helper to jinja environment for use during rendering
+    env.globals.update(create_internal_link = create_internal_link)
+    return env
+
+class TemplateCache:
+    """Bounded LRU cache of compiled Jinja templates keyed by their exact source text.
+
+    Templated fields repeat the same expressions, ex. {{reconnaissance.id}},
+    which are compiled once and rendered many times.
+    A maxsize of 0 disables caching.
+    """
+
+    def __init__(self, env, maxsize=1024):
+        self.env = env
+        self.get_template = lru_cache(maxsize=maxsize)(env.from_string)
+
+    def render(self, source, context):
+        """Returns the rendered template source. Throws a TemplateSyntaxError if invalid."""
+        return self.get_template(source).render(context)
+
+    def cache_info(self):
+        """Returns the cache hits, misses, maxsize, and current size."""
+        return self.get_template.cache_info()
+
+# Delimiters that mark a string as a Jinja template
+JINJA_DELIMITERS = ('{{', '{%', '{#')
+
+def render_templates(obj, template_cache, context, memo=None):
+    """Returns a copy of the loaded YAML object tree with Jinja templates rendered.
+
+    Only string leaves containing a Jinja delimiter are rendered through the TemplateCache,
+    all other values are carried over as-is.
+    Objects shared by YAML aliases remain shared in the result.
+
+    Throws a TemplateSyntaxError if a templated string is invalid.
+    """
+    if memo is None:
+        memo = {}
+
+    if isinstance(obj, str):
+        if any(delimiter in obj for delimiter in JINJA_DELIMITERS):
+            return template_cache.render(obj, context)
+        return obj
+
+    # Containers already rendered, i.e. referenced elsewhere by a YAML alias
+    if id(obj) in memo:
+        return memo[id(obj)]
+
+    if isinstance(obj, dict):
+        result = memo[id(obj)] = {}
+        for key, value in obj.items():
+            result[render_templates(key, template_cache, context, memo)] = render_templates(value, template_cache, context, memo)
+        return result
+
+    if isinstance(obj, list):
+        result = memo[id(obj)] = []
+        result.extend(render_templates(value, template_cache, context, memo) for value in obj)
+        return result
+
+    # Other scalars, such as dates and numbers
+    return obj
+
+def format_output(data, diagnostics=None):
+    """Constructs the ATLAS.yaml output format by populating listed tactic IDs and flattening lists of other objects.
+
+    Tactic IDs listed in the matrix that have no tactic object, and tactic objects defined more than once,
+    are appended as Diagnostics to the optionally provided list.
+    """
 
     # Objects are lists of lists under 'data' as !includes are list items
     # Flatten the objects
@@ -70,16 +249,17 @@ def format_output(data):
     # The literal data key contains include filepaths that will be resolved as part of YAML loading
     matrix = {k: data[k] for k in data if k != 'data'}
 
-    # Setting up for pluralization library
-    # This library is used in order to get the plural form of arbitrary object-type names
-    p = inflect.engine()
-
     # Get list of unique object types
     # Exclude 'tactic', as it will be separately handled
     dataObjectTypes = list(set([obj['object-type'] for obj in objects if 'object-type' in obj and obj['object-type'] != 'tactic']))
 
     # Keep track of object types to their plural forms for dictionary key use
-    objectTypeToPlural = {dot: p.plural(dot) for dot in dataObjectTypes}
+    objectTypeToPlural = {dot: plural(dot) for dot in dataObjectTypes}
+
+    # Tactics as defined in matrix.yaml are IDs, index their positions to be replaced by tactic objects
+    tacticPositions = index_tactic_positions(matrix.get('tactics', []))
+    # Tactic IDs to the tactic object placed at their positions
+    placedTactics = {}
 
     # Populates object lists within matrix object based on object-type
     # Ensures tactic objects are in the order defined in the matrix
@@ -90,12 +270,16 @@ def format_output(data):
         objectType = obj['object-type']
 
         if objectType == 'tactic':
-            # Tactics as defined in matrix.yaml are IDs
-            # Replace them with the full tactic object
+            # Replace the listed IDs with the full tactic object
             obj_id = obj['id']
-            if obj_id in matrix["tactics"]:
-                idx = matrix["tactics"].index(obj_id)
-                matrix['tactics'][idx] = obj
+            if obj_id in placedTactics:
+                # The first definition is kept
+                add_diagnostic(diagnostics, 'duplicate-tactic', matrix, obj_id,
+                    f'Tactic {obj_id} is defined more than once, keeping the first definition')
+            elif obj_id in tacticPositions:
+                for idx in tacticPositions[obj_id]:
+                    matrix['tactics'][idx] = obj
+                placedTactics[obj_id] = obj
 
         elif objectType in dataObjectTypes:
             # This is a non-tactic object type defined in the data
@@ -110,25 +294,71 @@ def format_output(data):
             # Add the object to the corresponding data list
             matrix[objectTypePlural].append(obj)
 
+    # Listed IDs without a tactic object remain as ID strings
+    for tactic_id in tacticPositions:
+        if tactic_id not in placedTactics:
+            add_diagnostic(diagnostics, 'unresolved-tactic', matrix, tactic_id,
+                f'Tactic {tactic_id} is listed in the matrix but not defined')
+
     return matrix
 
-def load_atlas_yaml(matrix_yaml_filepath):
+def index_tactic_positions(tactic_ids):
+    """Returns a dictionary of each tactic ID to its positions in the matrix tactic list.
+
+    Entries that are not ID strings, such as already populated tactic objects, are skipped.
+    """
+    positions = {}
+    for idx, tactic_id in enumerate(tactic_ids):
+        if isinstance(tactic_id, str):
+            positions.setdefault(tactic_id, []).append(idx)
+    return positions
+
+def add_diagnostic(diagnostics, code, matrix, object_id, message):
+    """Appends a Diagnostic about the object in the matrix to the list, if provided."""
+    if diagnostics is not None:
+        diagnostics.append(Diagnostic(code, matrix.get('id'), object_id, message))
+
+def load_atlas_yaml(matrix_yaml_filepath, build=None, anchor_graph=None, jobs=1, libyaml=False, parse_cache=None):
     """Returns two dictionaries representing templated ATLAS data as read from the provided YAML files.
 
+    If a BuildManifest is provided, unchanged included files are reused from its previous build.
+    If an AnchorGraph is provided, it is populated with the anchors each included file defines
+    and the anchors each included data object references.
+    Files matched by wildcard !include paths are parsed by the specified number of worker processes,
+    where 0 uses all available CPUs and 1 parses in this process.
+    If libyaml is True and PyYAML was built with libyaml, files are parsed by libyaml.
+    If a ParseCache is provided, unchanged files are not parsed again.
+
     Returns: data, anchors
         data
     """
     # Load yaml with custom loader that supports !include and cross-doc anchors
-    master = yaml.SafeLoader("")
-    with open(matrix_yaml_filepath, "rb") as f:
-        data = yaml_safe_load(f, master=master)
+    master = create_master_loader(get_loader_class(libyaml), build=build, anchor_graph=anchor_graph, parse_cache=parse_cache)
+    with ExitStack() as stack:
+        if jobs != 1:
+            master.pool = stack.enter_context(ProcessPoolExecutor(max_workers=jobs or None))
+        with open(matrix_yaml_filepath, "rb") as f:
+            data = yaml_safe_load(f, master=master)
 
     # Construct anchors into dict store and for further parsing
     const = yaml.constructor.SafeConstructor()
     anchors = {k: const.construct_document(v) for k, v in master.anchors.items()}
 
+    if anchor_graph is not None:
+        anchor_graph.index_references(create_template_environment(), anchors)
+
     return data, anchors
 
+def create_master_loader(loader_class=yaml.SafeLoader, build=None, anchor_graph=None, pool=None, parse_cache=None):
+    """Returns a loader holding the anchors and settings shared by all loaded YAML files."""
+    master = yaml.SafeLoader("")
+    master.loader_class = loader_class
+    master.build = build
+    master.anchor_graph = anchor_graph
+    master.pool = pool
+    master.parse_cache = parse_cache
+    return master
+
 #region Support !include in YAML
 
 # Adapted from https://stackoverflow.com/a/44913652
@@ -144,6 +374,36 @@ def compose_document(self):
 # Add functionality to SafeLoader
 yaml.SafeLoader.compose_document = compose_document
 
+if yaml.__with_libyaml__:
+    from yaml.cyaml import CParser
+
+    class CIncludeLoader(Composer, CParser, SafeConstructor, Resolver):
+        """Safe loader that parses with libyaml and supports !include and cross-doc anchors.
+
+        Unlike yaml.CSafeLoader, nodes are composed in Python, which keeps anchors across documents.
+        """
+        compose_document = compose_document
+
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+else:
+    CIncludeLoader = None
+
+def get_loader_class(libyaml=False):
+    """Returns the YAML loader class to use, falling back to the pure-Python loader if libyaml is unavailable."""
+    if libyaml and CIncludeLoader is not None:
+        return CIncludeLoader
+    return yaml.SafeLoader
+
+def get_dumper_class(libyaml=False):
+    """Returns the YAML dumper class to use, falling back to the pure-Python dumper if libyaml is unavailable."""
+    if libyaml and yaml.__with_libyaml__:
+        return yaml.CSafeDumper
+    return yaml.Dumper
+
 # Add !include constructor
 # Adapted from http://code.activestate.com/recipes/577613-yaml-include-support/
 def yaml_include(loader, node):
@@ -168,15 +428,18 @@ def yaml_include(loader, node):
     # which is why nested lists are flattened in load_atlas_data
 
     if has_wildcard:
+        # Get all matching files relative to the directory the input matrix.yaml lives in
+        filepaths = sorted(loader.input_dir_path.glob(node.value))
+
+        # Parse independent files concurrently, if enabled
+        if loader.pool is not None and len(filepaths) > 1:
+            return load_included_files_parallel(loader, filepaths)
+
         # Collect documents into a single array
         results = []
-        # Get all matching files relative to the directory the input matrix.yaml lives in
-        filepaths = loader.input_dir_path.glob(node.value)
         # Read in each file in name-order and append to results
-        for filepath in sorted(filepaths):
-            with open(filepath) as inputfile:
-                result = yaml_safe_load(inputfile, master=loader)
-                results.append(result)
+        for filepath in filepaths:
+            results.append(load_included_file(loader, filepath))
 
         return results
 
@@ -189,24 +452,137 @@ def yaml_include(loader, node):
 
     else:
         # Return specified document
-        with open(include_path) as inputfile:
-            return yaml_safe_load(inputfile, master=loader, expect_list=True)
+        return load_included_file(loader, include_path, expect_list=True)
 
 # Add custom !include constructor
 yaml.add_constructor("!include", yaml_include, Loader=yaml.SafeLoader)
+if CIncludeLoader is not None:
+    yaml.add_constructor("!include", yaml_include, Loader=CIncludeLoader)
+
+def load_included_file(loader, filepath, expect_list=False):
+    """Returns the document in an included data file.
+
+    For incremental builds, the document is reused from the previous build if the file is unchanged.
+    The file and the anchors it defines are added to the loader's AnchorGraph, if any.
+    """
+    build = loader.build
+    if build is None and loader.anchor_graph is None:
+        with open(filepath) as inputfile:
+            return yaml_safe_load(inputfile, master=loader, expect_list=expect_list)
+
+    record = build.reuse(filepath) if build is not None else None
+    if record is not None:
+        return add_included_file(loader, filepath, record.doc, record.anchor_nodes, record.uses)
+
+    anchors_before = dict(loader.anchors)
+    if build is not None:
+        build.start_loading()
+    with open(filepath) as inputfile:
+        doc = yaml_safe_load(inputfile, master=loader, expect_list=expect_list)
+    # Anchors added or redefined by this file
+    anchor_nodes = {k: v for k, v in loader.anchors.items() if anchors_before.get(k) is not v}
+    if build is not None:
+        build.finish_loading(filepath, doc, anchor_nodes)
+
+    return add_included_file(loader, filepath, doc, anchor_nodes)
+
+def add_included_file(loader, filepath, doc, anchor_nodes, uses=None):
+    """Adds the anchors defined by a loaded file to the loader and the file to the loader's AnchorGraph, if any.
+
+    Returns the document.
+    """
+    loader.anchors.update(anchor_nodes)
+    if loader.anchor_graph is not None:
+        loader.anchor_graph.add_file(filepath, doc, anchor_nodes, uses=uses)
+    return doc
+
+def load_included_files_parallel(loader, filepaths):
+    """Returns the documents in the included data files, parsed by the loader's process pool.
+
+    Anchors defined by each file are added in filepath order, as when parsing serially.
+    Files referencing an anchor defined in another file are parsed serially in this process.
+    """
+    build = loader.build
+
+    # Reuse unchanged files from the previous incremental build
+    records = [build.reuse(filepath) if build is not None else None for filepath in filepaths]
+
+    # Parse all other files concurrently
+    parse_filepaths = [filepath for filepath, record in zip(filepaths, records) if record is None]
+    parse = partial(parse_included_file, loader_class=loader.loader_class, parse_cache=loader.parse_cache)
+    parsed = iter(loader.pool.map(parse, parse_filepaths))
+
+    results = []
+    for filepath, record in zip(filepaths, records):
+        if record is not None:
+            results.append(add_included_file(loader, filepath, record.doc, record.anchor_nodes, record.uses))
+            continue
+
+        result = next(parsed)
+        if result is None:
+            # Depends on other files
+            results.append(load_included_file(loader, filepath))
+            continue
 
-def yaml_safe_load(stream, Loader=yaml.SafeLoader, master=None, expect_list=False):
-    """Loads the specified file stream while preserving anchors for later use."""
+        doc, anchor_nodes = result
+        if build is not None:
+            build.start_loading()
+            build.finish_loading(filepath, doc, anchor_nodes)
+        results.append(add_included_file(loader, filepath, doc, anchor_nodes))
+
+    return results
+
+def parse_included_file(filepath, loader_class=yaml.SafeLoader, parse_cache=None):
+    """Returns the document and the anchor nodes it defines parsed from an included data file,
+    or None if the file includes other files or references anchors defined elsewhere.
+
+    Runs in worker processes for parallel loading.
+    """
+    with open(filepath) as inputfile:
+        # Nested includes are tracked by the incremental build and are loaded serially
+        if '!include' in inputfile.read():
+            return None
+        inputfile.seek(0)
+
+        master = create_master_loader(loader_class, parse_cache=parse_cache)
+        try:
+            doc = yaml_safe_load(inputfile, master=master)
+        except yaml.composer.ComposerError as e:
+            # An alias to an anchor defined in another file
+            if e.problem.startswith('found undefined alias'):
+                return None
+            raise
+
+    return doc, master.anchors
+
+def yaml_safe_load(stream, Loader=None, master=None, expect_list=False):
+    """Loads the specified file stream while preserving anchors for later use.
+
+    Uses the master loader's loader class if no Loader is specified.
+    """
+    if Loader is None:
+        Loader = master.loader_class if master is not None else yaml.SafeLoader
     loader = Loader(stream)
     # Store the input file directory for later joining with !include paths
     #   ex. stream.name is 'data/matrix.yaml', input_dir_path is Path('data')
     #   ex. stream.name is 'matrix.yaml', input_dir_path is Path('.')
     loader.input_dir_path = Path(stream.name).parent
 
+    loader.loader_class = Loader
+    loader.build = None
+    loader.anchor_graph = None
+    loader.pool = None
+    loader.parse_cache = None
+
     if master is not None:
         loader.anchors = master.anchors
+        loader.build = master.build
+        loader.anchor_graph = master.anchor_graph
+        loader.pool = master.pool
+        loader.parse_cache = master.parse_cache
     try:
-        doc = loader.get_single_data()
+        node = compose_single_node(loader, Path(stream.name))
+        doc = loader.construct_document(node) if node is not None else None
         # Validate format of YAML file
         if expect_list and not isinstance(doc, list):
             # Specified .yaml files are expected to contain a list of items
@@ -219,6 +595,32 @@ def yaml_safe_load(stream, Loader=yaml.SafeLoader, master=None, expect_list=Fals
     finally:
         loader.dispose()
 
+def compose_single_node(loader, filepath):
+    """Returns the root node of the file being loaded, reusing the loader's ParseCache if any.
+
+    Anchors defined by the file are added to the loader's anchors.
+    """
+    parse_cache = loader.parse_cache
+    if parse_cache is None:
+        return loader.get_single_node()
+
+    cached = parse_cache.get(filepath, loader.loader_class)
+    if cached is not None:
+        node, anchor_nodes = cached
+        loader.anchors.update(anchor_nodes)
+        return node
+
+    file_state = parse_cache.get_file_state(filepath)
+    anchors_before = dict(loader.anchors)
+    node = loader.get_single_node()
+
+    # Files aliasing anchors from other files are not cached, as those files may change
+    if node is not None and not references_nodes(node, {id(n) for n in anchors_before.values()}):
+        anchor_nodes = {k: v for k, v in loader.anchors.items() if anchors_before.get(k) is not v}
+        parse_cache.put(filepath, loader.loader_class, file_state, node, anchor_nodes)
+
+    return node
+
 def create_internal_link(anchor):
     '''
     Function for use in Jinja templated files. The 'anchor' parameter is a dictionary representing an atlas object.
@@ -230,12 +632,10 @@ def create_internal_link(anchor):
     id = anchor.get('id')
     name = anchor.get('name')
     obj_type = anchor.get('object-type')
-    p = inflect.engine()
 
     if (id and name and obj_type):
-        plural = p.plural(obj_type)
         #If object type is multiple words separated by hyphen, pluralizes last word
-        split_on_hyphen = plural.split("-")
+        split_on_hyphen = plural(obj_type).split("-")
         link_type = split_on_hyphen[-1]
         link = f"[{name}](/{link_type}/{id})"
         return link
@@ -8,7 +8,7 @@ import yaml
 from tools.create_matrix import load_atlas_yaml
 
 # Local directory
-from schemas.atlas_id import FULL_ID_PATTERN, ID_PREFIX_PATTERN
+from schemas.atlas_id import FULL_ID_PATTERN, parse_id
 from schemas.atlas_obj import CASE_STUDY_VERSION
 
 """
@@ -20,8 +20,6 @@ ATLAS IDs are converted to expressions that use ATLAS YAML anchors.
 
 Run this script with `python -m tools.import_case_study_file <filepath>` to allow for local imports.
 """
-# Numeric portion of an ATLAS case study ID
-REGEX_CS_ID_NUM = re.compile(rf'{ID_PREFIX_PATTERN}CS(\d+)')
 # Match for any ATLAS tactic, technique, or subtechnique ID
 # REGEX_ID = re.compile(r'AML\.TA?(?:\d+)(?:\.\d+)?')
 REGEX_ID = re.compile(FULL_ID_PATTERN)
@@ -146,11 +144,11 @@ def find_next_filepath():
     latest_filepath = filepaths[-1]
 
     # Parse out the numeric portion of the case study ID filename
-    match = REGEX_CS_ID_NUM.match(latest_filepath.stem)
+    atlas_id = parse_id(latest_filepath.stem)
 
-    if match:
-        # Only 1 match expected, i.e. 0015
-        cur_id_num_str = match.groups()[0]
+    if atlas_id is not None and atlas_id.kind == 'CS':
+        # i.e. 0015
+        cur_id_num_str = atlas_id.number
         # Get next integer, i.e. 16
         next_id_num = int(cur_id_num_str) + 1
         # Padded by zeros, i.e. 0016
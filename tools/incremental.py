@@ -0,0 +1,170 @@
+import hashlib
+import pickle
+
+from tools.anchor_graph import get_objects
+
+"""
+Supports incremental builds of ATLAS.yaml.
+
+A build manifest records the content hash of each included data file,
+the anchors each file defines and uses, and the objects loaded and rendered from it.
+Later builds reuse the objects of unchanged files and only re-render objects
+whose source or referenced anchors have changed, as found in the AnchorGraph.
+"""
+
+# Increment when the manifest contents change to invalidate existing manifests
+MANIFEST_VERSION = 2
+
+def hash_file(filepath):
+    """Returns the SHA-256 hex digest of the file contents."""
+    with open(filepath, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class FileRecord:
+    """Loaded contents of an included data file."""
+
+    def __init__(self, content_hash, doc, anchor_nodes):
+        # SHA-256 of the file contents
+        self.content_hash = content_hash
+        # Document as constructed from the file, before rendering
+        self.doc = doc
+        # Anchor name to YAML node for each anchor defined in the file
+        self.anchor_nodes = anchor_nodes
+        # Rendered object and anchor names used for each top-level object in the document
+        self.rendered = []
+        self.uses = []
+
+    @property
+    def objects(self):
+        """Returns the top-level data objects in the document."""
+        return get_objects(self.doc)
+
+def is_container(obj):
+    """Returns True if the object is rendered into a new object tracked by the render_templates memo."""
+    return isinstance(obj, (dict, list))
+
+class BuildManifest:
+    """Tracks included data files between builds.
+
+    The manifest is only reused by builds with the same key, ex. a hash of the build script.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        # Filepath to FileRecord from the previous and the current build
+        self.previous_files = {}
+        self.files = {}
+        # Constructed anchors from the previous and the current build
+        self.previous_anchors = {}
+        self.anchors = {}
+        # Nesting of files currently being loaded, innermost last
+        self.loading = []
+        # Filepath to content hash of files checked in this build
+        self.content_hashes = {}
+        self.stats = {'files_reused': 0, 'files_loaded': 0, 'objects_reused': 0, 'objects_rendered': 0}
+
+    @classmethod
+    def load(cls, manifest_filepath, key):
+        """Returns the manifest saved at the filepath, or a new manifest if missing or out of date."""
+        manifest = cls(key)
+        try:
+            with open(manifest_filepath, 'rb') as f:
+                saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return manifest
+
+        if saved.get('version') == MANIFEST_VERSION and saved.get('key') == key:
+            manifest.previous_files = saved['files']
+            manifest.previous_anchors = saved['anchors']
+
+        return manifest
+
+    def save(self, manifest_filepath):
+        """Saves the files loaded in this build and the resulting anchors to the filepath."""
+        manifest_filepath.parent.mkdir(parents=True, exist_ok=True)
+        saved = {
+            'version': MANIFEST_VERSION,
+            'key': self.key,
+            'files': self.files,
+            'anchors': self.anchors
+        }
+        # Write to a temporary file first so an interrupted build leaves the previous manifest intact
+        temp_filepath = manifest_filepath.with_suffix('.tmp')
+        with open(temp_filepath, 'wb') as f:
+            pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+        temp_filepath.replace(manifest_filepath)
+
+    def reuse(self, filepath):
+        """Returns the FileRecord from the previous build if the file is unchanged, otherwise None."""
+        key = filepath.as_posix()
+        content_hash = self.content_hashes[key] = hash_file(filepath)
+
+        # Files included from another file are loaded as part of that file, which is then not cached
+        if self.loading:
+            self.loading[-1] = False
+            return None
+
+        record = self.previous_files.get(key)
+        if record is None or record.content_hash != content_hash:
+            return None
+
+        self.files[key] = record
+        self.stats['files_reused'] += 1
+        return record
+
+    def start_loading(self):
+        """Marks the start of parsing a file."""
+        self.loading.append(True)
+
+    def finish_loading(self, filepath, doc, anchor_nodes):
+        """Records the parsed document of a file and the anchor nodes it defined."""
+        is_cacheable = self.loading.pop()
+        self.stats['files_loaded'] += 1
+        # Files that include other files are not cached, as their includes are not tracked
+        if not is_cacheable:
+            return
+
+        key = filepath.as_posix()
+        self.files[key] = FileRecord(self.content_hashes[key], doc, anchor_nodes)
+
+    def create_render_memo(self, anchors, anchor_graph):
+        """Returns a render_templates memo of loaded objects to their previously rendered form.
+
+        Objects are reused if they are unchanged and none of the anchors they reference have changed.
+        Also records the anchors used by each object, from the AnchorGraph, for the next build.
+        """
+        changed_anchors = {
+            k for k in set(anchors) | set(self.previous_anchors)
+            if anchors.get(k) != self.previous_anchors.get(k)
+        }
+        affected = anchor_graph.get_affected_objects(changed_anchors)
+
+        memo = {}
+        for key, record in self.files.items():
+            previous = self.previous_files.get(key)
+            is_reused = previous is record
+            refs = anchor_graph.get_object_refs(key)
+
+            for i, (ref, obj) in enumerate(zip(refs, record.objects)):
+                if (previous is None or i >= len(previous.rendered) or previous.rendered[i] is None
+                        or ref in affected):
+                    self.stats['objects_rendered'] += 1
+                # Unchanged files have the same objects, otherwise compare contents
+                elif is_reused or obj == previous.objects[i]:
+                    memo[id(obj)] = previous.rendered[i]
+                    self.stats['objects_reused'] += 1
+                else:
+                    self.stats['objects_rendered'] += 1
+
+            record.uses = [anchor_graph.get_uses(ref) for ref in refs]
+
+        return memo
+
+    def record_rendered(self, memo, anchors):
+        """Records the rendered form of each loaded object, as populated in the render_templates memo,
+        and the constructed anchors used to render them.
+        """
+        self.anchors = anchors
+        for record in self.files.values():
+            # Scalars are not tracked in the memo and are always re-rendered
+            record.rendered = [memo[id(obj)] if is_container(obj) else None for obj in record.objects]
@@ -0,0 +1,127 @@
+from argparse import ArgumentParser
+from collections import namedtuple
+from pathlib import Path
+import sys
+
+import yaml
+
+"""
+Integrity checks of the ATLAS data files, reporting problems by file and line.
+
+Data objects are located by streaming the YAML parse events of data.yaml and each file it includes,
+without constructing or rendering documents, so checks are independent of the build.
+
+Run this script with `python -m tools.integrity` to allow for local imports.
+"""
+
+# Identifies a data object by the file and line of its ID, along with its type and name
+ObjectLocation = namedtuple('ObjectLocation', ['filepath', 'line', 'id', 'object_type', 'name'])
+
+# Keys of data objects recorded in ObjectLocations
+LOCATION_KEYS = ('id', 'object-type', 'name')
+
+def find_duplicates(items, key):
+    """Returns a dictionary of each key occurring more than once to its items, in order of first occurrence.
+
+    Items are grouped by a single pass over a dictionary, in linear time.
+    """
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return {k: group for k, group in groups.items() if len(group) > 1}
+
+def resolve_include(filepath, include):
+    """Returns the paths of the files included by an !include tag in the file, as loaded by tools/create_matrix.py."""
+    include_path = Path(filepath).parent / include
+    if '*' in include:
+        return sorted(Path(filepath).parent.glob(include))
+    if include_path.is_dir():
+        return [include_path / 'matrix.yaml']
+    return [include_path]
+
+def scan_data_file(filepath, loader_class):
+    """Returns the ObjectLocations of top-level data objects in the file and the paths of the files it includes.
+
+    Top-level data objects are mappings with an ID and object-type that are the document itself or items of it.
+    """
+    locations = []
+    includes = []
+    posix_filepath = Path(filepath).as_posix()
+
+    # Open collections, each a list of [is mapping, is data object, expecting a key, current key, recorded values]
+    stack = []
+    with open(filepath) as f:
+        for event in yaml.parse(f, Loader=loader_class):
+            if isinstance(event, yaml.DocumentStartEvent):
+                stack = []
+            elif isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                is_mapping = isinstance(event, yaml.MappingStartEvent)
+                # Objects are the document or items of a top-level list
+                is_object = is_mapping and (not stack or (len(stack) == 1 and not stack[0][0]))
+                stack.append([is_mapping, is_object, True, None, {}])
+            elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                _, is_object, _, _, values = stack.pop()
+                if is_object and 'id' in values and 'object-type' in values:
+                    (object_id, line), (object_type, _) = values['id'], values['object-type']
+                    name, _ = values.get('name', (None, None))
+                    locations.append(ObjectLocation(posix_filepath, line, object_id, object_type, name))
+                # The collection was the value of a key in the parent mapping
+                if stack and stack[-1][0]:
+                    stack[-1][2] = True
+            elif isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)):
+                if isinstance(event, yaml.ScalarEvent) and event.tag == '!include':
+                    includes.extend(resolve_include(filepath, event.value))
+                if not stack or not stack[-1][0]:
+                    continue
+                collection = stack[-1]
+                if collection[2]:
+                    collection[3] = getattr(event, 'value', None)
+                    collection[2] = False
+                else:
+                    if collection[1] and collection[3] in LOCATION_KEYS and isinstance(event, yaml.ScalarEvent):
+                        collection[4][collection[3]] = (event.value, event.start_mark.line + 1)
+                    collection[2] = True
+
+    return locations, includes
+
+def locate_data_objects(data_filepath):
+    """Returns the ObjectLocations of data objects in the data file and the files it includes, in load order."""
+    loader_class = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    locations = []
+    # Files to scan, depth-first in include order
+    pending = [Path(data_filepath)]
+    while pending:
+        filepath = pending.pop()
+        file_locations, includes = scan_data_file(filepath, loader_class)
+        locations.extend(file_locations)
+        pending.extend(reversed(includes))
+    return locations
+
+def find_duplicate_ids(locations):
+    """Returns a dictionary of each ID defined by more than one data object to their ObjectLocations."""
+    return find_duplicates(locations, key=lambda location: location.id)
+
+def format_duplicate_ids(duplicates):
+    """Returns a message listing each duplicate ID with the name, file, and line of each of its data objects."""
+    count = sum(len(locations) for locations in duplicates.values())
+    lines = [f'Duplicate ID(s) detected: {len(duplicates)} ID(s) found for {count} data objects.']
+    for object_id, locations in sorted(duplicates.items()):
+        lines.append(f'  {object_id}: {locations[0].object_type.capitalize()}')
+        for location in locations:
+            lines.append(f'    {location.name} ({location.filepath}:{location.line})')
+    return '\n'.join(lines)
+
+def main():
+    parser = ArgumentParser(description='Checks the integrity of ATLAS data files, such as the uniqueness of IDs.')
+    parser.add_argument("--data", "-d", type=str, default="data/data.yaml", help="Path to data.yaml")
+    args = parser.parse_args()
+
+    locations = locate_data_objects(args.data)
+    duplicates = find_duplicate_ids(locations)
+    if duplicates:
+        print(format_duplicate_ids(duplicates))
+        sys.exit(1)
+    print(f'Checked {len(locations)} data objects, all IDs are unique')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+from hashlib import sha256
+import os
+from pathlib import Path
+import pickle
+
+import yaml
+
+from tools.incremental import hash_file
+
+"""
+Persistent cache of parsed YAML files.
+
+Stores the composed node tree of each file and the anchors it defines,
+keyed by filepath, and validated by modification time and content hash.
+Constructing documents from cached nodes still resolves !include tags,
+so included files are checked independently.
+"""
+
+# Increment when the entry contents change to invalidate existing entries
+CACHE_VERSION = 1
+
+# Default limit on the total size of cache entries, least recently used entries are evicted first
+DEFAULT_MAX_SIZE = 256 * 2**20
+
+class ParseCache:
+    """On-disk cache of YAML node trees for files parsed by a loader class."""
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE):
+        self.directory = Path(cache_dir) / 'parsed'
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def get_entry_filepath(self, filepath, loader_class):
+        """Returns the path to the cache entry for a file parsed by the loader class."""
+        key = f'{CACHE_VERSION}:{yaml.__version__}:{loader_class.__name__}:{Path(filepath).resolve().as_posix()}'
+        return self.directory / f'{sha256(key.encode()).hexdigest()}.pickle'
+
+    def get(self, filepath, loader_class):
+        """Returns the cached node tree and anchor name to node dictionary for the file,
+        or None if not cached or the file has changed.
+        """
+        entry_filepath = self.get_entry_filepath(filepath, loader_class)
+        try:
+            with open(entry_filepath, 'rb') as f:
+                entry = pickle.load(f)
+            stat = os.stat(filepath)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            self.misses += 1
+            return None
+
+        # Files with a different modification time may still have the same contents
+        if (entry['mtime_ns'], entry['size']) != (stat.st_mtime_ns, stat.st_size):
+            if entry['content_hash'] != hash_file(filepath):
+                self.misses += 1
+                return None
+
+        # Mark as recently used for eviction
+        os.utime(entry_filepath)
+        self.hits += 1
+        return entry['node'], entry['anchor_nodes']
+
+    def get_file_state(self, filepath):
+        """Returns the modification time, size, and content hash of the file, to be taken before parsing it."""
+        stat = os.stat(filepath)
+        return stat.st_mtime_ns, stat.st_size, hash_file(filepath)
+
+    def put(self, filepath, loader_class, file_state, node, anchor_nodes):
+        """Stores the node tree and anchor nodes parsed from the file in the specified state."""
+        mtime_ns, size, content_hash = file_state
+        entry = {
+            'mtime_ns': mtime_ns,
+            'size': size,
+            'content_hash': content_hash,
+            # Pickled together to keep anchor nodes identical to those in the tree
+            'node': node,
+            'anchor_nodes': anchor_nodes
+        }
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry_filepath = self.get_entry_filepath(filepath, loader_class)
+        # Write to a unique temporary file first, as entries may be written by multiple processes
+        temp_filepath = entry_filepath.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp_filepath, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        temp_filepath.replace(entry_filepath)
+
+    def prune(self):
+        """Evicts the least recently used entries until the total size is within the limit."""
+        if not self.directory.is_dir():
+            return
+
+        entries = []
+        for entry_filepath in self.directory.glob('*.pickle'):
+            try:
+                stat = entry_filepath.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry_filepath))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_filepath in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                entry_filepath.unlink()
+            except FileNotFoundError:
+                # Removed by another process
+                pass
+            total_size -= size
+
+def references_nodes(node, node_ids):
+    """Returns True if the node tree contains any of the nodes with the specified IDs,
+    i.e. aliases to anchors defined in other files.
+    """
+    seen = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if id(node) in node_ids:
+            return True
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+
+        if isinstance(node, yaml.MappingNode):
+            for key_node, value_node in node.value:
+                stack.append(key_node)
+                stack.append(value_node)
+        elif isinstance(node, yaml.SequenceNode):
+            stack.extend(node.value)
+
+    return False
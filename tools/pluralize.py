@@ -0,0 +1,33 @@
+"""
+Provides the plural forms of ATLAS object types, ex. case-study -> case-studies.
+
+Plurals name the output lists in ATLAS.yaml and the paths of internal links.
+The known object types are listed here, so building the ATLAS data does not import
+the inflect pluralization library unless a new object type is introduced.
+"""
+
+# Object type to its plural form, as given by inflect, extended with each new object type pluralized
+PLURALS = {
+    'tactic': 'tactics',
+    'technique': 'techniques',
+    'mitigation': 'mitigations',
+    'case-study': 'case-studies',
+}
+
+_engine = None
+
+def plural(object_type):
+    """Returns the plural form of the object type."""
+    try:
+        return PLURALS[object_type]
+    except KeyError:
+        pass
+
+    # Creating an inflect engine is expensive, create it once on the first unknown type
+    global _engine
+    if _engine is None:
+        import inflect
+        _engine = inflect.engine()
+
+    PLURALS[object_type] = _engine.plural(object_type)
+    return PLURALS[object_type]
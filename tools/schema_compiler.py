@@ -0,0 +1,141 @@
+from schema import And, Hook, Literal, Optional, Or, Regex, Schema, Use
+
+"""
+Compiles schema library Schema objects into specialized Python validator functions.
+
+Schema.validate interprets the schema for every value, wrapping each part in new Schema
+objects and building error messages as it goes. The generated code instead checks each value
+directly, with regular expressions compiled once and dictionary keys looked up by name.
+
+Generated code only decides whether data is valid. Invalid data is validated again
+by the original Schema, which raises the same SchemaError as it would have alone,
+so compiled validators accept, reject, and report exactly as their schemas do.
+
+Supported schema parts are those used in schemas/, namely dictionaries of string keys,
+lists, Or, And, Regex, types, and constant values.
+"""
+
+class SchemaCompiler:
+    """Generates the source of a check function returning whether data matches a schema."""
+
+    def __init__(self):
+        # Constants referenced by the generated code, by name
+        self.namespace = {}
+        self.functions = []
+        self.variable_count = 0
+
+    def add_constant(self, value, prefix='_c'):
+        """Returns the name of a new constant in the generated code's namespace."""
+        name = f'{prefix}{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def expression(self, s, var, ignore_extra_keys=False):
+        """Returns a Python expression evaluating to True if the variable matches the schema part.
+
+        ignore_extra_keys is inherited by nested dictionaries until a Schema, Or, or And sets its own,
+        as in Schema.validate.
+        """
+        if isinstance(s, (Hook, Use)):
+            raise TypeError(f'Compiling {type(s).__name__} is not supported')
+        if isinstance(s, Schema):
+            if s._error is not None:
+                raise TypeError('Compiling schemas with custom errors is not supported')
+            return self.expression(s.schema, var, s.ignore_extra_keys)
+        if isinstance(s, Literal):
+            s = s.schema
+
+        if type(s) in (list, tuple, set, frozenset):
+            self.variable_count += 1
+            item = f'_item{self.variable_count}'
+            item_expression = self.expression(Or(*s, ignore_extra_keys=ignore_extra_keys), item)
+            return f'(isinstance({var}, {self.add_constant(type(s))}) and all({item_expression} for {item} in {var}))'
+        if type(s) is dict:
+            return f'{self.dict_function(s, ignore_extra_keys)}({var})'
+        if isinstance(s, type):
+            # Booleans are not accepted as integers, as in Schema.validate
+            check = f'isinstance({var}, {self.add_constant(s)})'
+            if s is int:
+                check = f'({check} and not isinstance({var}, bool))'
+            return check
+        if isinstance(s, Or):
+            if s.only_one or s._error is not None:
+                raise TypeError('Compiling Or with only_one or custom errors is not supported')
+            return '(' + ' or '.join(self.expression(arg, var, s._ignore_extra_keys) for arg in s.args) + ')'
+        if isinstance(s, And):
+            if s._error is not None:
+                raise TypeError('Compiling And with custom errors is not supported')
+            return '(' + ' and '.join(self.expression(arg, var, s._ignore_extra_keys) for arg in s.args) + ')'
+        if isinstance(s, Regex):
+            if s._error is not None:
+                raise TypeError('Compiling Regex with custom errors is not supported')
+            return f'(isinstance({var}, str) and {self.add_constant(s._pattern, "_re")}.search({var}) is not None)'
+        if hasattr(s, 'validate') or callable(s):
+            raise TypeError(f'Compiling {s!r} is not supported')
+        # Constant values are compared for equality
+        return f'{self.add_constant(s)} == {var}'
+
+    def dict_function(self, s, ignore_extra_keys):
+        """Adds a function checking dictionaries against the schema dictionary, returns its name."""
+        name = f'_check_dict{len(self.functions)}'
+        # Reserve the name before nested dictionaries add their functions
+        self.functions.append(None)
+        index = len(self.functions) - 1
+
+        lines = [f'def {name}(d):', '    if not isinstance(d, dict):', '        return False']
+        keys = []
+        for key, value in s.items():
+            optional = isinstance(key, Optional)
+            key_value = key.schema if optional else key
+            if not isinstance(key_value, str):
+                raise TypeError(f'Compiling dictionary key {key!r} is not supported, only string keys are')
+            if optional and hasattr(key, 'default'):
+                raise TypeError(f'Compiling Optional key {key!r} with a default is not supported')
+            keys.append(key_value)
+
+            lines.append(f'    if {key_value!r} in d:')
+            lines.append(f'        v = d[{key_value!r}]')
+            lines.append(f'        if not {self.expression(value, "v", ignore_extra_keys)}:')
+            lines.append('            return False')
+            if not optional:
+                lines.append('    else:')
+                lines.append('        return False')
+        if not ignore_extra_keys:
+            lines.append(f'    if not d.keys() <= {self.add_constant(frozenset(keys))}:')
+            lines.append('        return False')
+        lines.append('    return True')
+
+        self.functions[index] = '\n'.join(lines)
+        return name
+
+    def compile(self, schema, name='check'):
+        """Returns the source of the module defining the check function."""
+        expression = self.expression(schema, 'data')
+        return '\n\n'.join(self.functions + [f'def {name}(data):\n    return {expression}']) + '\n'
+
+def generate_source(schema, name='check'):
+    """Returns the generated Python source of a function checking data against the schema, and its namespace."""
+    compiler = SchemaCompiler()
+    source = compiler.compile(schema, name)
+    return source, compiler.namespace
+
+def compile_check(schema):
+    """Returns a function returning True if data is valid according to the schema."""
+    source, namespace = generate_source(schema)
+    name = getattr(schema, 'name', None) or 'schema'
+    exec(compile(source, f'<compiled {name}>', 'exec'), namespace)
+    return namespace['check']
+
+def compile_validator(schema):
+    """Returns a function validating data against the schema, raising its SchemaError if invalid.
+
+    Valid data is checked by generated code alone, and invalid data is passed to Schema.validate.
+    """
+    check = compile_check(schema)
+
+    def validate(data):
+        if not check(data):
+            schema.validate(data)
+
+    validate.check = check
+    return validate
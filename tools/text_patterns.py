@@ -0,0 +1,27 @@
+import re
+
+"""
+Regular expressions for tokenizing ATLAS text, shared by the text syntax tests and the search index.
+"""
+
+# Markdown Link syntax
+# [title](url)
+REGEX_MARKDOWN_LINK = re.compile(r'\[([^\[]+)\]\((.*?)\)')
+
+# Fully-qualified URLs
+# https://stackoverflow.com/a/17773849
+REGEX_URL = re.compile(r'(https?:\/\/(?:www\.|(?!www))[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|www\.[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|https?:\/\/(?:www\.|(?!www))[a-zA-Z0-9]+\.[^\s]{2,}|www\.[a-zA-Z0-9]+\.[^\s]{2,})')
+REGEX_URL_EXACT = re.compile(rf'^{REGEX_URL.pattern}$')
+
+# Parses out word tokens to be spell checked and searched
+REGEX_WORDS = re.compile(
+    r"\b"           # Start at word boundary
+        r"(?!s\b)"          # Excludes just "s", i.e. from a posessive
+        r"(?![iegUS]\.)"    # Excludes i.e., e.g., U.S.
+        r"(?!\d+[MKB]\b)"   # Excludes 70K, M, B
+    r"(?:"          # Non capture group
+        r"[\w&]+"       # All words, can have &, i.e. R&D
+        r"(?:'t)?"      # Optionally include contractions
+        r"(?:\(s\))?"   # Optionally include (s) at end
+    r")"
+    )
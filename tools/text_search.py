@@ -0,0 +1,220 @@
+from argparse import ArgumentParser
+from collections import namedtuple
+import json
+import math
+from pathlib import Path
+import re
+
+from tools.atlas_index import iter_data_objects
+from tools.text_patterns import REGEX_MARKDOWN_LINK, REGEX_WORDS
+
+"""
+Full-text search of ATLAS data objects, ranked by BM25.
+
+The search index covers the names, descriptions, and summaries of data objects
+and the descriptions of case study procedure steps, tokenized as words like the spelling test.
+It is stored as ATLAS.search, a JSON file of positional postings lists.
+
+Queries are words and "quoted phrases", which must all match, with OR between alternatives, ex.
+    "model inversion" membership OR "training data"
+
+Run this script with `python -m tools.text_search <query>` to allow for local imports.
+"""
+
+# Increment when the index format changes
+INDEX_VERSION = 1
+
+# Text fields of data objects that are searched, along with procedure step descriptions
+SEARCH_FIELDS = ('name', 'description', 'summary')
+
+# BM25 parameters for term frequency saturation and document length normalization
+K1 = 1.2
+B = 0.75
+
+# Quoted phrases or single query words
+REGEX_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+SearchResult = namedtuple('SearchResult', ['id', 'score'])
+
+def tokenize(text):
+    """Returns the lowercase word tokens of the text, with Markdown links replaced by their titles."""
+    return [token.lower() for token in REGEX_WORDS.findall(REGEX_MARKDOWN_LINK.sub(r'\1', text))]
+
+def iter_text_fields(obj):
+    """Yields the searched text of the data object."""
+    for field in SEARCH_FIELDS:
+        if isinstance(obj.get(field), str):
+            yield obj[field]
+    for step in obj.get('procedure', []):
+        yield step['description']
+
+def build_search_index(data):
+    """Returns the search index of ATLAS data, as stored in ATLAS.search."""
+    docs = []
+    # Term to document index to token positions
+    term_positions = {}
+    for obj in iter_data_objects(data):
+        doc = len(docs)
+        position = 0
+        length = 0
+        for text in iter_text_fields(obj):
+            tokens = tokenize(text)
+            for i, token in enumerate(tokens, position):
+                term_positions.setdefault(token, {}).setdefault(doc, []).append(i)
+            # Skip a position between fields so phrases do not match across them
+            position += len(tokens) + 1
+            length += len(tokens)
+        docs.append([obj['id'], length])
+
+    return {
+        'version': INDEX_VERSION,
+        'docs': docs,
+        'postings': {term: encode_postings(positions) for term, positions in sorted(term_positions.items())},
+    }
+
+def encode_postings(doc_positions):
+    """Returns the document to positions dictionary as a flat list of integers,
+    [document delta, term frequency, position deltas..., ...] in document order.
+    """
+    encoded = []
+    previous_doc = 0
+    for doc, positions in sorted(doc_positions.items()):
+        encoded += [doc - previous_doc, len(positions)]
+        encoded += [position - previous for previous, position in zip([0] + positions, positions)]
+        previous_doc = doc
+    return encoded
+
+def decode_postings(encoded):
+    """Returns the document to positions dictionary from encode_postings."""
+    doc_positions = {}
+    doc = 0
+    i = 0
+    while i < len(encoded):
+        doc += encoded[i]
+        frequency = encoded[i + 1]
+        positions = []
+        position = 0
+        for delta in encoded[i + 2:i + 2 + frequency]:
+            position += delta
+            positions.append(position)
+        doc_positions[doc] = positions
+        i += 2 + frequency
+    return doc_positions
+
+def write_search_index(data, output_filepath):
+    """Writes the search index of ATLAS data to the filepath."""
+    with open(output_filepath, 'w') as f:
+        json.dump(build_search_index(data), f, separators=(',', ':'))
+
+def parse_query(query):
+    """Returns the query as a list of OR alternatives, each a list of token tuples that must all match,
+    where tuples of multiple tokens are phrases.
+    """
+    alternatives = [[]]
+    for match in REGEX_QUERY.finditer(query):
+        phrase, word = match.groups()
+        if word == 'OR':
+            alternatives.append([])
+        elif word == 'AND':
+            # Terms are required by default
+            continue
+        else:
+            # Words with punctuation, ex. AML.T0000, tokenize as phrases
+            tokens = tuple(tokenize(phrase if phrase is not None else word))
+            if tokens:
+                alternatives[-1].append(tokens)
+    return [terms for terms in alternatives if terms]
+
+class SearchIndex:
+    """Searches an ATLAS search index, decoding postings lists as terms are queried."""
+
+    def __init__(self, index):
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f'Unsupported search index version {index.get("version")}, expected {INDEX_VERSION}')
+        self.ids = [atlas_id for atlas_id, _ in index['docs']]
+        self.lengths = [length for _, length in index['docs']]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+        self.encoded_postings = index['postings']
+        # Term to decoded postings, filled as terms are queried
+        self.postings_cache = {}
+
+    @classmethod
+    def load(cls, filepath):
+        """Returns the search index stored at the filepath."""
+        with open(filepath) as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_data(cls, data):
+        """Returns a search index of the ATLAS data."""
+        return cls(build_search_index(data))
+
+    def get_postings(self, term):
+        """Returns the document index to token positions dictionary of the term."""
+        if term not in self.postings_cache:
+            self.postings_cache[term] = decode_postings(self.encoded_postings.get(term, []))
+        return self.postings_cache[term]
+
+    def match_terms(self, tokens):
+        """Returns the set of document indices containing the tokens, consecutively if a phrase."""
+        docs = set(self.get_postings(tokens[0]))
+        for token in tokens[1:]:
+            docs &= self.get_postings(token).keys()
+
+        if len(tokens) == 1:
+            return docs
+
+        phrase_docs = set()
+        for doc in docs:
+            following = [set(self.get_postings(token)[doc]) for token in tokens[1:]]
+            if any(all(start + i + 1 in positions for i, positions in enumerate(following))
+                    for start in self.get_postings(tokens[0])[doc]):
+                phrase_docs.add(doc)
+        return phrase_docs
+
+    def score(self, doc, terms):
+        """Returns the BM25 score of the document for the query terms."""
+        score = 0
+        length_norm = 1 - B + B * self.lengths[doc] / self.average_length
+        for term in terms:
+            postings = self.get_postings(term)
+            frequency = len(postings.get(doc, ()))
+            if frequency:
+                idf = math.log(1 + (len(self.ids) - len(postings) + 0.5) / (len(postings) + 0.5))
+                score += idf * frequency * (K1 + 1) / (frequency + K1 * length_norm)
+        return score
+
+    def search(self, query, limit=10):
+        """Returns SearchResults of the data objects matching the query, highest BM25 score first."""
+        alternatives = parse_query(query)
+
+        docs = set()
+        for required_terms in alternatives:
+            matching = None
+            for tokens in required_terms:
+                matching = self.match_terms(tokens) if matching is None else matching & self.match_terms(tokens)
+                if not matching:
+                    break
+            docs |= matching
+
+        terms = {token for required_terms in alternatives for tokens in required_terms for token in tokens}
+        scores = {doc: self.score(doc, terms) for doc in docs}
+        # Ties are ordered as in the data
+        ranked = sorted(docs, key=lambda doc: (-scores[doc], doc))
+        return [SearchResult(self.ids[doc], scores[doc]) for doc in ranked[:limit]]
+
+def main():
+    parser = ArgumentParser(description='Searches ATLAS data objects by text.')
+    parser.add_argument("query", type=str, help='Words and "quoted phrases" to match, with OR between alternatives')
+    parser.add_argument("--index", type=str, default="dist/ATLAS.search", help="Path to the search index, as output by tools/create_matrix.py --search")
+    parser.add_argument("--limit", "-n", type=int, default=10, help="Maximum number of results")
+    args = parser.parse_args()
+
+    if not Path(args.index).is_file():
+        parser.error(f'Search index {args.index} not found, create it with `python tools/create_matrix.py --search`')
+
+    for result in SearchIndex.load(args.index).search(args.query, args.limit):
+        print(f'{result.id:<16} {result.score:6.2f}')
+
+if __name__ == '__main__':
+    main()
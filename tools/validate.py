@@ -0,0 +1,137 @@
+from argparse import ArgumentParser
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+from pathlib import Path
+import sys
+import time
+
+from schema import SchemaError
+
+from schemas.atlas_obj import case_study_schema, mitigation_schema, subtechnique_schema, tactic_schema, technique_schema
+from tools.atlas_index import iter_data_objects
+from tools.create_matrix import load_atlas_data
+from tools.schema_compiler import compile_validator
+
+"""
+Validates ATLAS data objects against the schemas in schemas/atlas_obj.py, outside of pytest.
+
+Each tactic, technique, subtechnique, mitigation, and case study is validated by a validator
+compiled from its schema, optionally in worker processes, and all errors are collected into one report.
+The report is printed as a summary and can be written as JSON.
+
+Run this script with `python -m tools.validate` to allow for local imports.
+"""
+
+# Schema name to the schema validating data objects of that kind
+SCHEMAS = {
+    'tactic': tactic_schema,
+    'technique': technique_schema,
+    'subtechnique': subtechnique_schema,
+    'mitigation': mitigation_schema,
+    'case-study': case_study_schema,
+}
+
+# Schema name to its compiled validator, which raises the same errors as the schema
+VALIDATORS = {name: compile_validator(schema) for name, schema in SCHEMAS.items()}
+
+ValidationError = namedtuple('ValidationError', ['id', 'schema', 'message'])
+
+def get_schema_name(obj):
+    """Returns the name of the schema in SCHEMAS for the data object, None if it has none.
+
+    Techniques with a parent technique are subtechniques.
+    """
+    object_type = obj.get('object-type')
+    if object_type == 'technique' and 'subtechnique-of' in obj:
+        return 'subtechnique'
+    return object_type if object_type in SCHEMAS else None
+
+def validate_object(obj):
+    """Returns a ValidationError if the data object does not match its schema, otherwise None."""
+    schema_name = get_schema_name(obj)
+    if schema_name is None:
+        return ValidationError(obj.get('id'), None, f"Unknown object-type: {obj.get('object-type')!r}")
+    try:
+        VALIDATORS[schema_name](obj)
+    except SchemaError as e:
+        return ValidationError(obj.get('id'), schema_name, e.code)
+    return None
+
+def validate_objects(objects):
+    """Returns the ValidationErrors of the data objects, in order."""
+    return [error for error in map(validate_object, objects) if error is not None]
+
+def split_chunks(objects, count):
+    """Returns the objects split into up to count contiguous chunks of nearly equal size."""
+    size, remainder = divmod(len(objects), count)
+    chunks = []
+    start = 0
+    for i in range(count):
+        end = start + size + (i < remainder)
+        if end > start:
+            chunks.append(objects[start:end])
+        start = end
+    return chunks
+
+def validate_atlas_data(data, jobs=1):
+    """Returns a report dictionary of validating each data object in ATLAS data against its schema.
+
+    Objects are validated by the specified number of worker processes,
+    where 0 uses all available CPUs and 1 validates in this process.
+    Errors are listed in data order.
+    """
+    objects = list(iter_data_objects(data))
+    if jobs == 1:
+        errors = validate_objects(objects)
+    else:
+        workers = jobs or os.cpu_count()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            errors = [error for chunk_errors in pool.map(validate_objects, split_chunks(objects, workers)) for error in chunk_errors]
+
+    return {
+        'id': data.get('id'),
+        'version': data.get('version'),
+        'objects': dict(Counter(get_schema_name(obj) or obj.get('object-type') for obj in objects)),
+        'valid': not errors,
+        'errors': [error._asdict() for error in errors],
+    }
+
+def format_summary(report):
+    """Returns a human-readable summary of the validation report."""
+    counts = ', '.join(f'{count} {name}' for name, count in report['objects'].items())
+    lines = [f"Validated {sum(report['objects'].values())} data objects in {report['id']} {report['version']} ({counts})"]
+    for error in report['errors']:
+        # Schema error messages can span lines
+        message = error['message'].replace('\n', '\n    ')
+        lines.append(f"  {error['id']} [{error['schema']}]: {message}")
+    lines.append(f"{len(report['errors'])} error(s)" if report['errors'] else 'All data objects are valid')
+    return '\n'.join(lines)
+
+def main():
+    parser = ArgumentParser(description='Validates ATLAS data objects against their schemas.')
+    parser.add_argument("--data", "-d", type=str, default="data/data.yaml", help="Path to data.yaml")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of processes validating data objects, 0 for all CPUs")
+    parser.add_argument("--report", "-r", type=str, default=None, help="Path to write the report as JSON, - for standard output")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = load_atlas_data(args.data, jobs=args.jobs)
+    loaded = time.perf_counter()
+    report = validate_atlas_data(data, jobs=args.jobs)
+    report['seconds'] = {'load': round(loaded - start, 3), 'validate': round(time.perf_counter() - loaded, 3)}
+
+    if args.report == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        if args.report is not None:
+            Path(args.report).write_text(json.dumps(report, indent=2) + '\n')
+        print(format_summary(report))
+        print(f"Loaded in {report['seconds']['load']:.2f}s, validated in {report['seconds']['validate']:.2f}s")
+
+    sys.exit(0 if report['valid'] else 1)
+
+if __name__ == '__main__':
+    main()